@@ -0,0 +1,618 @@
+"""Array-backed Kalman filtering and smoothing.
+
+Filter and smoother states are stored as contiguous arrays (means of shape (N, D),
+Cholesky factors of shape (N, D, D)) instead of lists of ProbNum random variables.
+All steps are computed in square-root form.
+"""
+
+import warnings
+
+import numpy as np
+import scipy.linalg
+from probnum import filtsmooth, random_variables, statespace
+
+from .kalman import MyKalman
+
+########################################################################
+########################################################################
+# Square-root kernels
+########################################################################
+########################################################################
+
+
+def tria(matrix):
+    """Lower-triangular square root of ``matrix @ matrix.T`` via a QR decomposition.
+
+    Works on stacks of matrices, i.e. on arrays of shape (..., n, k).
+
+    Examples
+    --------
+    >>> M = np.arange(6.0).reshape((2, 3))
+    >>> L = tria(M)
+    >>> np.allclose(L @ L.T, M @ M.T)
+    True
+    >>> np.allclose(np.triu(L, 1), 0.0)
+    True
+    >>> np.all(np.diag(L) >= 0.0)
+    True
+    """
+    n, k = matrix.shape[-2:]
+    if k < n:
+        padding = np.zeros(matrix.shape[:-1] + (n - k,))
+        matrix = np.concatenate((matrix, padding), axis=-1)
+    triu = np.linalg.qr(np.swapaxes(matrix, -1, -2), mode="r")
+    tril = np.swapaxes(triu[..., :n, :n], -1, -2)
+
+    # Flip column signs so that the diagonal is nonnegative (as in ProbNum)
+    signs = np.sign(np.diagonal(tril, axis1=-2, axis2=-1))
+    signs = np.where(signs == 0.0, 1.0, signs)
+    return tril * signs[..., None, :]
+
+
+def predict(mean, cov_cholesky, state_trans, proc_noise_cholesky, precon):
+    """Square-root prediction through a (preconditioned) linear transition.
+
+    The transition is :math:`x' = P A P^{-1} x + P w` with :math:`w \\sim N(0, SS^\\top)`,
+    where :math:`P` is the diagonal matrix with entries ``precon``.
+    """
+    mean_ = mean / precon
+    chol_ = cov_cholesky / precon[..., None]
+
+    pred_mean = _matvec(state_trans, mean_)
+    pred_chol = tria(
+        np.concatenate((state_trans @ chol_, proc_noise_cholesky), axis=-1)
+    )
+    return precon * pred_mean, precon[..., None] * pred_chol
+
+
+def update(mean, cov_cholesky, meas_mat, shift, meas_noise_cholesky, data):
+    """Square-root update on the observation ``data = H x + b + noise``.
+
+    Returns the conditioned mean and Cholesky factor, as well as the residual
+    ``H m + b - data`` and the Cholesky factor of its covariance.
+    Works on stacks, i.e. all arguments may carry the same leading batch shape.
+    """
+    output_dim, input_dim = meas_mat.shape[-2:]
+    batch_shape = meas_mat.shape[:-2]
+
+    residual = _matvec(meas_mat, mean) + shift - data
+    blockmat = np.concatenate(
+        (
+            np.concatenate((meas_noise_cholesky, meas_mat @ cov_cholesky), axis=-1),
+            np.concatenate(
+                (np.zeros(batch_shape + (input_dim, output_dim)), cov_cholesky),
+                axis=-1,
+            ),
+        ),
+        axis=-2,
+    )
+    big_tril = tria(blockmat)
+    residual_cholesky = big_tril[..., :output_dim, :output_dim]
+    crosscov_cholesky = big_tril[..., output_dim:, :output_dim]
+    new_cov_cholesky = big_tril[..., output_dim:, output_dim:]
+
+    if batch_shape:
+        whitened_residual = np.linalg.solve(residual_cholesky, residual[..., None])
+        new_mean = mean - _matvec(crosscov_cholesky, whitened_residual[..., 0])
+        return new_mean, new_cov_cholesky, residual, residual_cholesky
+
+    try:
+        whitened_residual = scipy.linalg.solve_triangular(
+            residual_cholesky, residual, lower=True
+        )
+    except (np.linalg.LinAlgError, ValueError):
+        whitened_residual = np.linalg.lstsq(residual_cholesky, residual, rcond=None)[0]
+    new_mean = mean - crosscov_cholesky @ whitened_residual
+    return new_mean, new_cov_cholesky, residual, residual_cholesky
+
+
+def smooth_step(
+    mean,
+    cov_cholesky,
+    smoothed_mean,
+    smoothed_cov_cholesky,
+    state_trans,
+    proc_noise_cholesky,
+    precon,
+):
+    """Square-root Rauch-Tung-Striebel step from the next smoothed to the current
+    filtered state.
+
+    Works on stacks, i.e. all arguments may carry the same leading batch shape.
+    Returns the smoothed mean, its Cholesky factor, and the smoothing gain
+    (in preconditioned coordinates).
+    """
+    mean_ = mean / precon
+    chol_ = cov_cholesky / precon[..., None]
+    smoothed_mean_ = smoothed_mean / precon
+    smoothed_chol_ = smoothed_cov_cholesky / precon[..., None]
+
+    pred_mean = _matvec(state_trans, mean_)
+    chol_pred_factor = state_trans @ chol_
+    pred_chol = tria(np.concatenate((chol_pred_factor, proc_noise_cholesky), axis=-1))
+
+    # gain = C A^T (L L^T)^{-1}, computed via two triangular solves
+    crosscov = chol_ @ np.swapaxes(chol_pred_factor, -1, -2)
+    gain = np.swapaxes(_cho_solve(pred_chol, np.swapaxes(crosscov, -1, -2)), -1, -2)
+
+    new_mean = mean_ + _matvec(gain, smoothed_mean_ - pred_mean)
+    identity = np.eye(mean.shape[-1])
+    new_chol = tria(
+        np.concatenate(
+            (
+                (identity - gain @ state_trans) @ chol_,
+                gain @ proc_noise_cholesky,
+                gain @ smoothed_chol_,
+            ),
+            axis=-1,
+        )
+    )
+    return precon * new_mean, precon[..., None] * new_chol, gain
+
+
+def _matvec(mat, vec):
+    return (mat @ vec[..., None])[..., 0]
+
+
+def _cho_solve(cholesky, rhs):
+    """Solve (L L^T) X = rhs for stacks of lower-triangular L."""
+    if cholesky.ndim == 2:
+        return scipy.linalg.cho_solve((cholesky, True), rhs)
+    return np.linalg.solve(
+        np.swapaxes(cholesky, -1, -2), np.linalg.solve(cholesky, rhs)
+    )
+
+
+########################################################################
+########################################################################
+# Discretisation of the prior and extraction of measurement models
+########################################################################
+########################################################################
+
+
+def discretise_transitions(dynamics_model, dts):
+    """Discretise the prior for an array of step sizes.
+
+    Returns the state transition matrices and process noise Cholesky factors
+    (both with shape (len(dts), D, D)) and the diagonal preconditioner (shape
+    (len(dts), D)). For integrated Wiener process priors, the matrices are the
+    (step-independent) preconditioned ones; for all other LTI priors, the
+    preconditioner is the identity.
+    """
+    dts = np.asarray(dts)
+    dimension = dynamics_model.dimension
+    if hasattr(dynamics_model, "equivalent_discretisation_preconditioned"):
+        discretisation = dynamics_model.equivalent_discretisation_preconditioned
+        state_trans = np.broadcast_to(
+            discretisation.state_trans_mat, (len(dts), dimension, dimension)
+        )
+        proc_noise_cholesky = np.broadcast_to(
+            discretisation.proc_noise_cov_cholesky, (len(dts), dimension, dimension)
+        )
+        precon = _precon_diagonals(dynamics_model.precon, dts)
+        return state_trans, proc_noise_cholesky, precon
+
+    discretisations = [dynamics_model.discretise(dt) for dt in dts]
+    state_trans = np.stack([d.state_trans_mat for d in discretisations])
+    proc_noise_cholesky = np.stack([d.proc_noise_cov_cholesky for d in discretisations])
+    precon = np.ones((len(dts), dimension))
+    return state_trans, proc_noise_cholesky, precon
+
+
+def _precon_diagonals(precon, dts):
+    """Diagonals of the Nordsieck-like preconditioner for many step sizes at once."""
+    if not hasattr(precon, "powers"):
+        return np.stack([np.diag(precon(dt)) for dt in dts])
+    scaling = np.abs(dts)[:, None] ** precon.powers / precon.scales
+    return np.tile(scaling, (1, precon.spatialdim))
+
+
+def measurement_components(measmod, t, linearise_at):
+    """Extract (H, b, S) of a measurement model ``H x + b + noise``, ``noise ~ N(0, SS^T)``.
+
+    Linear(ised) models are read off directly; extended Kalman filter
+    components are linearised at ``linearise_at`` (the predicted mean).
+    """
+    if isinstance(measmod, statespace.DiscreteLinearGaussian):
+        return (
+            measmod.state_trans_mat_fun(t),
+            measmod.shift_vec_fun(t),
+            measmod.proc_noise_cov_cholesky_fun(t),
+        )
+
+    non_linear_model = measmod.non_linear_model
+    meas_mat = non_linear_model.jacob_state_trans_fun(t, linearise_at)
+    shift = non_linear_model.state_trans_fun(t, linearise_at) - meas_mat @ linearise_at
+    return (
+        meas_mat,
+        shift,
+        non_linear_model.proc_noise_cov_cholesky_fun(t),
+    )
+
+
+########################################################################
+########################################################################
+# Filter and smoother
+########################################################################
+########################################################################
+
+
+class ArrayKalman(MyKalman):
+    """Kalman filtering and smoothing on preallocated arrays.
+
+    Drop-in replacement for :class:`MyKalman` for linear time-invariant priors
+    (e.g. integrated Wiener processes). The prior must not be a bridge.
+
+    Examples
+    --------
+    >>> ibm = statespace.IBM(ordint=2, spatialdim=1, forward_implementation="sqrt", backward_implementation="sqrt")
+    >>> initrv = random_variables.Normal(np.zeros(3), np.eye(3), cov_cholesky=np.eye(3))
+    >>> measmod = statespace.DiscreteLTIGaussian(
+    ...     ibm.proj2coord(0), -np.ones(1), np.zeros((1, 1)),
+    ...     proc_noise_cov_cholesky=np.zeros((1, 1)),
+    ...     forward_implementation="sqrt", backward_implementation="sqrt",
+    ... )
+    >>> kalman = ArrayKalman(ibm, None, initrv)
+    >>> times = np.linspace(0.0, 1.0, 5)
+    >>> posterior = kalman.filtsmooth(np.zeros((5, 1)), times, [measmod] * 5)
+    >>> print(posterior.means.shape, posterior.cov_choleskies.shape)
+    (5, 3) (5, 3, 3)
+    >>> print(np.round(posterior.means[:, 0], 4))
+    [1. 1. 1. 1. 1.]
+    """
+
+    def filter(
+        self,
+        dataset: np.ndarray,
+        times: np.ndarray,
+        measmod_list,
+    ):
+        """Apply Gaussian filtering (no smoothing!) to a data set.
+
+        Parameters
+        ----------
+        dataset : array_like, shape (N, M)
+            Data set that is filtered.
+        times : array_like, shape (N,)
+            Temporal locations of the data points.
+        measmod_list : list
+            One measurement model (or a list of measurement models) per location.
+
+        Returns
+        -------
+        ArrayFilteringPosterior
+            Posterior distribution of the filtered output
+        """
+        if not isinstance(measmod_list, list):
+            raise RuntimeError
+        dataset, times = np.asarray(dataset), np.asarray(times)
+
+        N, D = len(times), self.dynamics_model.dimension
+        means = np.empty((N, D))
+        cov_choleskies = np.empty((N, D, D))
+        self.sigmas = []
+        self.normalisation_for_sigmas = 0.0
+
+        state_trans, proc_noise_cholesky, precon = discretise_transitions(
+            self.dynamics_model, np.diff(times)
+        )
+
+        mean, cov_cholesky = self.initrv.mean, self.initrv.cov_cholesky
+        for idx, (t, y, mm) in enumerate(zip(times, dataset, measmod_list)):
+            if idx > 0 and t > times[idx - 1]:
+                mean, cov_cholesky = predict(
+                    mean,
+                    cov_cholesky,
+                    state_trans[idx - 1],
+                    proc_noise_cholesky[idx - 1],
+                    precon[idx - 1],
+                )
+
+            if not isinstance(mm, list):
+                mm = [mm]
+            for mm_ in mm:
+                meas_mat, shift, meas_noise_cholesky = measurement_components(
+                    mm_, t, mean
+                )
+                data = y if len(y) == len(shift) else np.zeros(len(shift))
+                mean, cov_cholesky, residual, residual_cholesky = update(
+                    mean, cov_cholesky, meas_mat, shift, meas_noise_cholesky, data
+                )
+                self.sigmas.append(_mahalanobis_squared(residual, residual_cholesky))
+                self.normalisation_for_sigmas += len(residual)
+
+            means[idx] = mean
+            cov_choleskies[idx] = cov_cholesky
+
+        return ArrayFilteringPosterior(
+            locations=times,
+            means=means,
+            cov_choleskies=cov_choleskies,
+            transition=self.dynamics_model,
+        )
+
+    def smooth(self, filter_posterior):
+        """Apply Rauch-Tung-Striebel smoothing to an :class:`ArrayFilteringPosterior`."""
+        times = filter_posterior.locations
+        filtered_means = filter_posterior.means
+        filtered_choleskies = filter_posterior.cov_choleskies
+
+        N, D = filtered_means.shape
+        means = np.empty((N, D))
+        cov_choleskies = np.empty((N, D, D))
+        gains = np.zeros((max(N - 1, 0), D, D))
+
+        state_trans, proc_noise_cholesky, precon = discretise_transitions(
+            self.dynamics_model, np.diff(times)
+        )
+
+        means[-1] = filtered_means[-1]
+        cov_choleskies[-1] = filtered_choleskies[-1]
+        for idx in reversed(range(N - 1)):
+            if not times[idx + 1] > times[idx]:
+                means[idx], cov_choleskies[idx] = (
+                    means[idx + 1],
+                    cov_choleskies[idx + 1],
+                )
+                continue
+            means[idx], cov_choleskies[idx], gains[idx] = smooth_step(
+                filtered_means[idx],
+                filtered_choleskies[idx],
+                means[idx + 1],
+                cov_choleskies[idx + 1],
+                state_trans[idx],
+                proc_noise_cholesky[idx],
+                precon[idx],
+            )
+
+        return ArraySmoothingPosterior(
+            locations=times,
+            means=means,
+            cov_choleskies=cov_choleskies,
+            transition=self.dynamics_model,
+            filtering_posterior=filter_posterior,
+            gains=gains,
+        )
+
+
+def _mahalanobis_squared(residual, residual_cholesky):
+    try:
+        whitened = scipy.linalg.solve_triangular(
+            residual_cholesky, residual, lower=True, check_finite=False
+        )
+        if np.all(np.isfinite(whitened)):
+            return whitened @ whitened
+    except (np.linalg.LinAlgError, ValueError):
+        pass
+    warnings.warn(
+        "The Cholesky factor of the residual covariance is singular; "
+        "the Mahalanobis norm of the residual uses a pseudo-inverse instead.",
+        RuntimeWarning,
+    )
+    cov = residual_cholesky @ residual_cholesky.T
+    return residual @ scipy.linalg.pinv(cov) @ residual
+
+
+########################################################################
+########################################################################
+# Posteriors
+########################################################################
+########################################################################
+
+
+class ArrayKalmanPosterior:
+    """Posterior distribution that stores its states as arrays.
+
+    Exposes the parts of the ProbNum ``KalmanPosterior`` interface that the
+    BVP solver relies on: ``locations``, ``states`` (and ``state_rvs``),
+    ``transition``, and evaluation via ``__call__``. The states are a
+    ``StackedNormal`` view on ``means`` and ``cov_choleskies``.
+    """
+
+    def __init__(self, locations, means, cov_choleskies, transition):
+        self.locations = np.asarray(locations)
+        self.means = means
+        self.cov_choleskies = cov_choleskies
+        self.transition = transition
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __getitem__(self, idx):
+        return self.states[idx]
+
+    @property
+    def states(self):
+        return StackedNormal(self.means, self.cov_choleskies)
+
+    @property
+    def state_rvs(self):
+        return self.states
+
+    def __call__(self, t):
+        """Evaluate the posterior at location(s) ``t``."""
+        if np.isscalar(t):
+            mean, cov_cholesky = self.interpolate_arrays(np.atleast_1d(t))
+            return _to_normal(mean[0], cov_cholesky[0])
+
+        t = np.asarray(t)
+        if not np.all(np.diff(t) >= 0.0):
+            raise ValueError("Time-points have to be sorted.")
+        means, cov_choleskies = self.interpolate_arrays(t)
+        return StackedNormal(means, cov_choleskies)
+
+    def interpolate_arrays(self, t):
+        """Evaluate means and Cholesky factors of the posterior at the locations ``t``.
+
+        All locations are found with a single ``searchsorted``; the
+        interpolation between locations is vectorised over the queries.
+        """
+        t = np.asarray(t, dtype=float)
+        if np.any(t < self.locations[0]):
+            raise NotImplementedError("Extrapolation to the left is not implemented.")
+
+        indices = np.searchsorted(self.locations, t, side="left")
+        on_grid = self.locations[np.minimum(indices, len(self.locations) - 1)] == t
+        means = np.empty((len(t),) + self.means.shape[1:])
+        cov_choleskies = np.empty((len(t),) + self.cov_choleskies.shape[1:])
+        means[on_grid] = self.means[indices[on_grid]]
+        cov_choleskies[on_grid] = self.cov_choleskies[indices[on_grid]]
+        if not np.all(on_grid):
+            off_grid = ~on_grid
+            means[off_grid], cov_choleskies[off_grid] = self._interpolate(
+                t[off_grid], indices[off_grid]
+            )
+        return means, cov_choleskies
+
+    def mean_and_var(self, t, coord=None):
+        """Means and marginal variances of the posterior at the locations ``t``.
+
+        If ``coord`` is specified, the moments are projected onto the
+        ``coord``-th derivative (via ``transition.proj2coord(coord)``).
+        No random variables are created.
+        """
+        means, cov_choleskies = self.interpolate_arrays(t)
+        if coord is not None:
+            proj = self.transition.proj2coord(coord)
+            means = means @ proj.T
+            cov_choleskies = proj @ cov_choleskies
+        return means, np.einsum("...ij,...ij->...i", cov_choleskies, cov_choleskies)
+
+    def _interpolate(self, t, indices):
+        """Predict from the locations before ``t`` (all ``t`` lie off the grid)."""
+        previous = indices - 1
+        state_trans, proc_noise_cholesky, precon = discretise_transitions(
+            self.transition, t - self.locations[previous]
+        )
+        return predict(
+            self.means[previous],
+            self.cov_choleskies[previous],
+            state_trans,
+            proc_noise_cholesky,
+            precon,
+        )
+
+
+class ArrayFilteringPosterior(ArrayKalmanPosterior):
+    """Filtering posterior. Evaluation between locations is a prediction."""
+
+
+class ArraySmoothingPosterior(ArrayKalmanPosterior):
+    """Smoothing posterior.
+
+    Evaluation between locations predicts from the previous filtered state and
+    applies a smoothing step with the next smoothed state (as in ProbNum).
+    """
+
+    def __init__(
+        self,
+        locations,
+        means,
+        cov_choleskies,
+        transition,
+        filtering_posterior=None,
+        gains=None,
+    ):
+        super().__init__(
+            locations=locations,
+            means=means,
+            cov_choleskies=cov_choleskies,
+            transition=transition,
+        )
+        self.filtering_posterior = filtering_posterior
+        self.gains = gains
+
+    def _interpolate(self, t, indices):
+        means, cov_choleskies = self.filtering_posterior._interpolate(t, indices)
+
+        # Beyond the last location, there is nothing to smooth with.
+        inside = indices < len(self.locations)
+        if np.any(inside):
+            next_ = indices[inside]
+            state_trans, proc_noise_cholesky, precon = discretise_transitions(
+                self.transition, self.locations[next_] - t[inside]
+            )
+            means[inside], cov_choleskies[inside], _ = smooth_step(
+                means[inside],
+                cov_choleskies[inside],
+                self.means[next_],
+                self.cov_choleskies[next_],
+                state_trans,
+                proc_noise_cholesky,
+                precon,
+            )
+        return means, cov_choleskies
+
+
+class StackedNormal:
+    """Sequence of Normal random variables stored as stacked arrays.
+
+    Offers the parts of the ``_RandomVariableList`` interface that the solver
+    uses (``mean``, ``cov``, ``var``, ``std``, indexing and iteration), but only
+    creates ``Normal`` objects when single elements are accessed.
+    """
+
+    def __init__(self, mean, cov_cholesky):
+        self.mean = mean
+        self.cov_cholesky = cov_cholesky
+
+    def __len__(self):
+        return len(self.mean)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (slice, list, np.ndarray)):
+            return StackedNormal(self.mean[idx], self.cov_cholesky[idx])
+        return _to_normal(self.mean[idx], self.cov_cholesky[idx])
+
+    def __iter__(self):
+        return (_to_normal(m, l) for m, l in zip(self.mean, self.cov_cholesky))
+
+    @property
+    def shape(self):
+        return self.mean.shape
+
+    @property
+    def cov(self):
+        return self.cov_cholesky @ np.swapaxes(self.cov_cholesky, -1, -2)
+
+    @property
+    def var(self):
+        return np.einsum("...ij,...ij->...i", self.cov_cholesky, self.cov_cholesky)
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+def as_array_posterior(posterior):
+    """Array-backed copy of a ProbNum Kalman posterior.
+
+    Gives access to the batched evaluation (``interpolate_arrays``,
+    ``mean_and_var``) for posteriors of the sequential engine.
+    Array posteriors are returned unchanged.
+    """
+    if isinstance(posterior, ArrayKalmanPosterior):
+        return posterior
+
+    means = np.asarray(posterior.states.mean)
+    cov_choleskies = np.stack([rv.cov_cholesky for rv in posterior.states])
+    if isinstance(posterior, filtsmooth.SmoothingPosterior):
+        return ArraySmoothingPosterior(
+            locations=posterior.locations,
+            means=means,
+            cov_choleskies=cov_choleskies,
+            transition=posterior.transition,
+            filtering_posterior=as_array_posterior(posterior.filtering_posterior),
+        )
+    return ArrayFilteringPosterior(
+        locations=posterior.locations,
+        means=means,
+        cov_choleskies=cov_choleskies,
+        transition=posterior.transition,
+    )
+
+
+def _to_normal(mean, cov_cholesky):
+    return random_variables.Normal(
+        mean=mean, cov=cov_cholesky @ cov_cholesky.T, cov_cholesky=cov_cholesky
+    )
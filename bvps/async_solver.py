@@ -0,0 +1,129 @@
+"""Asyncio interface to the BVP solver.
+
+A solve is CPU-bound and blocks for seconds to minutes. ``AsyncBVPSolver``
+runs each refinement of ``BVPSolver.solution_generator`` in an executor, so the
+event loop stays responsive, and yields the posterior after each refinement.
+
+Cancellation is cooperative: cancelling the awaiting task sets a
+``threading.Event`` that the solver checks before every IEKS iteration and
+when it resumes after a refinement. The task waits until the current IEKS
+iteration has finished before it re-raises ``asyncio.CancelledError``, so no
+solve keeps running in the background.
+
+The state of a solve is kept in its ``solve_context.SolveContext``, so
+concurrent solves can share one solver. Pass each solve its own ``context``
+to read its statistics.
+"""
+
+import asyncio
+import threading
+
+_DONE = object()
+
+
+class AsyncBVPSolver:
+    """Run a ``BVPSolver`` in an executor.
+
+    Parameters
+    ----------
+    solver
+        The ``BVPSolver``. It can serve concurrent solves.
+    executor
+        A ``concurrent.futures.Executor`` that runs the refinements. Defaults to
+        the executor of the event loop.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from probnum import statespace
+    >>> from bvps import bvp_solver, problem_examples
+    >>> bvp = problem_examples.problem_24_second_order(xi=0.5)
+    >>> ibm = statespace.IBM(
+    ...     ordint=2,
+    ...     spatialdim=1,
+    ...     forward_implementation="sqrt",
+    ...     backward_implementation="sqrt",
+    ... )
+    >>> solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+    ...     ibm, filtsmooth_engine="arrays"
+    ... )
+    >>> grid = np.linspace(bvp.t0, bvp.tmax, 10)
+    >>> initial_posterior, _ = solver.compute_initialisation(bvp, grid)
+    >>> async_solver = AsyncBVPSolver(solver)
+    >>> solution = asyncio.run(
+    ...     async_solver.solve(bvp, 1e-2, 1e-2, initial_posterior)
+    ... )
+    >>> solver.status.reason
+    'converged'
+    """
+
+    def __init__(self, solver, executor=None):
+        self.solver = solver
+        self.executor = executor
+
+    async def solution_generator(self, *args, **kwargs):
+        """Asynchronous version of ``BVPSolver.solution_generator``.
+
+        Takes the same arguments, except for ``cancel_event``.
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        generator = self.solver.solution_generator(
+            *args, cancel_event=cancel_event, **kwargs
+        )
+        while True:
+            step = loop.run_in_executor(self.executor, next, generator, _DONE)
+            try:
+                result = await asyncio.shield(step)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                # Wait for the current IEKS iteration; the generator stops
+                # before the next one.
+                await asyncio.wait([step])
+                if step.exception() is None and step.result() is not _DONE:
+                    # The refinement finished before the event was set. Resume
+                    # the generator, which returns right away and records its
+                    # status.
+                    await asyncio.wait(
+                        [loop.run_in_executor(self.executor, next, generator, _DONE)]
+                    )
+                raise
+            if result is _DONE:
+                return
+            yield result
+
+    async def solve(self, *args, **kwargs):
+        """Asynchronous version of ``BVPSolver.solve``."""
+        kalman_posterior = None
+        async for kalman_posterior, _ in self.solution_generator(*args, **kwargs):
+            pass
+        return kalman_posterior
+
+
+async def gather_solves(solves, max_concurrency=None):
+    """Await many solves, at most ``max_concurrency`` at a time.
+
+    ``solves`` is an iterable of callables without arguments that return an
+    awaitable, e.g. ``functools.partial(async_solver.solve, bvp, atol, ...)``.
+    The results are returned in the order of ``solves``. If one solve raises,
+    the other ones are cancelled.
+    """
+    solves = list(solves)
+    if max_concurrency is None:
+        max_concurrency = max(len(solves), 1)
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def limited(solve):
+        async with semaphore:
+            return await solve()
+
+    tasks = [asyncio.ensure_future(limited(solve)) for solve in solves]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
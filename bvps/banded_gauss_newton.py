@@ -0,0 +1,448 @@
+"""Gauss-Newton steps of the IEKS as banded linear systems.
+
+Smoothing a linear(ised) Gauss-Markov model is the least-squares problem
+
+    minimise  ||x_0 - m_0||^2_{C_0}
+              + sum_n ||x_{n+1} - A_n x_n||^2_{Q_n}
+              + sum_n ||H_n x_n + b_n - y_n||^2_{R_n},
+
+whose normal equations are block-tridiagonal. Here, the system is assembled
+as a single banded matrix and solved with one banded Cholesky factorisation
+(LAPACK). The marginal covariances (and the covariances of neighbouring
+states) are recovered with a selected-inversion recursion on the Cholesky
+factor. The filtering distributions are only needed to interpolate between
+locations, so they are computed by a sequential filter pass on first use.
+
+Measurements without noise (the ODE residual and the boundary conditions)
+are equality constraints. They are eliminated at every location by
+parametrising the state in the null space of the constraints.
+"""
+
+import functools
+
+import numpy as np
+import scipy.linalg
+from probnum import statespace
+
+from .array_kalman import (
+    ArrayKalman,
+    ArraySmoothingPosterior,
+    _matvec,
+    tria,
+)
+from .parallel_kalman import _stack_measurements, reference_transitions
+
+# Largest relative size of the last step of the iterative refinement. Each
+# refinement step shrinks the error by about cond(J)^2 * eps, so a larger last
+# step means that the normal equations are too ill-conditioned to be trusted.
+_REFINEMENT_TOLERANCE = np.sqrt(np.finfo(float).eps)
+
+
+class BandedGaussNewton(ArrayKalman):
+    """Smoothing as a banded least-squares problem.
+
+    Drop-in replacement for :class:`ArrayKalman` if all measurement models are
+    linear (e.g. the output of ``BVPSolver.linearise_measmod_list``) and the
+    locations are strictly increasing. Otherwise, it falls back to the
+    sequential array implementation.
+
+    The filtering posterior is computed by the sequential filter once the
+    posterior is interpolated, so the posterior interpolates (also with a
+    recalibrated prior) like the one of :class:`ArrayKalman`. The total of the
+    calibration quantities ``sigmas`` equals the one of the sequential filter
+    (it is the minimum of the least-squares problem), but it is spread evenly
+    over the measurement updates. If the normal equations are too
+    ill-conditioned to be solved accurately, it falls back to the sequential
+    array implementation as well.
+
+    Parameters
+    ----------
+    num_refinements
+        Number of steps of iterative refinement of the solution of the
+        normal equations.
+
+    Examples
+    --------
+    >>> from probnum import random_variables
+    >>> ibm = statespace.IBM(ordint=2, spatialdim=1, forward_implementation="sqrt", backward_implementation="sqrt")
+    >>> initrv = random_variables.Normal(np.zeros(3), np.eye(3), cov_cholesky=np.eye(3))
+    >>> measmod = statespace.DiscreteLTIGaussian(
+    ...     ibm.proj2coord(0), -np.ones(1), np.zeros((1, 1)),
+    ...     proc_noise_cov_cholesky=np.zeros((1, 1)),
+    ...     forward_implementation="sqrt", backward_implementation="sqrt",
+    ... )
+    >>> kalman = BandedGaussNewton(ibm, None, initrv)
+    >>> times = np.linspace(0.0, 1.0, 5)
+    >>> posterior = kalman.filtsmooth(np.zeros((5, 1)), times, [measmod] * 5)
+    >>> print(posterior.means.shape, posterior.cov_choleskies.shape)
+    (5, 3) (5, 3, 3)
+    >>> print(np.round(posterior.means[:, 0], 4))
+    [1. 1. 1. 1. 1.]
+    """
+
+    def __init__(self, dynamics_model, measurement_model, initrv, num_refinements=2):
+        super().__init__(dynamics_model, measurement_model, initrv)
+        self.num_refinements = num_refinements
+
+    def filtsmooth(self, dataset, times, measmod_list):
+        """Compute the smoothing posterior with a single banded factorisation.
+
+        Parameters
+        ----------
+        dataset : array_like, shape (N, M)
+            Data set that is filtered.
+        times : array_like, shape (N,)
+            Temporal locations of the data points.
+        measmod_list : list
+            One linear measurement model (or a list of those) per location.
+
+        Returns
+        -------
+        BandedSmoothingPosterior
+            Posterior distribution of the smoothed output
+        """
+        if not isinstance(measmod_list, list):
+            raise RuntimeError
+        dataset, times = np.asarray(dataset), np.asarray(times)
+        measmod_list = [mm if isinstance(mm, list) else [mm] for mm in measmod_list]
+        if not (
+            all(
+                isinstance(mm_, statespace.DiscreteLinearGaussian)
+                for mm in measmod_list
+                for mm_ in mm
+            )
+            and np.all(np.diff(times) > 0.0)
+        ):
+            return super().filtsmooth(dataset, times, measmod_list)
+
+        state_trans, proc_noise_cholesky, reference_precon = reference_transitions(
+            self.dynamics_model, times
+        )
+        (
+            meas_mats,
+            shifts,
+            meas_noise_choleskies,
+            data,
+            output_dims,
+        ) = _stack_measurements(measmod_list, times, dataset, reference_precon)
+        N, num_slots, output_dim, D = meas_mats.shape
+
+        # Noise-free measurements are constraints, all others are penalties.
+        hard = np.logical_and(
+            output_dims > 0, np.all(meas_noise_choleskies == 0.0, axis=(-2, -1))
+        )
+        constraint_mats = np.where(hard[..., None, None], meas_mats, 0.0)
+        constraint_rhs = np.where(hard[..., None], data - shifts, 0.0)
+        null_spaces, particular = _eliminate_constraints(
+            constraint_mats.reshape((N, num_slots * output_dim, D)),
+            constraint_rhs.reshape((N, num_slots * output_dim)),
+        )
+        meas_mats = np.where(hard[..., None, None], 0.0, meas_mats)
+        shifts = np.where(hard[..., None], 0.0, shifts)
+        data = np.where(hard[..., None], 0.0, data)
+        meas_noise_choleskies = np.where(
+            hard[..., None, None], np.eye(output_dim), meas_noise_choleskies
+        )
+
+        # Whitened residuals r = J u + e in the null-space coordinates u.
+        mean0 = self.initrv.mean / reference_precon
+        cov_cholesky0 = self.initrv.cov_cholesky / reference_precon[:, None]
+        try:
+            prior_jac = np.linalg.solve(cov_cholesky0, null_spaces[0])
+            prior_res = np.linalg.solve(cov_cholesky0, particular[0] - mean0)
+            trans_jac_left = -np.linalg.solve(
+                proc_noise_cholesky, state_trans @ null_spaces[:-1]
+            )
+            trans_jac_right = np.linalg.solve(proc_noise_cholesky, null_spaces[1:])
+            trans_res = np.linalg.solve(
+                proc_noise_cholesky,
+                (particular[1:] - _matvec(state_trans, particular[:-1]))[..., None],
+            )[..., 0]
+            meas_jac = np.linalg.solve(
+                meas_noise_choleskies, meas_mats @ null_spaces[:, None]
+            )
+            meas_res = np.linalg.solve(
+                meas_noise_choleskies,
+                (_matvec(meas_mats, particular[:, None]) + shifts - data)[..., None],
+            )[..., 0]
+        except np.linalg.LinAlgError:
+            # Singular (but nonzero) measurement noise
+            return super().filtsmooth(dataset, times, measmod_list)
+
+        # The unused null-space coordinates are pinned to zero.
+        pinned = np.all(null_spaces == 0.0, axis=-2).astype(float)
+        jacobian = _LeastSquaresJacobian(
+            prior_jac, trans_jac_left, trans_jac_right, meas_jac, pinned
+        )
+        offsets = (prior_res, trans_res, meas_res, np.zeros((N, D)))
+
+        # Normal equations: block-diagonal and block-subdiagonal parts.
+        diagonal = np.einsum("nkmi,nkmj->nij", meas_jac, meas_jac)
+        diagonal += np.eye(D) * pinned[:, None, :]
+        diagonal[0] += prior_jac.T @ prior_jac
+        diagonal[:-1] += np.swapaxes(trans_jac_left, -1, -2) @ trans_jac_left
+        diagonal[1:] += np.swapaxes(trans_jac_right, -1, -2) @ trans_jac_right
+        subdiagonal = np.swapaxes(trans_jac_right, -1, -2) @ trans_jac_left
+        # The normal equations square the condition number of the whitened
+        # Jacobian. On fine meshes with high orders, they can be numerically
+        # indefinite, or so ill-conditioned that the iterative refinement
+        # below stagnates. The square-root filter does not suffer from this.
+        try:
+            banded_cholesky = scipy.linalg.cholesky_banded(
+                to_lower_banded(diagonal, subdiagonal), lower=True
+            )
+        except np.linalg.LinAlgError:
+            return super().filtsmooth(dataset, times, measmod_list)
+
+        # Solve the semi-normal equations with iterative refinement:
+        # the residuals are computed from the (whitened) Jacobian, not from the
+        # normal equations, which recovers most of the accuracy of a QR solver.
+        solution = np.zeros((N, D))
+        residuals = offsets
+        for _ in range(1 + self.num_refinements):
+            step = scipy.linalg.cho_solve_banded(
+                (banded_cholesky, True), -jacobian.transpose_apply(residuals).ravel()
+            )
+            solution += step.reshape((N, D))
+            residuals = tuple(r + e for r, e in zip(jacobian.apply(solution), offsets))
+        step_norm, solution_norm = np.linalg.norm(step), np.linalg.norm(solution)
+        if not np.all(np.isfinite(solution)) or (
+            self.num_refinements > 0
+            and step_norm > _REFINEMENT_TOLERANCE * solution_norm
+        ):
+            return super().filtsmooth(dataset, times, measmod_list)
+
+        try:
+            cholesky_diagonal, cholesky_subdiagonal = from_lower_banded(
+                banded_cholesky, N, D
+            )
+            covs, cross_covs = selected_inversion(
+                cholesky_diagonal, cholesky_subdiagonal
+            )
+        except np.linalg.LinAlgError:
+            return super().filtsmooth(dataset, times, measmod_list)
+        self._record_sigmas(residuals, output_dims)
+
+        means = particular + _matvec(null_spaces, solution)
+        cov_choleskies = tria(null_spaces @ _psd_factor(covs))
+        cross_covs = (
+            null_spaces[1:] @ cross_covs @ np.swapaxes(null_spaces[:-1], -1, -2)
+        )
+
+        # A separate filter object, so that the filter pass does not overwrite
+        # the calibration quantities of a later call.
+        sequential_filter = ArrayKalman(self.dynamics_model, None, self.initrv)
+        return BandedSmoothingPosterior(
+            locations=times,
+            means=reference_precon * means,
+            cov_choleskies=reference_precon[:, None] * cov_choleskies,
+            transition=self.dynamics_model,
+            filter_pass=functools.partial(
+                sequential_filter.filter, dataset, times, measmod_list
+            ),
+            cross_covs=reference_precon[:, None] * cross_covs * reference_precon,
+        )
+
+    def _record_sigmas(self, residuals, output_dims):
+        """Calibration quantities of the sequential filter.
+
+        The sum of the squared (whitened) prediction errors of all updates
+        equals the minimum of the least-squares problem.
+        """
+        total = sum(np.sum(r ** 2) for r in residuals)
+        num_updates = int(np.count_nonzero(output_dims))
+        self.sigmas = [total / num_updates] * num_updates
+        self.normalisation_for_sigmas = float(np.sum(output_dims))
+
+
+class BandedSmoothingPosterior(ArraySmoothingPosterior):
+    """Smoothing posterior that stores the covariances of neighbouring states.
+
+    ``cross_covs[n]`` is the covariance of the states at ``locations[n + 1]``
+    and ``locations[n]``. The posterior has no smoothing gains; evaluation
+    between locations is the same as for :class:`ArraySmoothingPosterior`.
+    The filtering posterior is computed by ``filter_pass()`` when it is first
+    accessed.
+    """
+
+    def __init__(
+        self,
+        locations,
+        means,
+        cov_choleskies,
+        transition,
+        filter_pass,
+        cross_covs,
+    ):
+        self._filter_pass = filter_pass
+        super().__init__(
+            locations=locations,
+            means=means,
+            cov_choleskies=cov_choleskies,
+            transition=transition,
+        )
+        self.cross_covs = cross_covs
+
+    @property
+    def filtering_posterior(self):
+        if self._filtering_posterior is None and self._filter_pass is not None:
+            self._filtering_posterior = self._filter_pass()
+            self._filter_pass = None
+        return self._filtering_posterior
+
+    @filtering_posterior.setter
+    def filtering_posterior(self, filtering_posterior):
+        self._filtering_posterior = filtering_posterior
+
+
+########################################################################
+########################################################################
+# Banded linear algebra
+########################################################################
+########################################################################
+
+
+def to_lower_banded(diagonal, subdiagonal):
+    """Lower banded storage (as in LAPACK) of a symmetric block-tridiagonal matrix.
+
+    ``diagonal`` has shape (N, D, D), ``subdiagonal`` has shape (N-1, D, D) and
+    holds the blocks below the diagonal. The result has shape (2D, ND).
+
+    Examples
+    --------
+    >>> diagonal = np.stack([2.0 * np.eye(2)] * 3)
+    >>> subdiagonal = -np.stack([np.eye(2)] * 2)
+    >>> banded = to_lower_banded(diagonal, subdiagonal)
+    >>> dense = scipy.linalg.block_diag(*diagonal)
+    >>> dense[2:, :-2] += scipy.linalg.block_diag(*subdiagonal)
+    >>> dense = np.tril(dense) + np.tril(dense, -1).T
+    >>> np.allclose(np.linalg.cholesky(dense), _banded_to_dense(scipy.linalg.cholesky_banded(banded, lower=True)))
+    True
+    """
+    N, D, _ = diagonal.shape
+    banded = np.zeros((2 * D, N * D))
+    offsets = np.arange(N) * D
+    for a in range(D):
+        for b in range(a + 1):
+            banded[a - b, offsets + b] = diagonal[:, a, b]
+        for b in range(D):
+            banded[D + a - b, offsets[:-1] + b] = subdiagonal[:, a, b]
+    return banded
+
+
+def from_lower_banded(banded, N, D):
+    """Diagonal and subdiagonal blocks of a lower banded block-bidiagonal matrix."""
+    diagonal = np.zeros((N, D, D))
+    subdiagonal = np.zeros((N - 1, D, D))
+    offsets = np.arange(N) * D
+    for a in range(D):
+        for b in range(a + 1):
+            diagonal[:, a, b] = banded[a - b, offsets + b]
+        for b in range(D):
+            subdiagonal[:, a, b] = banded[D + a - b, offsets[:-1] + b]
+    return diagonal, subdiagonal
+
+
+def _banded_to_dense(banded):
+    bandwidth, n = banded.shape
+    dense = np.zeros((n, n))
+    for offset in range(min(bandwidth, n)):
+        dense += np.diag(banded[offset, : n - offset], -offset)
+    return dense
+
+
+def selected_inversion(diagonal, subdiagonal):
+    """Blocks of the inverse of L L^T on the tridiagonal block pattern.
+
+    ``diagonal`` (N, D, D) and ``subdiagonal`` (N-1, D, D) are the blocks of the
+    lower block-bidiagonal Cholesky factor L. Returns the diagonal blocks
+    (N, D, D) and the subdiagonal blocks (N-1, D, D) of the inverse
+    (the latter are cov(x_{n+1}, x_n)).
+    """
+    N, D, _ = diagonal.shape
+    inverse_diagonal = np.linalg.inv(diagonal)
+    inverse_diagonal_sq = np.swapaxes(inverse_diagonal, -1, -2) @ inverse_diagonal
+    scaled_subdiagonal = subdiagonal @ inverse_diagonal[:-1]
+
+    covs = np.empty((N, D, D))
+    cross_covs = np.empty((N - 1, D, D))
+    covs[-1] = inverse_diagonal_sq[-1]
+    for n in reversed(range(N - 1)):
+        cross_covs[n] = -covs[n + 1] @ scaled_subdiagonal[n]
+        cov = inverse_diagonal_sq[n] - scaled_subdiagonal[n].T @ cross_covs[n]
+        covs[n] = 0.5 * (cov + cov.T)
+    return covs, cross_covs
+
+
+########################################################################
+########################################################################
+# Helpers
+########################################################################
+########################################################################
+
+
+class _LeastSquaresJacobian:
+    """Block-sparse Jacobian of the whitened least-squares residuals.
+
+    The residuals are grouped into the prior (D,), transitions (N-1, D),
+    measurements (N, K, m) and pinned coordinates (N, D).
+    """
+
+    def __init__(self, prior, trans_left, trans_right, meas, pinned):
+        self.prior = prior
+        self.trans_left = trans_left
+        self.trans_right = trans_right
+        self.meas = meas
+        self.pinned = pinned
+
+    def apply(self, u):
+        return (
+            self.prior @ u[0],
+            _matvec(self.trans_left, u[:-1]) + _matvec(self.trans_right, u[1:]),
+            _matvec(self.meas, u[:, None]),
+            self.pinned * u,
+        )
+
+    def transpose_apply(self, residuals):
+        prior, trans, meas, pinned = residuals
+        result = np.einsum("nkmi,nkm->ni", self.meas, meas) + self.pinned * pinned
+        result[0] += self.prior.T @ prior
+        result[:-1] += np.einsum("nmi,nm->ni", self.trans_left, trans)
+        result[1:] += np.einsum("nmi,nm->ni", self.trans_right, trans)
+        return result
+
+
+def _eliminate_constraints(constraint_mats, constraint_rhs):
+    """Parametrise the solutions of C x = c as x = x_p + N u (per location).
+
+    Returns the null-space bases N (whose columns are zero for the coordinates
+    of u that are not needed) and the (least-squares) particular solutions x_p.
+    """
+    U, singular_values, Vt = np.linalg.svd(constraint_mats, full_matrices=True)
+    D = Vt.shape[-1]
+    num_values = singular_values.shape[-1]
+    tolerance = (
+        max(constraint_mats.shape[-2:])
+        * np.finfo(float).eps
+        * np.max(singular_values, axis=-1, initial=0.0)
+    )
+    nonzero = singular_values > tolerance[:, None]
+    rank = np.count_nonzero(nonzero, axis=-1)
+
+    inverse_values = np.where(
+        nonzero, 1.0 / np.where(nonzero, singular_values, 1.0), 0.0
+    )
+    coefficients = (
+        np.einsum("nmi,nm->ni", U[..., :num_values], constraint_rhs) * inverse_values
+    )
+    particular = np.einsum("nij,ni->nj", Vt[:, :num_values], coefficients)
+
+    V = np.swapaxes(Vt, -1, -2)
+    null_spaces = V * (np.arange(D)[None, :] >= rank[:, None])[:, None, :]
+    return null_spaces, particular
+
+
+def _psd_factor(cov):
+    """Square-root factor of (stacks of) symmetric positive semi-definite matrices."""
+    eigvals, eigvecs = np.linalg.eigh(0.5 * (cov + np.swapaxes(cov, -1, -2)))
+    return eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))[..., None, :]
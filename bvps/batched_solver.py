@@ -0,0 +1,486 @@
+"""Solve many BVPs of one problem family at once.
+
+Instances of a problem family (e.g. ``problem_20_second_order(xi)`` for many
+``xi``) share the domain, the boundary operators, and the prior. On a common
+mesh, their filters and smoothers can run in lockstep: every step of the
+square-root kernels in ``array_kalman`` acts on a stack of states with a
+leading batch axis, so the Python loop over the mesh is traversed once per
+batch instead of once per instance.
+
+The posteriors are evaluated at the candidate nodes of the error estimate in
+one vectorised pass, too. The ODEs, however, are evaluated per instance: every
+instance holds its own ``f`` and ``df`` (closures over its parameters), so the
+residuals and Jacobians are computed in a Python loop over the instances, and
+only each evaluation is vectorised over the mesh (``VectorizedEKFComponent``).
+These evaluations cost B calls of ``f`` and ``df`` per IEKS iteration; for 64
+instances of ``problem_20_second_order``, they take more than 40% of the
+batched solve, more than the batched filter and smoother.
+
+Instances whose IEKS has converged are masked out of the remaining IEKS
+iterations; instances whose error estimate is acceptable are split off the
+batch. The common mesh is refined where any of the remaining instances
+requires it.
+"""
+
+import copy
+
+import numpy as np
+
+from bvps import array_kalman, bvp_solver, ode_measmods, solve_context, stopcrit
+
+
+class BatchedBVPSolver:
+    """Solve a batch of BVPs on a common mesh.
+
+    The prior, the initial diffusion, the error estimator, and the mesh
+    refinement are taken from ``solver`` (a ``BVPSolver``), which is not
+    modified. The prior must be linear time-invariant, as for the ``"arrays"``
+    engine. Every instance has its own diffusion and its own EM-updated
+    initial state, so for a batch of one, the result is the one of
+    ``solver.solve`` with the ``"arrays"`` engine.
+
+    After a solve, ``ieks_iterations`` holds the number of IEKS iterations
+    per refinement (of the slowest instance), and ``converged`` whether the
+    error estimate of each instance is acceptable.
+
+    Examples
+    --------
+    >>> from probnum import statespace
+    >>> from bvps import problem_examples
+    >>> bvps = [problem_examples.problem_20_second_order(xi) for xi in [0.5, 1.0]]
+    >>> ibm = statespace.IBM(
+    ...     ordint=3,
+    ...     spatialdim=1,
+    ...     forward_implementation="sqrt",
+    ...     backward_implementation="sqrt",
+    ... )
+    >>> solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+    ...     ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    ... )
+    >>> grid = np.linspace(0.0, 1.0, 10)
+    >>> initial_posteriors = [
+    ...     solver.compute_initialisation(bvp, grid, initial_guess=np.ones((10, 1)))[0]
+    ...     for bvp in bvps
+    ... ]
+    >>> batched = BatchedBVPSolver(solver)
+    >>> posteriors = batched.solve(bvps, 1e-3, 1e-3, initial_posteriors)
+    >>> batched.converged
+    array([ True,  True])
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.ieks_iterations = []
+        self.converged = None
+
+    def solve(self, *args, **kwargs):
+        for posteriors, _ in self.solution_generator(*args, **kwargs):
+            pass
+        return posteriors
+
+    def solution_generator(
+        self,
+        bvps,
+        atol,
+        rtol,
+        initial_posteriors,
+        maxit_ieks=10,
+        maxit_em=1,
+    ):
+        """Refine the common mesh until the error of every instance is acceptable.
+
+        The ``initial_posteriors`` (one per BVP) must share their locations.
+        After each refinement, the posteriors of all instances and their
+        diffusions ``sigma_squared`` (an array) are yielded; instances that
+        have been split off keep their final posterior.
+        """
+        solver = self.solver
+        dynamics_model = solver.dynamics_model
+        check_problem_family(bvps, initial_posteriors)
+        error_estimator = copy.copy(solver.error_estimator)
+        error_estimator.set_tolerance(atol=atol, rtol=rtol)
+        stopcrit_ieks = stopcrit.MyStoppingCriterion(
+            atol=atol, rtol=rtol, maxit=maxit_ieks, maxit_reached="pass"
+        )
+        projmat = dynamics_model.proj2coord(0)
+        num_members = len(bvps)
+        self.ieks_iterations = []
+        self.converged = np.zeros(num_members, dtype=bool)
+
+        measmods = [solver.choose_measurement_model(bvp) for bvp in bvps]
+        ode_measmod_list = [ode_measmod for ode_measmod, _, _ in measmods]
+        if not all(
+            isinstance(ode_measmod, ode_measmods.VectorizedEKFComponent)
+            for ode_measmod in ode_measmod_list
+        ):
+            raise ValueError(
+                "Batched solves require vectorised ODE measurement models."
+            )
+        left_components = stack_measurement_components(
+            [left_measmod for _, left_measmod, _ in measmods], bvps[0].t0
+        )
+        right_components = stack_measurement_components(
+            [right_measmod for _, _, right_measmod in measmods], bvps[0].tmax
+        )
+        if all(
+            solver.is_linear(bvp, ode_measmod)
+            for bvp, ode_measmod in zip(bvps, ode_measmod_list)
+        ):
+            maxit_ieks = 1
+
+        initrv = solver.create_initrv()
+        initial_means = np.tile(initrv.mean, (num_members, 1))
+        initial_choleskies = np.tile(initrv.cov_cholesky, (num_members, 1, 1))
+        diffusions = np.full(num_members, float(solver.initial_sigma_squared))
+        sigma_squared = np.full(num_members, np.nan)
+
+        posteriors = list(initial_posteriors)
+        times = initial_posteriors[0].locations
+        linearise_at = np.stack(
+            [np.asarray(posterior.states.mean) for posterior in initial_posteriors]
+        )
+        active = np.arange(num_members)
+        while len(active) > 0:
+            transitions = array_kalman.discretise_transitions(
+                dynamics_model, np.diff(times)
+            )
+            noise_choleskies = noise_choleskies_on_mesh(
+                [ode_measmod_list[b] for b in active], times
+            )
+            filtered = np.empty((num_members,) + linearise_at.shape[1:])
+            smoothed = np.empty_like(filtered)
+            filtered_choleskies = np.empty(filtered.shape + filtered.shape[-1:])
+            smoothed_choleskies = np.empty_like(filtered_choleskies)
+            num_ieks_iterations = 0
+
+            # EM iterations
+            for _ in range(maxit_em):
+
+                # IEKS iterations; converged instances are masked out
+                running = np.ones(len(active), dtype=bool)
+                for _ in range(maxit_ieks):
+                    members = active[running]
+                    ode_components = linearise_on_mesh(
+                        [ode_measmod_list[b] for b in members],
+                        times,
+                        linearise_at[members],
+                        noise_choleskies[running],
+                    )
+                    (
+                        filtered[members],
+                        filtered_choleskies[members],
+                        smoothed[members],
+                        smoothed_choleskies[members],
+                        sigmas,
+                    ) = filtsmooth(
+                        initial_means[members],
+                        initial_choleskies[members],
+                        times,
+                        transitions,
+                        diffusions[members],
+                        ode_components,
+                        [component[members] for component in left_components],
+                        [component[members] for component in right_components],
+                    )
+                    num_updates = len(times) + 2
+                    sigma_squared[members] = sigmas / num_updates / bvps[0].dimension
+                    num_ieks_iterations += 1
+
+                    old_mean = linearise_at[members] @ projmat.T
+                    linearise_at[members] = smoothed[members]
+                    new_mean = linearise_at[members] @ projmat.T
+                    terminated = np.array(
+                        [
+                            stopcrit_ieks.evaluate_error(error=new - old, reference=new)
+                            <= 1.0
+                            for new, old in zip(new_mean, old_mean)
+                        ]
+                    )
+                    running[running] = ~terminated
+                    if not np.any(running):
+                        break
+
+                for b in active:
+                    initial_means[b], initial_choleskies[b] = update_initial_state(
+                        smoothed[b, 0], smoothed_choleskies[b, 0], initial_means[b]
+                    )
+
+            # Recalibrate diffusion. As in BVPSolver, the posterior is
+            # evaluated with the recalibrated prior.
+            diffusions[active] *= sigma_squared[active]
+            for b in active:
+                transition = solve_context.scale_diffusion(
+                    dynamics_model, diffusions[b]
+                )
+                posteriors[b] = array_kalman.ArraySmoothingPosterior(
+                    locations=times,
+                    means=smoothed[b],
+                    cov_choleskies=smoothed_choleskies[b],
+                    transition=transition,
+                    filtering_posterior=array_kalman.ArrayFilteringPosterior(
+                        locations=times,
+                        means=filtered[b],
+                        cov_choleskies=filtered_choleskies[b],
+                        transition=transition,
+                    ),
+                )
+
+            self.ieks_iterations.append(num_ieks_iterations)
+            yield list(posteriors), sigma_squared.copy()
+
+            candidate_nodes = bvp_solver.construct_candidate_nodes(
+                current_mesh=times,
+                nodes_per_interval=error_estimator.quadrature_rule.nodes,
+            )
+            evaluated_means, evaluated_choleskies = interpolate(
+                candidate_nodes,
+                times,
+                dynamics_model,
+                diffusions[active],
+                (filtered[active], filtered_choleskies[active]),
+                (smoothed[active], smoothed_choleskies[active]),
+            )
+            evaluated_posteriors = {}
+            per_interval_errors = {}
+            for i, b in enumerate(active):
+                evaluated_posteriors[b] = array_kalman.StackedNormal(
+                    evaluated_means[i], evaluated_choleskies[i]
+                )
+                (
+                    per_interval_errors[b],
+                    _,
+                ) = error_estimator.estimate_error_per_interval(
+                    evaluated_posteriors[b],
+                    candidate_nodes,
+                    times,
+                    sigma_squared[b],
+                    ode_measmod_list=[ode_measmod_list[b]] * len(candidate_nodes),
+                )
+                self.converged[b] = np.all(per_interval_errors[b] < 1.0)
+
+            # Split off the converged instances
+            active = active[~self.converged[active]]
+            if len(active) == 0:
+                break
+
+            refine = bvp_solver.MESH_REFINEMENTS[solver.mesh_refinement]
+            times, _ = refine(
+                current_mesh=times,
+                error_per_interval=np.max(
+                    [per_interval_errors[b] for b in active], axis=0
+                ),
+                localconvrate=solver.localconvrate,
+                quadrature_nodes=error_estimator.quadrature_rule.nodes,
+                **solver.mesh_refinement_options,
+            )
+            refined_linearise_at = np.empty(
+                (num_members, len(times)) + linearise_at.shape[2:]
+            )
+            for b in active:
+                refined_linearise_at[b] = bvp_solver.collect_linearisation_points(
+                    times, posteriors[b], candidate_nodes, evaluated_posteriors[b]
+                ).mean
+            linearise_at = refined_linearise_at
+
+
+def check_problem_family(bvps, initial_posteriors):
+    """Check that the BVPs can be solved on a common mesh with a common prior."""
+    if len(bvps) == 0 or len(bvps) != len(initial_posteriors):
+        raise ValueError("Pass one initial posterior per BVP (and at least one BVP).")
+    reference = bvps[0]
+    for bvp in bvps[1:]:
+        if (
+            type(bvp) is not type(reference)
+            or bvp.dimension != reference.dimension
+            or bvp.t0 != reference.t0
+            or bvp.tmax != reference.tmax
+        ):
+            raise ValueError(
+                "All BVPs must be of the same type, dimension, and domain."
+            )
+    locations = initial_posteriors[0].locations
+    for posterior in initial_posteriors[1:]:
+        if not np.array_equal(posterior.locations, locations):
+            raise ValueError("All initial posteriors must share their locations.")
+
+
+def stack_measurement_components(measmods, t):
+    """Stacks of (H, b, S) of linear measurement models, one per instance."""
+    components = [
+        array_kalman.measurement_components(measmod, t, linearise_at=None)
+        for measmod in measmods
+    ]
+    return [np.stack(component) for component in zip(*components)]
+
+
+def noise_choleskies_on_mesh(ode_measmod_list, times):
+    """Cholesky factors (B, N, d, d) of the ODE measurement noise of every instance."""
+    return np.stack(
+        [
+            [ode_measmod.non_linear_model.proc_noise_cov_cholesky_fun(t) for t in times]
+            for ode_measmod in ode_measmod_list
+        ]
+    )
+
+
+def linearise_on_mesh(ode_measmod_list, times, means, noise_choleskies):
+    """Linearise the ODE of every instance on the whole mesh.
+
+    ``means`` has shape (B, N, D). Returns the Jacobians (B, N, d, D), the
+    shifts (B, N, d), and the ``noise_choleskies`` (B, N, d, d).
+    """
+    meas_mats = np.stack(
+        [
+            ode_measmod.mesh_jacob_state_trans_fun(times, mean)
+            for ode_measmod, mean in zip(ode_measmod_list, means)
+        ]
+    )
+    residuals = np.stack(
+        [
+            ode_measmod.mesh_state_trans_fun(times, mean)
+            for ode_measmod, mean in zip(ode_measmod_list, means)
+        ]
+    )
+    shifts = residuals - np.einsum("bnij,bnj->bni", meas_mats, means)
+    return meas_mats, shifts, noise_choleskies
+
+
+def filtsmooth(
+    initial_means,
+    initial_choleskies,
+    times,
+    transitions,
+    diffusions,
+    ode_components,
+    left_components,
+    right_components,
+):
+    """Square-root Kalman filter and RTS smoother for a batch of instances.
+
+    The measurement models are the ones of ``BVPSolver.create_measmod_list``:
+    the left (right) boundary condition and the ODE at the first (last)
+    location, and the ODE everywhere else. The process noise of instance ``b``
+    is scaled by ``diffusions[b]``.
+
+    Returns the filtered and smoothed means (B, N, D) and Cholesky factors
+    (B, N, D, D), and the sum of the squared, whitened residuals per instance.
+    """
+    state_trans, proc_noise_cholesky, precon = transitions
+    meas_mats, shifts, noise_choleskies = ode_components
+    num_members, num_nodes = meas_mats.shape[:2]
+    scale = np.sqrt(diffusions)[:, None, None]
+
+    filtered = np.empty((num_members, num_nodes) + initial_means.shape[1:])
+    filtered_choleskies = np.empty(filtered.shape + filtered.shape[-1:])
+    sigmas = np.zeros(num_members)
+
+    def update(mean, cov_cholesky, components):
+        meas_mat, shift, meas_noise_cholesky = components
+        mean, cov_cholesky, residual, residual_cholesky = array_kalman.update(
+            mean,
+            cov_cholesky,
+            meas_mat,
+            shift,
+            meas_noise_cholesky,
+            np.zeros_like(shift),
+        )
+        whitened = np.linalg.solve(residual_cholesky, residual[..., None])[..., 0]
+        sigmas[:] += np.sum(whitened ** 2, axis=-1)
+        return mean, cov_cholesky
+
+    mean, cov_cholesky = initial_means, initial_choleskies
+    for idx in range(num_nodes):
+        if idx > 0:
+            mean, cov_cholesky = array_kalman.predict(
+                mean,
+                cov_cholesky,
+                state_trans[idx - 1],
+                scale * proc_noise_cholesky[idx - 1],
+                precon[idx - 1],
+            )
+        if idx == 0:
+            mean, cov_cholesky = update(mean, cov_cholesky, left_components)
+        if idx == num_nodes - 1:
+            mean, cov_cholesky = update(mean, cov_cholesky, right_components)
+        mean, cov_cholesky = update(
+            mean,
+            cov_cholesky,
+            (meas_mats[:, idx], shifts[:, idx], noise_choleskies[:, idx]),
+        )
+        filtered[:, idx], filtered_choleskies[:, idx] = mean, cov_cholesky
+
+    smoothed = np.empty_like(filtered)
+    smoothed_choleskies = np.empty_like(filtered_choleskies)
+    smoothed[:, -1], smoothed_choleskies[:, -1] = mean, cov_cholesky
+    for idx in reversed(range(num_nodes - 1)):
+        smoothed[:, idx], smoothed_choleskies[:, idx], _ = array_kalman.smooth_step(
+            filtered[:, idx],
+            filtered_choleskies[:, idx],
+            smoothed[:, idx + 1],
+            smoothed_choleskies[:, idx + 1],
+            state_trans[idx],
+            scale * proc_noise_cholesky[idx],
+            precon[idx],
+        )
+    return filtered, filtered_choleskies, smoothed, smoothed_choleskies, sigmas
+
+
+def interpolate(t, times, dynamics_model, diffusions, filtered, smoothed):
+    """Evaluate the smoothing posteriors of a batch of instances at ``t``.
+
+    Equivalent to ``ArraySmoothingPosterior.interpolate_arrays`` for every
+    instance, with the diffusion of instance ``b`` scaled by ``diffusions[b]``,
+    but vectorised over the instances. ``filtered`` and ``smoothed`` are pairs
+    of means (B, N, D) and Cholesky factors (B, N, D, D) on ``times``. All
+    ``t`` must lie in ``[times[0], times[-1]]``.
+    """
+    means, cov_choleskies = smoothed
+    indices = np.searchsorted(times, t, side="left")
+    on_grid = times[indices] == t
+    evaluated_means = means[:, indices]
+    evaluated_choleskies = cov_choleskies[:, indices]
+    if np.all(on_grid):
+        return evaluated_means, evaluated_choleskies
+
+    # As in ArraySmoothingPosterior: predict from the previous filtered state
+    # and smooth with the next smoothed state.
+    t, indices = t[~on_grid], indices[~on_grid]
+    scale = np.sqrt(diffusions)[:, None, None, None]
+    state_trans, proc_noise_cholesky, precon = array_kalman.discretise_transitions(
+        dynamics_model, t - times[indices - 1]
+    )
+    predicted_means, predicted_choleskies = array_kalman.predict(
+        filtered[0][:, indices - 1],
+        filtered[1][:, indices - 1],
+        state_trans,
+        scale * proc_noise_cholesky,
+        precon,
+    )
+    state_trans, proc_noise_cholesky, precon = array_kalman.discretise_transitions(
+        dynamics_model, times[indices] - t
+    )
+    (
+        evaluated_means[:, ~on_grid],
+        evaluated_choleskies[:, ~on_grid],
+        _,
+    ) = array_kalman.smooth_step(
+        predicted_means,
+        predicted_choleskies,
+        means[:, indices],
+        cov_choleskies[:, indices],
+        state_trans,
+        scale * proc_noise_cholesky,
+        precon,
+    )
+    return evaluated_means, evaluated_choleskies
+
+
+def update_initial_state(mean, cov_cholesky, previous_mean):
+    """EM update of the initial state, as in ``BVPSolver.update_initrv``."""
+    new_cov_cholesky = array_kalman.tria(
+        np.concatenate(
+            (cov_cholesky, (mean - previous_mean)[:, None], 1e-6 * np.eye(len(mean))),
+            axis=-1,
+        )
+    )
+    return mean, new_cov_cholesky
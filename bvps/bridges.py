@@ -1,8 +1,9 @@
 """Integrated bridges."""
 
 import numpy as np
-from probnum import statespace
+from probnum import random_variables, statespace
 
+from .array_kalman import discretise_transitions, tria, update
 from .ode_measmods import from_boundary_conditions
 from .problems import SecondOrderBoundaryValueProblem
 
@@ -163,3 +164,116 @@ class GaussMarkovBridge(statespace.Integrator, statespace.LTISDE):
     @property
     def spatialdim(self):
         return self.integrator.spatialdim
+
+
+class TwoFilterBridge(GaussMarkovBridge):
+    """Gauss-Markov bridge in two-filter form.
+
+    :class:`GaussMarkovBridge` extrapolates to ``tmax``, conditions on the right
+    boundary condition and smooths back to the current time on every step.
+    Here, the right boundary condition is propagated backwards through the
+    mesh once, which yields for every node t_n an equivalent measurement
+
+        0 = R A(tmax - t_n) x(t_n) + b + noise,
+
+    with noise covariance R Q(tmax - t_n) R^T + Sigma_R.
+    Each step then only requires a local update on this measurement.
+    Nodes that are not on the mesh are handled by a direct computation.
+
+    Examples
+    --------
+    >>> from probnum import statespace
+    >>> from probnum import random_variables as random_variables
+    >>> from bvps.problem_examples import bratus
+    >>> bvp = bratus()
+    >>> ibm = statespace.IBM(ordint=2, spatialdim=2)
+    >>> integ = TwoFilterBridge(ibm, bvp, times=np.linspace(bvp.t0, bvp.tmax, 5))
+    >>> print(integ)
+    <TwoFilterBridge object>
+    >>> rv = random_variables.Normal(np.ones(ibm.dimension), np.eye(ibm.dimension))
+    >>> rv = integ.initialise_boundary_conditions(rv)
+    >>> out, _  = integ.forward_rv(rv, bvp.t0, dt=0.25)
+    >>> print(out)
+    <Normal with shape=(6,), dtype=float64>
+    """
+
+    def __init__(self, integrator, bvp, times=None):
+        super().__init__(integrator, bvp)
+        self.times = np.array([])
+        self.boundary_meas_mats = np.zeros((0, self.measmod_R.output_dim, 0))
+        self.boundary_noise_choleskies = np.zeros((0, self.measmod_R.output_dim, 0))
+        if times is not None:
+            self.precompute_boundary_information(times)
+
+    def __repr__(self):
+        return "<TwoFilterBridge object>"
+
+    def precompute_boundary_information(self, times):
+        """Propagate the right boundary condition backwards through ``times``.
+
+        This is a single backward pass (the backward filter of the two-filter
+        form); it requires ``times[-1] == bvp.tmax``.
+        """
+        times = np.asarray(times, dtype=float)
+        np.testing.assert_allclose(times[-1], self.bvp.tmax)
+
+        dts = np.diff(times)
+        state_trans, proc_noise_cholesky, precon = discretise_transitions(
+            self.integrator, dts
+        )
+        # Undo the preconditioning: A = P A_ P^{-1}, chol(Q) = P chol(Q_)
+        state_trans = precon[:, :, None] * state_trans / precon[:, None, :]
+        proc_noise_cholesky = precon[:, :, None] * proc_noise_cholesky
+
+        meas_mat = self.measmod_R.state_trans_mat
+        noise_cholesky = self.measmod_R.proc_noise_cov_cholesky
+        meas_mats = [meas_mat]
+        noise_choleskies = [noise_cholesky]
+        for A, L in zip(state_trans[::-1], proc_noise_cholesky[::-1]):
+            noise_cholesky = tria(np.hstack((noise_cholesky, meas_mat @ L)))
+            meas_mat = meas_mat @ A
+            meas_mats.append(meas_mat)
+            noise_choleskies.append(noise_cholesky)
+
+        self.times = times
+        self.boundary_meas_mats = np.stack(meas_mats[::-1])
+        self.boundary_noise_choleskies = np.stack(noise_choleskies[::-1])
+
+    def boundary_information(self, t):
+        """Right boundary condition as an equivalent measurement at time ``t``.
+
+        Returns the measurement matrix and the Cholesky factor of the
+        measurement noise covariance (the shift is ``measmod_R.shift_vec``).
+        """
+        if len(self.times) > 0:
+            idx = np.clip(np.searchsorted(self.times, t), 1, len(self.times) - 1)
+            idx = idx - 1 if (t - self.times[idx - 1]) < (self.times[idx] - t) else idx
+            if np.isclose(self.times[idx], t, rtol=1e-12, atol=1e-14):
+                return self.boundary_meas_mats[idx], self.boundary_noise_choleskies[idx]
+
+        meas_mat = self.measmod_R.state_trans_mat
+        noise_cholesky = self.measmod_R.proc_noise_cov_cholesky
+        dt_tmax = self.bvp.tmax - t
+        if np.abs(dt_tmax) > 0.0:
+            discretised = self.integrator.discretise(dt_tmax)
+            noise_cholesky = tria(
+                np.hstack(
+                    (noise_cholesky, meas_mat @ discretised.proc_noise_cov_cholesky)
+                )
+            )
+            meas_mat = meas_mat @ discretised.state_trans_mat
+        return meas_mat, noise_cholesky
+
+    def _update_rv_final_value(self, rv, t):
+        """Condition a random variable on the right boundary condition."""
+        meas_mat, noise_cholesky = self.boundary_information(t)
+        mean, cov_cholesky, _, _ = update(
+            rv.mean,
+            rv.cov_cholesky,
+            meas_mat,
+            self.measmod_R.shift_vec,
+            noise_cholesky,
+            np.zeros(self.measmod_R.output_dim),
+        )
+        cov = cov_cholesky @ cov_cholesky.T
+        return random_variables.Normal(mean, cov, cov_cholesky=cov_cholesky), {}
@@ -0,0 +1,106 @@
+"""Budgets for the mesh refinement of the BVP solver.
+
+Every refinement of the mesh is followed by a full IEKS solve on a larger
+mesh. A budget stops the refinement before the next solve would exceed a
+deadline or a memory cap; the solver then returns the current posterior.
+"""
+
+import collections
+import time
+
+import numpy as np
+
+SolveStatus = collections.namedtuple(
+    "SolveStatus",
+    ["reason", "error", "num_nodes", "num_refinements", "elapsed_time"],
+)
+SolveStatus.__doc__ = """Why the solver stopped and what it achieved.
+
+``reason`` is ``"converged"``, ``"cancelled"``, or the name of the exhausted budget
+(``"max_time"``, ``"max_nodes"``, ``"max_refinements"``,
+``"max_posterior_bytes"``). ``error`` is the largest error estimate per
+interval, relative to the tolerance (below one means converged).
+"""
+
+
+class Budget:
+    """Limits on the wall-clock time, the mesh size, and the memory.
+
+    The limits are checked before every refinement of the mesh, so the first
+    mesh is always solved. The refinement stops if
+
+    * ``max_time``: the elapsed time (in seconds) plus the predicted time of
+      the next solve would exceed the limit. The prediction scales the time of
+      the last solve with the size of the mesh.
+    * ``max_nodes``: the refined mesh would have more nodes.
+    * ``max_refinements``: the mesh has been refined this many times.
+    * ``max_posterior_bytes``: the posterior on the refined mesh (means and
+      covariance Cholesky factors), together with its evaluation at the
+      candidate nodes of the error estimate, would need more memory.
+
+    Examples
+    --------
+    >>> budget = Budget(max_nodes=100)
+    >>> budget.start()
+    >>> budget.exceeded(num_nodes=50, new_num_nodes=80, dimension=3) is None
+    True
+    >>> budget.exceeded(num_nodes=80, new_num_nodes=150, dimension=3)
+    'max_nodes'
+    """
+
+    def __init__(
+        self,
+        max_time=None,
+        max_nodes=None,
+        max_refinements=None,
+        max_posterior_bytes=None,
+        nodes_per_interval=3,
+    ):
+        self.max_time = max_time
+        self.max_nodes = max_nodes
+        self.max_refinements = max_refinements
+        self.max_posterior_bytes = max_posterior_bytes
+        self.nodes_per_interval = nodes_per_interval
+        self.start()
+
+    def start(self):
+        """Start the clock, e.g. at the beginning of a solve."""
+        self.start_time = time.perf_counter()
+        self.num_refinements = 0
+        self._level_start_time = self.start_time
+
+    @property
+    def elapsed_time(self):
+        return time.perf_counter() - self.start_time
+
+    def exceeded(self, num_nodes, new_num_nodes, dimension):
+        """Name of the limit that refining from ``num_nodes`` to
+        ``new_num_nodes`` would exceed, or ``None``.
+
+        Calling this method marks the end of a refinement level.
+        """
+        now = time.perf_counter()
+        level_time = now - self._level_start_time
+        self._level_start_time = now
+
+        if self.max_refinements is not None:
+            if self.num_refinements >= self.max_refinements:
+                return "max_refinements"
+        if self.max_nodes is not None and new_num_nodes > self.max_nodes:
+            return "max_nodes"
+        if self.max_posterior_bytes is not None:
+            nbytes = self.posterior_nbytes(new_num_nodes, dimension)
+            if nbytes > self.max_posterior_bytes:
+                return "max_posterior_bytes"
+        if self.max_time is not None:
+            predicted_time = level_time * new_num_nodes / num_nodes
+            if now - self.start_time + predicted_time > self.max_time:
+                return "max_time"
+        self.num_refinements += 1
+        return None
+
+    def posterior_nbytes(self, num_nodes, dimension):
+        """Memory of the posterior on a mesh and at its candidate nodes."""
+        num_candidates = self.nodes_per_interval * (num_nodes - 1)
+        num_floats = (num_nodes + num_candidates) * dimension * (dimension + 1)
+        return num_floats * np.dtype(float).itemsize
@@ -1,24 +1,65 @@
 import abc
+import copy
 import functools
+import threading
 
 import numpy as np
 import scipy.linalg
-from probnum import diffeq, random_variables, statespace, utils
+from probnum import diffeq, random_variables, statespace
 from probnum._randomvariablelist import _RandomVariableList
 
 from bvps import (
+    array_kalman,
+    banded_gauss_newton,
     bridges,
+    budgets,
     bvp_initialise,
     control,
+    domain_decomposition,
     error_estimates,
     kalman,
+    linearisation_cache,
     mesh,
     ode_measmods,
+    parallel_kalman,
     problems,
     quadrature,
+    solve_context,
     stopcrit,
+    two_filter_kalman,
 )
 
+FILTSMOOTH_ENGINES = {
+    "sequential": kalman.MyKalman,
+    "arrays": array_kalman.ArrayKalman,
+    "parallel": parallel_kalman.ParallelKalman,
+    "banded": banded_gauss_newton.BandedGaussNewton,
+    "decomposed": domain_decomposition.DomainDecompositionKalman,
+    "two_filter": two_filter_kalman.TwoFilterKalman,
+}
+
+
+def _tracks_running_calls(solution_generator):
+    """Count the running calls of ``solution_generator`` (see ``BVPSolver.context``).
+
+    Creates the ``context`` of the call if none is passed.
+    """
+
+    @functools.wraps(solution_generator)
+    def wrapper(self, *args, context=None, **kwargs):
+        if context is None:
+            context = solve_context.SolveContext()
+        with self._running_calls_lock:
+            self._num_running_calls += 1
+            self._context = context
+        try:
+            yield from solution_generator(self, *args, context=context, **kwargs)
+        finally:
+            with self._running_calls_lock:
+                self._num_running_calls -= 1
+
+    return wrapper
+
 
 class BVPSolver:
     def __init__(
@@ -26,12 +67,68 @@ class BVPSolver:
         dynamics_model,
         error_estimator,
         initial_sigma_squared=1e10,
+        filtsmooth_engine="sequential",
+        filtsmooth_options=None,
+        mesh_refinement="insert",
+        mesh_refinement_options=None,
     ):
         self.dynamics_model = dynamics_model
         self.error_estimator = error_estimator
         self.initial_sigma_squared = initial_sigma_squared
 
+        if filtsmooth_engine not in FILTSMOOTH_ENGINES:
+            raise ValueError(
+                f"Unknown filtsmooth_engine: {filtsmooth_engine}. "
+                f"Choose one of {list(FILTSMOOTH_ENGINES.keys())}."
+            )
+        self.filtsmooth_engine = filtsmooth_engine
+        self.filtsmooth_options = filtsmooth_options or {}
+
+        if mesh_refinement not in MESH_REFINEMENTS:
+            raise ValueError(
+                f"Unknown mesh_refinement: {mesh_refinement}. "
+                f"Choose one of {list(MESH_REFINEMENTS.keys())}."
+            )
+        self.mesh_refinement = mesh_refinement
+        self.mesh_refinement_options = mesh_refinement_options or {}
+
         self.localconvrate = self.dynamics_model.ordint  # + 0.5?
+        self._context = None
+        self._num_running_calls = 0
+        self._running_calls_lock = threading.Lock()
+
+    @property
+    def context(self):
+        """Context of the most recently started call of :meth:`solution_generator`.
+
+        While more than one call is running, the most recent one is ambiguous,
+        so this (and the statistics below) raise a ``RuntimeError``.
+        Concurrent callers pass their own ``context`` and read from it.
+        """
+        with self._running_calls_lock:
+            if self._num_running_calls > 1:
+                raise RuntimeError(
+                    f"{self._num_running_calls} solves are running. "
+                    "Read the statistics from the context that is passed to "
+                    "each call instead."
+                )
+            return self._context
+
+    @property
+    def ieks_iterations(self):
+        return None if self.context is None else self.context.ieks_iterations
+
+    @property
+    def removed_nodes(self):
+        return None if self.context is None else self.context.removed_nodes
+
+    @property
+    def status(self):
+        return None if self.context is None else self.context.status
+
+    @property
+    def linearisation_cache(self):
+        return None if self.context is None else self.context.linearisation_cache
 
     @classmethod
     def from_default_values_std_refinement(
@@ -40,6 +137,7 @@ class BVPSolver:
         use_bridge=True,
         initial_sigma_squared=1e10,
         normalise_with_interval_size=False,
+        **kwargs,
     ):
         quadrature_rule = quadrature.expquad_interior_only()
         P0 = dynamics_model.proj2coord(0)
@@ -56,6 +154,7 @@ class BVPSolver:
             dynamics_model=dynamics_model,
             error_estimator=error_estimator,
             initial_sigma_squared=initial_sigma_squared,
+            **kwargs,
         )
 
     @classmethod
@@ -65,6 +164,7 @@ class BVPSolver:
         initial_sigma_squared=1e10,
         use_bridge=True,
         normalise_with_interval_size=False,
+        **kwargs,
     ):
         quadrature_rule = quadrature.expquad_interior_only()
         P0 = dynamics_model.proj2coord(0)
@@ -81,6 +181,7 @@ class BVPSolver:
             dynamics_model=dynamics_model,
             error_estimator=error_estimator,
             initial_sigma_squared=initial_sigma_squared,
+            **kwargs,
         )
 
     @classmethod
@@ -89,6 +190,7 @@ class BVPSolver:
         dynamics_model,
         initial_sigma_squared=1e10,
         normalise_with_interval_size=False,
+        **kwargs,
     ):
         quadrature_rule = quadrature.expquad_interior_only()
         P0 = dynamics_model.proj2coord(0)
@@ -105,6 +207,7 @@ class BVPSolver:
             dynamics_model=dynamics_model,
             error_estimator=error_estimator,
             initial_sigma_squared=initial_sigma_squared,
+            **kwargs,
         )
 
     def compute_initialisation(
@@ -117,13 +220,18 @@ class BVPSolver:
 
         # Create bridge
         initrv_not_bridged = self.create_initrv()
+        # The bridge is not an LTI prior, so it always uses the sequential engine.
         if use_bridge:
-            dynamics_model, initrv = self.initialise_bridge(bvp, initrv_not_bridged)
+            dynamics_model, initrv = self.initialise_bridge(
+                bvp, initrv_not_bridged, times=initial_grid
+            )
+            engine = kalman.MyKalman
         else:
             dynamics_model, initrv = self.dynamics_model, initrv_not_bridged
-        filter_object = kalman.MyKalman(
-            dynamics_model, measurement_model=None, initrv=initrv
-        )
+            engine = functools.partial(
+                FILTSMOOTH_ENGINES[self.filtsmooth_engine], **self.filtsmooth_options
+            )
+        filter_object = engine(dynamics_model, measurement_model=None, initrv=initrv)
 
         # Create Measmodlist and zero data
         N = len(initial_grid)
@@ -170,9 +278,9 @@ class BVPSolver:
         sigma_squared = np.sum(sigmas) / normalisation
         return kalman_posterior, sigma_squared
 
-    def initialise_bridge(self, bvp, initrv_not_bridged):
+    def initialise_bridge(self, bvp, initrv_not_bridged, times=None):
 
-        bridge_prior = bridges.GaussMarkovBridge(self.dynamics_model, bvp)
+        bridge_prior = bridges.TwoFilterBridge(self.dynamics_model, bvp, times=times)
         initrv_bridged = bridge_prior.initialise_boundary_conditions(initrv_not_bridged)
         return bridge_prior, initrv_bridged
 
@@ -196,10 +304,12 @@ class BVPSolver:
         return measmodfun
 
     def solve(self, *args, **kwargs):
+        kalman_posterior = None
         for kalman_posterior, _ in self.solution_generator(*args, **kwargs):
             pass
         return kalman_posterior
 
+    @_tracks_running_calls
     def solution_generator(
         self,
         bvp,
@@ -209,9 +319,111 @@ class BVPSolver:
         maxit_ieks=10,
         maxit_em=1,
         yield_ieks_iterations=False,
+        stopcrit_ieks=None,
+        relinearisation_threshold=0.1,
+        acceleration=None,
+        line_search=None,
+        frozen_jacobians=None,
+        coarsening_threshold=None,
+        budget=None,
+        cancel_event=None,
+        mesh_evaluation=None,
+        context=None,
     ):
-
-        self.error_estimator.set_tolerance(atol=atol, rtol=rtol)
+        """Refine the mesh until the error estimate is acceptable.
+
+        Per refinement, at most ``maxit_ieks`` IEKS iterations are computed.
+        They stop early once ``stopcrit_ieks`` accepts the change of the
+        smoothed means (of the solution coordinate) between two iterations.
+        By default, this is a ``MyStoppingCriterion`` with the tolerances
+        ``atol`` and ``rtol``. The number of IEKS iterations per refinement
+        is stored in ``self.ieks_iterations``.
+
+        If the BVP is linear (see :meth:`is_linear`), a single filter/smoother
+        pass per refinement computes the exact posterior, so no further
+        IEKS iterations are computed.
+
+        The ODE is only relinearised at nodes whose linearisation point moved
+        by more than ``relinearisation_threshold`` (relative to ``atol`` and
+        ``rtol``); see ``self.linearisation_cache.cache_info()`` for the number
+        of saved evaluations. ``relinearisation_threshold=None`` relinearises
+        every node in every iteration.
+
+        ``acceleration`` (e.g. an ``ieks_acceleration.AndersonAcceleration``)
+        extrapolates the linearisation points from the previous IEKS
+        iterations. Only the derivatives that enter the ODE are extrapolated,
+        in coordinates that are scaled by ``atol`` and ``rtol``.
+
+        ``line_search`` (e.g. a ``line_search.BacktrackingLineSearch``) damps
+        the IEKS steps: a linearisation point is only accepted if it decreases
+        the residual of the ODE and the boundary conditions sufficiently;
+        otherwise, a shorter step from the previously accepted point is tried.
+        Rejected points are not smoothed, so they do not count as IEKS
+        iterations, but they count towards ``maxit_ieks``.
+
+        ``frozen_jacobians`` (e.g. a ``frozen_jacobians.FrozenJacobians``)
+        reuses the Jacobians of the ODE from the first IEKS iteration on a mesh
+        and only updates the residuals, until the iteration contracts too
+        slowly. It replaces the relinearisation cache.
+
+        If ``coarsening_threshold`` is not ``None``, nodes between two
+        intervals whose errors are far below the tolerance are removed while
+        the mesh is refined elsewhere (see :func:`coarsen_mesh`). The number of
+        removed nodes per refinement is stored in ``self.removed_nodes``.
+
+        A ``budget`` (a ``budgets.Budget``) limits the wall-clock time, the
+        number of nodes and refinements, and the memory of the posterior.
+        Before a refinement would exceed it, the generator stops after the
+        current posterior. Why the solver stopped, and the error estimate
+        it achieved, is stored in ``self.status`` (a ``budgets.SolveStatus``).
+
+        ``cancel_event`` (e.g. a ``threading.Event``) is checked before every
+        IEKS iteration and whenever the generator resumes after a refinement.
+        Once it is set, the generator stops, and the reason
+        in ``self.status`` is ``"cancelled"``. If the generator stops before
+        the first posterior (e.g. if the event is set already), ``solve``
+        returns ``None``.
+
+        ``mesh_evaluation`` (a ``concurrent_evaluation.ConcurrentMeshEvaluation``)
+        evaluates ``f`` and ``df`` for all nodes of a linearisation or an error
+        estimate in chunks that run concurrently in an executor.
+
+        The state of the call (the prior with the current diffusion, the
+        filter, the statistics above, and the status) is kept in ``context``
+        (a ``solve_context.SolveContext``; by default, a new one). Neither the
+        solver nor its prior are modified, so one solver can serve concurrent
+        calls, e.g. from a thread pool. ``self.ieks_iterations``,
+        ``self.status``, etc. refer to ``self.context``, the context of the
+        most recently started call. They raise a ``RuntimeError`` while more
+        than one call is running; concurrent callers pass their own context
+        and read from it. Objects passed to the call (stopping
+        criterion, acceleration, line search, frozen Jacobians, budget) must
+        not be shared between concurrent calls.
+        """
+        if acceleration is not None and line_search is not None:
+            raise ValueError("Choose either an acceleration or a line search.")
+
+        error_estimator = copy.copy(self.error_estimator)
+        error_estimator.set_tolerance(atol=atol, rtol=rtol)
+        context.error_estimator = error_estimator
+        if stopcrit_ieks is None:
+            stopcrit_ieks = stopcrit.MyStoppingCriterion(
+                atol=atol, rtol=rtol, maxit=maxit_ieks, maxit_reached="pass"
+            )
+        projmat = self.dynamics_model.proj2coord(0)
+        context.ieks_iterations = []
+        context.removed_nodes = []
+        context.status = None
+        if budget is None:
+            budget = budgets.Budget()
+        budget.start()
+        per_interval_error = None
+        if relinearisation_threshold is None:
+            context.linearisation_cache = None
+        else:
+            context.linearisation_cache = linearisation_cache.LinearisationCache(
+                atol=atol, rtol=rtol, threshold=relinearisation_threshold
+            )
 
         kalman_posterior = initial_posterior
         times = kalman_posterior.locations
@@ -219,82 +431,190 @@ class BVPSolver:
 
         # Create data and measmods
         ode_measmod, left_measmod, right_measmod = self.choose_measurement_model(bvp)
+        if mesh_evaluation is not None:
+            ode_measmod = mesh_evaluation.wrap(ode_measmod)
         measmod_list = self.create_measmod_list(
             ode_measmod, left_measmod, right_measmod, times
         )
 
-        filter_object = self.setup_filter_object(bvp)
+        filter_object = self.setup_filter_object(bvp, context)
+        if self.is_linear(bvp, ode_measmod):
+            maxit_ieks = 1
         linearise_at = kalman_posterior.state_rvs
         acceptable_intervals = np.zeros(len(times[1:]), dtype=bool)
         while np.any(np.logical_not(acceptable_intervals)):
+            num_ieks_iterations = 0
 
             # EM iterations
             for _ in range(maxit_em):
 
                 # IEKS iterations
+                stopcrit_ieks.iterations = 0
+                if line_search is not None:
+                    line_search.reset()
+                if acceleration is not None:
+                    acceleration.reset()
+                    input_projection = ode_measmod.input_projection
+                    if input_projection is None:
+                        input_projection = np.eye(self.dynamics_model.dimension)
+                    scale = atol + rtol * np.abs(linearise_at.mean @ input_projection.T)
                 for _ in range(maxit_ieks):
+                    if cancel_event is not None and cancel_event.is_set():
+                        context.set_status(
+                            "cancelled", per_interval_error, times, budget
+                        )
+                        return
+
+                    if line_search is not None:
+                        linearise_at, accepted = damp_ieks_step(
+                            line_search, measmod_list, linearise_at, times
+                        )
+                        if not accepted:
+                            continue
 
                     lin_measmod_list = self.linearise_measmod_list(
-                        measmod_list, linearise_at, times
+                        measmod_list,
+                        linearise_at,
+                        times,
+                        cache=frozen_jacobians or context.linearisation_cache,
                     )
                     kalman_posterior = filter_object.filtsmooth(
                         dataset=dataset, times=times, measmod_list=lin_measmod_list
                     )
                     sigmas = filter_object.sigmas
                     sigma_squared = np.mean(sigmas) / bvp.dimension
+                    num_ieks_iterations += 1
+
+                    if line_search is not None:
+                        line_search.set_step(
+                            array_kalman.as_array_posterior(kalman_posterior).means
+                        )
 
+                    previous_points = linearise_at
+                    old_mean = linearise_at.mean @ projmat.T
                     linearise_at = kalman_posterior.state_rvs
+                    new_mean = linearise_at.mean @ projmat.T
 
                     if yield_ieks_iterations:
                         yield kalman_posterior, sigma_squared
 
+                    if stopcrit_ieks.terminate(
+                        error=new_mean - old_mean, reference=new_mean
+                    ):
+                        break
+
+                    if acceleration is not None:
+                        linearise_at = accelerate_linearisation_points(
+                            acceleration,
+                            previous_points,
+                            array_kalman.as_array_posterior(kalman_posterior),
+                            input_projection,
+                            scale,
+                        )
+
                 filter_object.initrv = self.update_initrv(
                     kalman_posterior, filter_object.initrv
                 )
 
+            context.ieks_iterations.append(num_ieks_iterations)
             yield kalman_posterior, sigma_squared
+            if cancel_event is not None and cancel_event.is_set():
+                context.set_status("cancelled", per_interval_error, times, budget)
+                return
 
-            # Recalibrate diffusion
-            filter_object.initrv = self.update_covariances_with_sigma_squared(
-                filter_object.initrv, sigma_squared
-            )
+            # Recalibrate diffusion. The posterior is evaluated with the
+            # recalibrated prior (as if the prior had been rescaled in place).
+            previous_prior = context.dynamics_model
+            context.scale_diffusion(sigma_squared)
+            replace_prior(kalman_posterior, previous_prior, context.dynamics_model)
 
             candidate_nodes = construct_candidate_nodes(
                 current_mesh=times,
-                nodes_per_interval=self.error_estimator.quadrature_rule.nodes,
+                nodes_per_interval=error_estimator.quadrature_rule.nodes,
             )
-            evaluated_posterior = kalman_posterior(candidate_nodes)
+            array_posterior = array_kalman.as_array_posterior(kalman_posterior)
+            evaluated_posterior = array_posterior(candidate_nodes)
             mm_list = [ode_measmod] * len(candidate_nodes)
             (
                 per_interval_error,
                 acceptable,
-            ) = self.error_estimator.estimate_error_per_interval(
+            ) = error_estimator.estimate_error_per_interval(
                 evaluated_posterior,
                 candidate_nodes,
                 times,
                 sigma_squared,
                 ode_measmod_list=mm_list,
             )
-            times, acceptable_intervals = refine_mesh(
+            refine = MESH_REFINEMENTS[self.mesh_refinement]
+            refined_mesh, acceptable_intervals = refine(
                 current_mesh=times,
                 error_per_interval=per_interval_error,
                 localconvrate=self.localconvrate,
-                quadrature_nodes=self.error_estimator.quadrature_rule.nodes,
+                quadrature_nodes=error_estimator.quadrature_rule.nodes,
+                **self.mesh_refinement_options,
             )
+            if coarsening_threshold is not None and not np.all(acceptable_intervals):
+                coarsened_mesh = coarsen_mesh(
+                    current_mesh=times,
+                    error_per_interval=per_interval_error,
+                    localconvrate=self.localconvrate,
+                    threshold=coarsening_threshold,
+                )
+                removed = np.setdiff1d(times, coarsened_mesh)
+                refined_mesh = np.setdiff1d(refined_mesh, removed)
+                context.removed_nodes.append(len(removed))
+
+            if not np.all(acceptable_intervals):
+                exceeded = budget.exceeded(
+                    num_nodes=len(times),
+                    new_num_nodes=len(refined_mesh),
+                    dimension=self.dynamics_model.dimension,
+                )
+                if exceeded is not None:
+                    context.set_status(exceeded, per_interval_error, times, budget)
+                    return
+            times = refined_mesh
 
             dataset = np.zeros((len(times), bvp.dimension))
             measmod_list = self.create_measmod_list(
                 ode_measmod, left_measmod, right_measmod, times
             )
-            linearise_at = kalman_posterior(times)
+            linearise_at = collect_linearisation_points(
+                times, array_posterior, candidate_nodes, evaluated_posterior
+            )
 
-    def setup_filter_object(self, bvp):
-        initrv_not_bridged = self.create_initrv()
-        initrv_not_bridged = self.update_covariances_with_sigma_squared(
-            initrv_not_bridged, self.initial_sigma_squared
+        context.set_status("converged", per_interval_error, times, budget)
+
+    def is_linear(self, bvp, ode_measmod, num_points=7):
+        """Whether the ODE is linear in the state.
+
+        Uses ``bvp.linear`` if it is declared. Otherwise, the Jacobian of the
+        ODE residual is compared at random states in ``num_points`` locations.
+        """
+        if bvp.linear is not None:
+            return bvp.linear
+        times = np.linspace(bvp.t0, bvp.tmax, num_points)
+        return ode_measmod.is_linear(times)
+
+    def setup_filter_object(self, bvp, context=None):
+        """Filter object on a copy of the prior with the initial diffusion.
+
+        The copy is stored in ``context`` (a new one if None); the prior of
+        the solver is not modified.
+        """
+        if context is None:
+            context = solve_context.SolveContext()
+        context.dynamics_model = solve_context.scale_diffusion(
+            self.dynamics_model, self.initial_sigma_squared
         )
-        filter_object = kalman.MyKalman(self.dynamics_model, None, initrv_not_bridged)
-        return filter_object
+        engine = FILTSMOOTH_ENGINES[self.filtsmooth_engine]
+        context.filter_object = engine(
+            context.dynamics_model,
+            None,
+            self.create_initrv(),
+            **self.filtsmooth_options,
+        )
+        return context.filter_object
 
     def create_initrv(self):
         m0 = np.ones(self.dynamics_model.dimension)
@@ -303,18 +623,6 @@ class BVPSolver:
         initrv_not_bridged = random_variables.Normal(m0, C0, cov_cholesky=np.sqrt(C0))
         return initrv_not_bridged
 
-    def update_covariances_with_sigma_squared(self, initrv_not_bridged, sigma_squared):
-        """Include sigma into initial covariance and process noise."""
-
-        sigma = np.sqrt(sigma_squared)
-        self.dynamics_model.equivalent_discretisation_preconditioned._proc_noise_cov_cholesky *= (
-            sigma
-        )
-        self.dynamics_model.equivalent_discretisation_preconditioned.proc_noise_cov_mat *= (
-            sigma_squared
-        )
-        return initrv_not_bridged
-
     def choose_measurement_model(self, bvp):
 
         if isinstance(bvp, problems.SecondOrderBoundaryValueProblem):
@@ -337,7 +645,20 @@ class BVPSolver:
         measmod_list.extend([[right_measmod, ode_measmod]])
         return measmod_list
 
-    def linearise_measmod_list(self, measmod_list, states, times):
+    def linearise_measmod_list(self, measmod_list, states, times, cache=None):
+
+        ode_measmod = measmod_list[0][1]
+        if isinstance(ode_measmod, ode_measmods.VectorizedEKFComponent):
+            # Linearise the whole mesh with a single call to f and df.
+            if cache is None:
+                lin_measmod_list = ode_measmod.linearize_on_mesh(times, states)
+            else:
+                lin_measmod_list = cache.linearize_on_mesh(
+                    ode_measmod, times, states.mean
+                )
+            lin_measmod_list[0] = [measmod_list[0][0], lin_measmod_list[0]]
+            lin_measmod_list[-1] = [measmod_list[-1][0], lin_measmod_list[-1]]
+            return lin_measmod_list
 
         lin_measmod_list = [
             mm.linearize(state) for (mm, state) in zip(measmod_list[1:-1], states[1:-1])
@@ -356,14 +677,26 @@ class BVPSolver:
     def update_initrv(self, kalman_posterior, previous_initrv):
         """EM update for initial RV."""
 
-        inferred_initrv = kalman_posterior.states[0]
-
-        new_mean = inferred_initrv.mean
-        new_cov_cholesky = utils.linalg.cholesky_update(
-            inferred_initrv.cov_cholesky,
-            inferred_initrv.mean - previous_initrv.mean,
+        if isinstance(kalman_posterior, array_kalman.ArrayKalmanPosterior):
+            new_mean = kalman_posterior.means[0]
+            cov_cholesky = kalman_posterior.cov_choleskies[0]
+        else:
+            inferred_initrv = kalman_posterior.states[0]
+            new_mean, cov_cholesky = inferred_initrv.mean, inferred_initrv.cov_cholesky
+
+        # The posterior covariance may be singular, so its Cholesky factor is
+        # not unique. The regularisation is added to the covariance (not to the
+        # factor), so that the update only depends on the covariance.
+        new_cov_cholesky = array_kalman.tria(
+            np.concatenate(
+                (
+                    cov_cholesky,
+                    (new_mean - previous_initrv.mean)[:, None],
+                    1e-6 * np.eye(len(new_mean)),
+                ),
+                axis=-1,
+            )
         )
-        new_cov_cholesky += 1e-6 * np.eye(len(new_cov_cholesky))
         new_cov = new_cov_cholesky @ new_cov_cholesky.T
 
         return random_variables.Normal(
@@ -440,6 +773,213 @@ def refine_mesh(current_mesh, error_per_interval, localconvrate, quadrature_node
     return new_mesh, acceptable
 
 
+def coarsen_mesh(current_mesh, error_per_interval, localconvrate, threshold=0.1):
+    """Coarsen the mesh.
+
+    The node between two adjacent intervals is removed if the predicted error
+    of the merged interval, ``max_i e_i (H / h_i) ** localconvrate`` with the
+    lengths ``h_i`` of the two intervals and their sum ``H``, is below
+    ``threshold``. Since intervals are only refined if their error exceeds one,
+    a threshold well below one keeps nodes from being removed and inserted
+    again (hysteresis). Every interval is merged at most once, the boundary
+    nodes are kept, and at least three nodes remain.
+
+    Examples
+    --------
+    >>> current_mesh = [0., 0.25, 0.5, 1.0, 2.0]
+    >>> error_per_interval = [1e-4, 1e-4, 0.5, 1e-4]
+    >>> localconvrate = 3.5
+    >>> new_mesh = coarsen_mesh(current_mesh, error_per_interval, localconvrate)
+    >>> print(new_mesh)
+    [0.  0.5 1.  2. ]
+    """
+    current_mesh = np.asarray(current_mesh)
+    error_per_interval = np.asarray(error_per_interval)
+
+    lengths = np.diff(current_mesh)
+    merged_lengths = lengths[:-1] + lengths[1:]
+    predicted_error = np.maximum(
+        error_per_interval[:-1] * (merged_lengths / lengths[:-1]) ** localconvrate,
+        error_per_interval[1:] * (merged_lengths / lengths[1:]) ** localconvrate,
+    )
+    mergeable = predicted_error < threshold
+
+    keep = np.ones(len(current_mesh), dtype=bool)
+    num_removable = len(current_mesh) - 3
+    for idx in np.flatnonzero(mergeable):
+        if np.count_nonzero(~keep) == num_removable:
+            break
+        # Skip if the left interval has already been merged with its neighbour
+        if keep[idx]:
+            keep[idx + 1] = False
+    return current_mesh[keep]
+
+
+def equidistribute_mesh(
+    current_mesh,
+    error_per_interval,
+    localconvrate,
+    quadrature_nodes=None,
+    growth_factor=4.0,
+    safety=0.5,
+    min_density=0.1,
+):
+    """Redistribute the mesh such that the error is equidistributed.
+
+    With the error model ``e_i = (m_i h_i) ** localconvrate`` of
+    :func:`refine_mesh`, ``m_i = e_i ** (1 / localconvrate) / h_i`` is a
+    piecewise constant error density. The new mesh places its nodes such that
+    every interval carries the same share of ``M = sum_i m_i h_i``. It has the
+    fewest nodes for which the predicted errors ``(M / (N - 1)) ** localconvrate``
+    are below ``safety``, but not fewer than the current mesh and at most
+    ``growth_factor`` times as many. The density is bounded from below by
+    ``min_density`` times its average, so that no region is left without
+    nodes. The ``quadrature_nodes`` are not used.
+
+    Examples
+    --------
+    >>> current_mesh = [0., 0.5, 1.0, 2.0]
+    >>> error_per_interval = [1000., 10., 0.1]
+    >>> localconvrate = 3.5
+    >>> new_mesh, acceptable = equidistribute_mesh(current_mesh, error_per_interval, localconvrate, growth_factor=2.0)
+    >>> print(np.round(new_mesh, 2))
+    [0.   0.1  0.19 0.29 0.38 0.48 0.78 2.  ]
+    >>> print(acceptable)
+    [False False  True]
+    """
+    current_mesh = np.asarray(current_mesh)
+    error_per_interval = np.asarray(error_per_interval)
+
+    acceptable = error_per_interval < 1.0
+    if np.all(acceptable):
+        return current_mesh, acceptable
+
+    lengths = np.diff(current_mesh)
+    density = error_per_interval ** (1.0 / localconvrate) / lengths
+    average_density = np.sum(density * lengths) / np.sum(lengths)
+    density = np.maximum(density, min_density * average_density)
+    cumulative = np.concatenate(([0.0], np.cumsum(density * lengths)))
+
+    num_intervals = int(np.ceil(cumulative[-1] / safety ** (1.0 / localconvrate)))
+    num_nodes = len(current_mesh)
+    num_nodes = min(max(num_intervals + 1, num_nodes), int(growth_factor * num_nodes))
+
+    targets = np.linspace(0.0, cumulative[-1], num_nodes)
+    new_mesh = np.interp(targets, cumulative, current_mesh)
+    new_mesh[0], new_mesh[-1] = current_mesh[0], current_mesh[-1]
+    return new_mesh, acceptable
+
+
+MESH_REFINEMENTS = {
+    "insert": refine_mesh,
+    "equidistribute": equidistribute_mesh,
+}
+
+
+def damp_ieks_step(line_search, measmod_list, linearise_at, times):
+    """Accept or reject the next linearisation point of an IEKS iteration.
+
+    The merit of ``linearise_at`` is the squared norm of the residuals of the
+    ODE and the boundary conditions. Returns the point to linearise at and
+    whether the line search accepts ``linearise_at``. If it does not, the
+    returned point lies between the previously accepted point and the
+    smoothed means that have been computed from it; it keeps the covariances
+    of ``linearise_at``.
+    """
+    means = np.asarray(linearise_at.mean)
+    merit = bvp_residual_merit(measmod_list, linearise_at, times)
+    next_means, accepted = line_search(means, merit=merit)
+    if accepted:
+        return linearise_at, True
+    cov_choleskies = getattr(linearise_at, "cov_cholesky", None)
+    if cov_choleskies is None:
+        cov_choleskies = np.stack([rv.cov_cholesky for rv in linearise_at])
+    return array_kalman.StackedNormal(next_means, cov_choleskies), False
+
+
+def bvp_residual_merit(measmod_list, states, times):
+    """Squared norm of the residuals of the ODE and the boundary conditions.
+
+    ``measmod_list`` is the list of (nonlinear) measurement models of the
+    solver; the residuals are evaluated at the means of ``states``.
+    """
+    left_measmod, ode_measmod = measmod_list[0]
+    right_measmod = measmod_list[-1][0]
+    ode_residual, _ = _residual_moments(
+        [ode_measmod] * len(times), states, times, compute_var=False
+    )
+    means = np.asarray(states.mean)
+    left_residual = left_measmod.state_trans_mat @ means[0] + left_measmod.shift_vec
+    right_residual = right_measmod.state_trans_mat @ means[-1] + right_measmod.shift_vec
+    return (
+        np.sum(ode_residual ** 2)
+        + np.sum(left_residual ** 2)
+        + np.sum(right_residual ** 2)
+    )
+
+
+def accelerate_linearisation_points(
+    acceleration, previous_points, array_posterior, input_projection, scale
+):
+    """Extrapolate the next linearisation points from the last IEKS iteration.
+
+    ``previous_points`` are the points the last iteration linearised at,
+    ``array_posterior`` its result. The ``acceleration`` acts on the
+    projections ``input_projection @ x`` (scaled by ``scale``); the other
+    coordinates are taken from the posterior. Returns a ``StackedNormal``
+    with the posterior covariances.
+    """
+    means = array_posterior.means
+    inputs = means @ input_projection.T
+    previous_inputs = previous_points.mean @ input_projection.T
+    accelerated_inputs = scale * acceleration(previous_inputs / scale, inputs / scale)
+    accelerated_means = means + (accelerated_inputs - inputs) @ input_projection
+    return array_kalman.StackedNormal(accelerated_means, array_posterior.cov_choleskies)
+
+
+def replace_prior(kalman_posterior, previous_prior, prior):
+    """Let the posterior (and its filtering posterior) interpolate with ``prior``.
+
+    Only transitions that are ``previous_prior`` are replaced, so posteriors
+    that hold their own copy of the prior keep it.
+    """
+    for posterior in (
+        kalman_posterior,
+        getattr(kalman_posterior, "filtering_posterior", None),
+    ):
+        if getattr(posterior, "transition", None) is previous_prior:
+            posterior.transition = prior
+
+
+def collect_linearisation_points(
+    mesh, array_posterior, candidate_nodes, evaluated_candidates
+):
+    """Marginals of the posterior on a refined mesh.
+
+    The refined mesh consists of the locations of the posterior and a subset
+    of the candidate nodes, at which the posterior has already been evaluated
+    for the error estimation. Those marginals are merged instead of being
+    interpolated again. Nodes that are in neither set are interpolated.
+    """
+    mesh = np.asarray(mesh)
+    locations = np.concatenate((array_posterior.locations, candidate_nodes))
+    order = np.argsort(locations, kind="stable")
+    locations = locations[order]
+    means = np.concatenate((array_posterior.means, evaluated_candidates.mean))[order]
+    cov_choleskies = np.concatenate(
+        (array_posterior.cov_choleskies, evaluated_candidates.cov_cholesky)
+    )[order]
+
+    indices = np.minimum(np.searchsorted(locations, mesh), len(locations) - 1)
+    found = locations[indices] == mesh
+    means, cov_choleskies = means[indices], cov_choleskies[indices]
+    if not np.all(found):
+        means[~found], cov_choleskies[~found] = array_posterior.interpolate_arrays(
+            mesh[~found]
+        )
+    return array_kalman.StackedNormal(means, cov_choleskies)
+
+
 def construct_candidate_nodes(current_mesh, nodes_per_interval, where=None):
     """Construct nodes that are located in-between mesh points.
 
@@ -591,13 +1131,10 @@ class ErrorViaResidual(BVPErrorEstimator):
 
         if self.P0 is None:
             raise ValueError("Pass a P0 to the ErrorEstimator.")
-        residual_rv = _RandomVariableList(
-            [
-                mm.forward_rv(rv, t)[0]
-                for mm, rv, t in zip(ode_measmod_list, evaluated_posterior, points)
-            ]
+        residual_mean, _ = _residual_moments(
+            ode_measmod_list, evaluated_posterior, points, compute_var=False
         )
-        squared_error_estimate = residual_rv.mean ** 2
+        squared_error_estimate = residual_mean ** 2
         reference = evaluated_posterior.mean @ self.P0.T
         return squared_error_estimate, reference, {}
 
@@ -614,14 +1151,41 @@ class ErrorViaProbabilisticResidual(BVPErrorEstimator):
         if self.P0 is None:
             raise ValueError("Pass a P0 to the ErrorEstimator.")
 
-        residual_rv = _RandomVariableList(
-            [
-                mm.forward_rv(rv, t)[0]
-                for mm, rv, t in zip(ode_measmod_list, evaluated_posterior, points)
-            ]
+        residual_mean, residual_var = _residual_moments(
+            ode_measmod_list, evaluated_posterior, points, compute_var=True
         )
         squared_error_estimate = (
-            residual_rv.mean ** 2 + residual_rv.var * calibrated_sigma_squared
+            residual_mean ** 2 + residual_var * calibrated_sigma_squared
         )
         reference = evaluated_posterior.mean @ self.P0.T
         return squared_error_estimate, reference, {}
+
+
+def _residual_moments(ode_measmod_list, evaluated_posterior, points, compute_var):
+    """Means (and variances) of the ODE residual at the evaluated posterior.
+
+    If all measurement models are the same vectorised EKF component,
+    the residual is evaluated in one batched pass. Otherwise, each
+    measurement model is applied separately.
+    """
+    measmod = ode_measmod_list[0]
+    if isinstance(measmod, ode_measmods.VectorizedEKFComponent) and all(
+        mm is measmod for mm in ode_measmod_list
+    ):
+        means = np.asarray(evaluated_posterior.mean)
+        cov_choleskies = None
+        if compute_var:
+            cov_choleskies = getattr(evaluated_posterior, "cov_cholesky", None)
+            if cov_choleskies is None:
+                cov_choleskies = np.stack(
+                    [rv.cov_cholesky for rv in evaluated_posterior]
+                )
+        return measmod.forward_moments_on_mesh(points, means, cov_choleskies)
+
+    residual_rv = _RandomVariableList(
+        [
+            mm.forward_rv(rv, t)[0]
+            for mm, rv, t in zip(ode_measmod_list, evaluated_posterior, points)
+        ]
+    )
+    return residual_rv.mean, (residual_rv.var if compute_var else None)
@@ -0,0 +1,100 @@
+"""Concurrent evaluation of the ODE on the mesh.
+
+Every IEKS iteration linearises the ODE residual at every node, and every
+error estimate evaluates it at the quadrature nodes. Both go through the mesh
+functions of a ``VectorizedEKFComponent``, i.e. ``f`` and ``df`` are evaluated
+for all nodes of a pass with a single call. If the right-hand side wraps a
+costly model (table lookups, nested quadratures, compiled code that releases
+the GIL), this call dominates the pass. Here, the nodes are split into chunks
+whose evaluations run concurrently in an executor; the results are
+concatenated, so the linearised models are assembled as before.
+"""
+
+import copy
+import os
+
+import numpy as np
+
+
+class ChunkedMeshFunction:
+    """Evaluate a mesh function ``fun(t[N], x[N, D])`` on chunks of the mesh.
+
+    Evaluations run in ``executor``; the results (with leading axis N) are
+    concatenated. Meshes with fewer than ``min_chunk_size`` nodes per chunk
+    are split into fewer chunks, and a single chunk is evaluated in the
+    current thread.
+
+    Examples
+    --------
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> fun = lambda t, x: x**2 + t[:, None]
+    >>> times, means = np.linspace(0.0, 1.0, 5), np.ones((5, 2))
+    >>> with ThreadPoolExecutor(max_workers=2) as executor:
+    ...     chunked = ChunkedMeshFunction(fun, executor, num_chunks=2)
+    ...     np.allclose(chunked(times, means), fun(times, means))
+    True
+    """
+
+    def __init__(self, fun, executor, num_chunks, min_chunk_size=1):
+        self.fun = fun
+        self.executor = executor
+        self.num_chunks = num_chunks
+        self.min_chunk_size = min_chunk_size
+
+    def __call__(self, times, means):
+        times = np.asarray(times)
+        num_chunks = min(self.num_chunks, len(times) // self.min_chunk_size)
+        if num_chunks <= 1:
+            return self.fun(times, means)
+        results = self.executor.map(
+            self.fun,
+            np.array_split(times, num_chunks),
+            np.array_split(means, num_chunks),
+        )
+        return np.concatenate(list(results))
+
+
+class ConcurrentMeshEvaluation:
+    """Evaluate ``f`` and ``df`` of the ODE on the mesh concurrently.
+
+    Pass it as ``mesh_evaluation`` to ``BVPSolver.solution_generator``. All
+    evaluations of the ODE measurement model (linearisation, also through the
+    relinearisation cache and frozen Jacobians, and the residual in the error
+    estimates) are then split into ``num_chunks`` chunks that run in
+    ``executor``.
+
+    A thread pool suits right-hand sides that release the GIL. For a process
+    pool, the mesh functions of the measurement model must be picklable.
+
+    Parameters
+    ----------
+    executor
+        ``concurrent.futures.Executor`` that evaluates the chunks.
+    num_chunks
+        Number of chunks per evaluation. Defaults to the number of cores.
+    min_chunk_size
+        Minimum number of nodes per chunk. Smaller meshes use fewer chunks.
+    """
+
+    def __init__(self, executor, num_chunks=None, min_chunk_size=1):
+        if num_chunks is None:
+            num_chunks = os.cpu_count()
+        if num_chunks < 1 or min_chunk_size < 1:
+            raise ValueError("The number and size of the chunks must be positive.")
+        self.executor = executor
+        self.num_chunks = num_chunks
+        self.min_chunk_size = min_chunk_size
+
+    def wrap(self, measmod):
+        """Copy of a ``VectorizedEKFComponent`` whose mesh functions are chunked."""
+        wrapped = copy.copy(measmod)
+        wrapped.mesh_state_trans_fun = self._chunked(measmod.mesh_state_trans_fun)
+        wrapped.mesh_jacob_state_trans_fun = self._chunked(
+            measmod.mesh_jacob_state_trans_fun
+        )
+        return wrapped
+
+    def _chunked(self, fun):
+        return ChunkedMeshFunction(
+            fun, self.executor, self.num_chunks, min_chunk_size=self.min_chunk_size
+        )
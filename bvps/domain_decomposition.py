@@ -0,0 +1,210 @@
+"""Domain decomposition of the Kalman filter and smoother.
+
+The mesh is split into ``K`` consecutive pieces. Conditioned on the state at
+the node before a piece (the interface state), the filtering distribution in
+the piece depends only on the observations in the piece; the same holds for
+the smoother with the state after the piece. Filtering and smoothing are
+therefore done in three phases:
+
+1. Every piece (except the last) is reduced to a single element of the
+   parallel Kalman filter (``parallel_kalman.combine_filtering``): the
+   distribution of its last state given the unknown interface state, and the
+   information its observations carry about the interface state.
+2. The ``K - 1`` reduced elements are combined sequentially. This small
+   Gaussian system yields the filtering distribution at every interface
+   (similar to multiple shooting).
+3. Every piece is filtered from its (now known) interface distribution.
+
+The smoother proceeds alike, backwards in time. Phases 1 and 3 are
+independent across the pieces and are mapped over an executor, e.g. a
+``ProcessPoolExecutor`` with ``K`` workers; only the reduced elements and the
+piece results are sent between processes. Up to round-off, the posterior is
+the one of the sequential filter and smoother.
+"""
+
+import functools
+
+import numpy as np
+
+from .parallel_kalman import (
+    ParallelKalman,
+    _filtering_elements,
+    _scan_chunk,
+    _slice,
+    _smoothing_elements,
+    combine_filtering,
+    combine_smoothing_reversed,
+)
+
+
+def decomposed_scan(combine, pieces, executor=None):
+    """Inclusive scan over consecutive pieces of elements.
+
+    ``pieces`` are callables without arguments that return the elements of a
+    piece (tuples of arrays that share the leading axis). They are called in
+    ``executor`` (or in the current process if ``executor`` is None), so for
+    a process pool, they must be picklable, e.g. ``functools.partial`` of a
+    module-level function.
+    """
+    map_ = map if executor is None else executor.map
+    summaries = list(map_(_reduce_piece, [combine] * (len(pieces) - 1), pieces[:-1]))
+
+    # The carry into a piece is the reduction of all previous pieces.
+    carries = [None]
+    for summary in summaries:
+        carries.append(
+            summary if carries[-1] is None else combine(carries[-1], summary)
+        )
+    scanned = list(map_(_scan_piece, [combine] * len(pieces), pieces, carries))
+    return tuple(np.concatenate(arrays) for arrays in zip(*scanned))
+
+
+def piece_bounds(num_nodes, num_pieces):
+    """Start and end indices of (nearly) equally large pieces of the mesh.
+
+    Examples
+    --------
+    >>> piece_bounds(10, 3)
+    [(0, 3), (3, 6), (6, 10)]
+    """
+    num_pieces = max(1, min(num_pieces, num_nodes))
+    bounds = np.linspace(0, num_nodes, num_pieces + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _reduce_piece(combine, piece):
+    """Reduce the elements of a piece to one (pairwise, vectorised)."""
+    elements = piece()
+    while len(elements[0]) > 1:
+        num_elements = len(elements[0])
+        pairs = combine(
+            _slice(elements, slice(0, num_elements - 1, 2)),
+            _slice(elements, slice(1, num_elements, 2)),
+        )
+        if num_elements % 2 == 1:
+            pairs = tuple(
+                np.concatenate((pair, element[-1:]))
+                for pair, element in zip(pairs, elements)
+            )
+        elements = pairs
+    return elements
+
+
+def _scan_piece(combine, piece, carry):
+    elements = piece()
+    if carry is not None:
+        first = combine(carry, _slice(elements, slice(0, 1)))
+        elements = tuple(
+            np.concatenate((f, element[1:])) for f, element in zip(first, elements)
+        )
+    return _scan_chunk(combine, elements)
+
+
+def _piece_filtering_elements(
+    mean0, cov_cholesky0, state_trans, proc_noise_cholesky, measurements, drop_first
+):
+    """Filtering elements of a piece.
+
+    Pieces other than the first one include the node before the piece, which
+    provides the transition into the piece, and drop its element.
+    """
+    elements = _filtering_elements(
+        mean0, cov_cholesky0, state_trans, proc_noise_cholesky, *measurements
+    )
+    if drop_first:
+        return _slice(elements, slice(1, None))
+    return elements
+
+
+def _piece_smoothing_elements(
+    means, cov_choleskies, state_trans, proc_noise_cholesky, drop_last
+):
+    """Time-reversed smoothing elements of a piece.
+
+    Pieces other than the last one include the node after the piece, which
+    provides the transition out of the piece, and drop its element.
+    """
+    elements, _ = _smoothing_elements(
+        means, cov_choleskies, state_trans, proc_noise_cholesky
+    )
+    if drop_last:
+        elements = _slice(elements, slice(0, -1))
+    return _slice(elements, slice(None, None, -1))
+
+
+class DomainDecompositionKalman(ParallelKalman):
+    """Kalman filtering and smoothing on ``num_pieces`` pieces of the mesh.
+
+    Drop-in replacement for :class:`ParallelKalman` (and thereby for
+    :class:`ArrayKalman`). The smoothing posterior does not store the
+    smoothing gains.
+
+    Parameters
+    ----------
+    executor
+        ``concurrent.futures.Executor`` that processes the pieces.
+        If None, pieces are processed in the current thread.
+    num_pieces
+        Number of pieces. Use (at least) the number of workers of ``executor``.
+    """
+
+    def __init__(
+        self,
+        dynamics_model,
+        measurement_model,
+        initrv,
+        executor=None,
+        num_pieces=1,
+    ):
+        super().__init__(
+            dynamics_model,
+            measurement_model,
+            initrv,
+            executor=executor,
+            num_chunks=num_pieces,
+        )
+        self.num_pieces = num_pieces
+
+    def _scan_filtering_elements(
+        self, mean0, cov_cholesky0, state_trans, proc_noise_cholesky, measurements
+    ):
+        pieces = []
+        for start, end in piece_bounds(len(state_trans) + 1, self.num_pieces):
+            before = max(start - 1, 0)
+            pieces.append(
+                functools.partial(
+                    _piece_filtering_elements,
+                    mean0,
+                    cov_cholesky0,
+                    state_trans[before : end - 1],
+                    proc_noise_cholesky[before : end - 1],
+                    tuple(array[before:end] for array in measurements),
+                    drop_first=start > 0,
+                )
+            )
+        _, means, cov_choleskies, _, _ = decomposed_scan(
+            combine_filtering, pieces, executor=self.executor
+        )
+        return means, cov_choleskies
+
+    def _scan_smoothing_elements(
+        self, means, cov_choleskies, state_trans, proc_noise_cholesky
+    ):
+        num_nodes = len(means)
+        pieces = []
+        for start, end in reversed(piece_bounds(num_nodes, self.num_pieces)):
+            after = min(end + 1, num_nodes)
+            pieces.append(
+                functools.partial(
+                    _piece_smoothing_elements,
+                    means[start:after],
+                    cov_choleskies[start:after],
+                    state_trans[start : after - 1],
+                    proc_noise_cholesky[start : after - 1],
+                    drop_last=end < num_nodes,
+                )
+            )
+        _, smoothed_means, smoothed_cov_choleskies = decomposed_scan(
+            combine_smoothing_reversed, pieces, executor=self.executor
+        )
+        return smoothed_means[::-1], smoothed_cov_choleskies[::-1], None
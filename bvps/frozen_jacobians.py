@@ -0,0 +1,116 @@
+"""Frozen Jacobians (simplified Newton) for the IEKS iteration.
+
+Every IEKS iteration linearises the ODE residual ``h(x)`` at the current
+linearisation points ``x``, which requires ``f`` and ``df`` on the whole mesh.
+If ``df`` is much more expensive than ``f``, the Jacobians ``H`` of the first
+iteration on a mesh can be reused: later iterations only update the shifts
+``h(x) - H x``. The fixed point is unchanged (``h(x) = 0`` at every node), but
+the iteration converges linearly instead of quadratically. Once it contracts
+too slowly, the Jacobians are refreshed.
+"""
+
+import collections
+
+import numpy as np
+
+JacobianInfo = collections.namedtuple(
+    "JacobianInfo",
+    ["jacobian_evaluations", "residual_evaluations", "refreshes", "rejections"],
+)
+
+
+class FrozenJacobians:
+    """Reuse the Jacobians of the ODE residual while the IEKS contracts quickly.
+
+    The Jacobians are evaluated in the first iteration on every mesh. Later
+    iterations reuse them as long as the steps of the linearisation points
+    shrink, i.e. as long as
+
+        ||x_{k+1} - x_k|| <= max_contraction * ||x_k - x_{k-1}||.
+
+    If a step with frozen Jacobians violates this, the step is rejected: the
+    model is linearised at the previous point ``x_k`` with fresh Jacobians
+    (which amounts to a Newton step from there). If a step with fresh
+    Jacobians violates this, the Jacobians are refreshed at the new point.
+    If the measurement model has an ``input_projection`` (the derivatives
+    that enter the ODE), only the projected points are compared.
+    The counters are per node.
+
+    Examples
+    --------
+    >>> from bvps import problem_examples, ode_measmods
+    >>> from probnum import statespace
+    >>> bvp = problem_examples.problem_20_second_order(xi=0.1)
+    >>> ibm = statespace.IBM(ordint=2, spatialdim=1)
+    >>> measmod = ode_measmods.from_ode(bvp, ibm)
+    >>> frozen = FrozenJacobians()
+    >>> times = np.linspace(0.0, 1.0, 4)
+    >>> for step in [1.0, 0.1, 0.01]:
+    ...     _ = frozen.linearize_on_mesh(measmod, times, step * np.ones((4, 3)))
+    >>> frozen.jacobian_info()
+    JacobianInfo(jacobian_evaluations=4, residual_evaluations=12, refreshes=0, rejections=0)
+    """
+
+    def __init__(self, max_contraction=0.25):
+        self.max_contraction = max_contraction
+        self.jacobian_evaluations = 0
+        self.residual_evaluations = 0
+        self.refreshes = 0
+        self.rejections = 0
+        self._times = None
+        self._meas_mats = None
+        self._means = None
+        self._inputs = None
+        self._step_norm = None
+        self._frozen = False
+
+    def linearize_on_mesh(self, measmod, times, means):
+        """Linearise ``measmod`` (a ``VectorizedEKFComponent``) at ``means`` (N, D).
+
+        Returns one linear Gaussian model per location, like
+        ``measmod.linearize_means_on_mesh(times, means)``, but with the
+        Jacobians of a previous call if possible.
+        """
+        times = np.asarray(times)
+        inputs = means
+        if measmod.input_projection is not None:
+            inputs = means @ measmod.input_projection.T
+
+        if self._times is None or not np.array_equal(times, self._times):
+            self._times = times.copy()
+            self._step_norm = None
+            self._refresh(measmod, means)
+        else:
+            step_norm = np.linalg.norm(inputs - self._inputs)
+            contracts = (
+                self._step_norm is None
+                or step_norm <= self.max_contraction * self._step_norm
+            )
+            if contracts:
+                self._frozen = True
+                self._step_norm = step_norm
+            elif self._frozen:
+                self.rejections += 1
+                self._refresh(measmod, self._means)
+                means, inputs = self._means, self._inputs
+            else:
+                self.refreshes += 1
+                self._refresh(measmod, means)
+                self._step_norm = step_norm
+
+        self._means, self._inputs = means.copy(), inputs.copy()
+        self.residual_evaluations += len(times)
+        return measmod.linearize_means_on_mesh(times, means, meas_mats=self._meas_mats)
+
+    def _refresh(self, measmod, means):
+        self._meas_mats = measmod.mesh_jacob_state_trans_fun(self._times, means)
+        self.jacobian_evaluations += len(self._times)
+        self._frozen = False
+
+    def jacobian_info(self):
+        return JacobianInfo(
+            self.jacobian_evaluations,
+            self.residual_evaluations,
+            self.refreshes,
+            self.rejections,
+        )
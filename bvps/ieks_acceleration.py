@@ -0,0 +1,84 @@
+"""Acceleration of the IEKS fixed-point iteration.
+
+One IEKS iteration maps the linearisation points ``x`` to the smoothed means
+``g(x)``; the IEKS iterates ``x_{k+1} = g(x_k)``. On stiff problems, this
+fixed-point iteration converges slowly. Anderson acceleration combines the
+last few iterates such that the linearised fixed-point residual
+``f = g(x) - x`` is minimised in the least-squares sense.
+"""
+
+import numpy as np
+
+
+class AndersonAcceleration:
+    """Anderson acceleration (type II) with restarts.
+
+    Parameters
+    ----------
+    memory
+        Number of previous iterates that are combined.
+    regularisation
+        Relative Tikhonov regularisation of the least-squares problem.
+    safeguard
+        If the residual norm grows by more than this factor from one
+        iteration to the next, the history is discarded and the plain
+        fixed-point step is taken.
+
+    Examples
+    --------
+    >>> g = lambda x: np.cos(x)
+    >>> anderson = AndersonAcceleration(memory=2)
+    >>> x = np.ones(1)
+    >>> for _ in range(6):
+    ...     x = anderson(x, g(x))
+    >>> np.round(x, 8)
+    array([0.73908513])
+    """
+
+    def __init__(self, memory=3, regularisation=1e-10, safeguard=1.0):
+        if memory < 1:
+            raise ValueError("The memory must be at least one.")
+        self.memory = memory
+        self.regularisation = regularisation
+        self.safeguard = safeguard
+        self.num_restarts = 0
+        self.reset()
+
+    def reset(self):
+        """Discard the history, e.g. after the mesh has changed."""
+        self._residuals = []
+        self._images = []
+
+    def __call__(self, x, g):
+        """Next iterate from the current iterate ``x`` and its image ``g = g(x)``."""
+        shape = g.shape
+        x, g = np.ravel(x), np.ravel(g)
+        residual = g - x
+
+        if self._residuals and np.linalg.norm(residual) > self.safeguard * (
+            np.linalg.norm(self._residuals[-1])
+        ):
+            self.reset()
+            self.num_restarts += 1
+
+        self._residuals.append(residual)
+        self._images.append(g)
+        if len(self._residuals) > self.memory + 1:
+            del self._residuals[0]
+            del self._images[0]
+        if len(self._residuals) == 1:
+            return g.reshape(shape)
+
+        delta_residuals = np.diff(np.stack(self._residuals, axis=1), axis=1)
+        delta_images = np.diff(np.stack(self._images, axis=1), axis=1)
+        gram = delta_residuals.T @ delta_residuals
+        gram += self.regularisation * np.trace(gram) * np.eye(len(gram))
+        try:
+            gamma = np.linalg.solve(gram, delta_residuals.T @ residual)
+        except np.linalg.LinAlgError:
+            gamma = np.full(len(gram), np.nan)
+        if not np.all(np.isfinite(gamma)):
+            self.reset()
+            self.num_restarts += 1
+            return g.reshape(shape)
+        return (g - delta_images @ gamma).reshape(shape)
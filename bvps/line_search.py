@@ -0,0 +1,92 @@
+"""Damping of the IEKS iteration with a backtracking line search.
+
+One IEKS iteration maps the linearisation points ``x`` to the smoothed means
+``g(x)``. Far from the solution, the full Gauss-Newton step ``g(x) - x`` may
+overshoot, and the iteration oscillates or diverges. A line search only
+accepts a linearisation point if it sufficiently decreases a merit function;
+otherwise it steps back towards the previously accepted point.
+
+The merit of a linearisation point is the squared norm of the nonlinear
+residual of the BVP at this point: the ODE residual at every node and the
+residuals of the boundary conditions. The measurements are noise-free, so the
+smoothed means satisfy the linearised residual exactly and ``g(x) - x`` is a
+Newton step for this residual. Along a Newton step, the merit decreases at the
+rate ``-2 * merit``, which gives the Armijo condition
+
+    merit(x + t * (g(x) - x)) <= (1 - 2 * sufficient_decrease * t) * merit(x).
+
+The merit is evaluated before the smoother runs, from the same ``f`` that the
+linearisation evaluates, so a rejected point costs no filtering pass.
+"""
+
+import numpy as np
+
+
+class BacktrackingLineSearch:
+    """Backtracking line search along the IEKS step.
+
+    Parameters
+    ----------
+    shrink
+        Factor by which the step size is reduced after a rejected point.
+    min_step_size
+        Smallest step size. A point with this step size is accepted
+        regardless of its merit, which avoids stalling at round-off level.
+    sufficient_decrease
+        Constant of the Armijo condition, in (0, 1). Small values accept
+        every step that decreases the merit noticeably.
+
+    Examples
+    --------
+    >>> line_search = BacktrackingLineSearch(shrink=0.5)
+    >>> line_search(np.zeros(1), merit=4.0)
+    (array([0.]), True)
+    >>> line_search.set_step(np.ones(1))
+    >>> line_search(np.ones(1), merit=5.0)
+    (array([0.5]), False)
+    >>> line_search(np.array([0.5]), merit=1.0)
+    (array([0.5]), True)
+    """
+
+    def __init__(self, shrink=0.5, min_step_size=2.0 ** -4, sufficient_decrease=1e-4):
+        if not 0.0 < shrink < 1.0:
+            raise ValueError("The shrinking factor must lie in (0, 1).")
+        if not 0.0 < sufficient_decrease < 1.0:
+            raise ValueError("The sufficient decrease constant must lie in (0, 1).")
+        self.shrink = shrink
+        self.min_step_size = min_step_size
+        self.sufficient_decrease = sufficient_decrease
+        self.num_rejections = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the accepted point, e.g. after the mesh has changed."""
+        self.step_size = 1.0
+        self._accepted_point = None
+        self._accepted_merit = None
+        self._direction = None
+
+    def __call__(self, x, merit):
+        """Whether to accept the linearisation point ``x``, and the point to use.
+
+        If ``x`` is rejected, the returned point lies on a shorter step from the
+        last accepted point.
+        """
+        if self._direction is not None:
+            decrease = 1.0 - 2.0 * self.sufficient_decrease * self.step_size
+            if not merit <= decrease * self._accepted_merit:
+                if self.step_size * self.shrink >= self.min_step_size:
+                    self.step_size *= self.shrink
+                    self.num_rejections += 1
+                    next_point = self._accepted_point + self.step_size * self._direction
+                    return next_point, False
+
+        self.step_size = 1.0
+        self._accepted_point = np.copy(x)
+        self._accepted_merit = merit
+        self._direction = None
+        return x, True
+
+    def set_step(self, g):
+        """Set the smoothed means ``g`` that the accepted point leads to."""
+        self._direction = g - self._accepted_point
@@ -0,0 +1,103 @@
+"""Selective relinearisation of the ODE measurement model.
+
+Every IEKS iteration linearises the ODE residual at every node, i.e. it
+evaluates ``f`` and ``df`` on the whole mesh. Close to convergence (and at
+nodes that were kept during mesh refinement), most linearisation points
+barely move. The linearised models are therefore stored per node and only
+recomputed where the linearisation point moved by more than a
+tolerance-scaled threshold.
+"""
+
+import collections
+
+import numpy as np
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "calls", "currsize"])
+
+
+class LinearisationCache:
+    """Linearised ODE models per node, reused while the node does not move.
+
+    The model at a node is reused if
+
+        sqrt(mean(((x_new - x_old) / (atol + rtol * |x_new|)) ** 2)) <= threshold,
+
+    where ``x_old`` is the point the stored model was linearised at. If the
+    measurement model has an ``input_projection`` (the derivatives that enter
+    the ODE), only the projected points are compared.
+    ``hits`` counts the saved evaluations (of ``f`` and ``df`` at a node),
+    ``misses`` the performed ones. Nodes that are not part of the mesh
+    anymore are dropped.
+
+    Examples
+    --------
+    >>> from bvps import problem_examples, ode_measmods
+    >>> from probnum import statespace
+    >>> bvp = problem_examples.problem_20_second_order(xi=0.1)
+    >>> ibm = statespace.IBM(ordint=2, spatialdim=1)
+    >>> measmod = ode_measmods.from_ode(bvp, ibm)
+    >>> cache = LinearisationCache(atol=1e-3, rtol=1e-3)
+    >>> times = np.linspace(0.0, 1.0, 4)
+    >>> means = np.ones((4, 3))
+    >>> _ = cache.linearize_on_mesh(measmod, times, means)
+    >>> means[1] += 1e-8
+    >>> means[2] += 1.0
+    >>> _ = cache.linearize_on_mesh(measmod, times, means)
+    >>> cache.cache_info()
+    CacheInfo(hits=3, misses=5, calls=2, currsize=4)
+    """
+
+    def __init__(self, atol, rtol, threshold=0.1):
+        self.atol = atol
+        self.rtol = rtol
+        self.threshold = threshold
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def linearize_on_mesh(self, measmod, times, means):
+        """Linearise ``measmod`` (a ``VectorizedEKFComponent``) at ``means`` (N, D).
+
+        Returns one linear Gaussian model per location, like
+        ``measmod.linearize_means_on_mesh(times, means)``.
+        """
+        times = np.asarray(times)
+        self.calls += 1
+        self._entries = {
+            t: self._entries[t] for t in times.tolist() if t in self._entries
+        }
+
+        inputs = means
+        if measmod.input_projection is not None:
+            inputs = means @ measmod.input_projection.T
+
+        stored = [self._entries.get(t) for t in times.tolist()]
+        reuse = np.array([entry is not None for entry in stored], dtype=bool)
+        if np.any(reuse):
+            old_inputs = np.stack([entry[0] for entry in stored if entry is not None])
+            reuse[reuse] = self._has_not_moved(old_inputs, inputs[reuse])
+        recompute = np.flatnonzero(~reuse)
+        self.hits += len(times) - len(recompute)
+        self.misses += len(recompute)
+
+        linearised = [entry[1] if use else None for entry, use in zip(stored, reuse)]
+        if len(recompute) > 0:
+            new_models = measmod.linearize_means_on_mesh(
+                times[recompute], means[recompute]
+            )
+            for idx, model in zip(recompute, new_models):
+                linearised[idx] = model
+                self._entries[float(times[idx])] = (inputs[idx].copy(), model)
+        return linearised
+
+    def _has_not_moved(self, old_inputs, new_inputs):
+        normalisation = self.atol + self.rtol * np.abs(new_inputs)
+        quotient = (new_inputs - old_inputs) / normalisation
+        return np.sqrt(np.mean(quotient ** 2, axis=-1)) <= self.threshold
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.calls, len(self))
@@ -1,6 +1,5 @@
 """Updated ODE measurement mdoels."""
 
-
 import numpy as np
 import scipy.linalg
 from probnum import filtsmooth, statespace
@@ -9,6 +8,112 @@ from probnum._randomvariablelist import _RandomVariableList
 from .problems import SecondOrderBoundaryValueProblem, FourthOrderBoundaryValueProblem
 
 
+class VectorizedEKFComponent(filtsmooth.DiscreteEKFComponent):
+    """EKF component whose dynamics can be evaluated on a whole mesh at once.
+
+    ``mesh_state_trans_fun(t[N], x[N, D])`` returns (N, d) and
+    ``mesh_jacob_state_trans_fun(t[N], x[N, D])`` returns (N, d, D).
+    If the linearisation depends on the state ``x`` only through
+    ``input_projection @ x`` (e.g. the derivatives that enter the ODE),
+    the projection can be passed.
+    """
+
+    def __init__(
+        self,
+        non_linear_model,
+        mesh_state_trans_fun,
+        mesh_jacob_state_trans_fun,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+        input_projection=None,
+    ):
+        super().__init__(
+            non_linear_model,
+            forward_implementation=forward_implementation,
+            backward_implementation=backward_implementation,
+        )
+        self.mesh_state_trans_fun = mesh_state_trans_fun
+        self.mesh_jacob_state_trans_fun = mesh_jacob_state_trans_fun
+        self.input_projection = input_projection
+
+    def linearize_on_mesh(self, times, states):
+        """Linearise at every (time, state) pair with a single call to the dynamics.
+
+        Returns a list of linear Gaussian measurement models,
+        one per location, equivalent to ``[self.linearize(s) for s in states]``.
+        """
+        means = np.stack([rv.mean for rv in states])
+        return self.linearize_means_on_mesh(times, means)
+
+    def linearize_means_on_mesh(self, times, means, meas_mats=None):
+        """Same as :meth:`linearize_on_mesh`, but for an (N, D) array of means.
+
+        If the (N, d, D) ``meas_mats`` are passed, they replace the Jacobians,
+        which are then not evaluated (simplified Newton).
+        """
+        times = np.asarray(times)
+        if meas_mats is None:
+            meas_mats = self.mesh_jacob_state_trans_fun(times, means)
+        shifts = self.mesh_state_trans_fun(times, means) - np.einsum(
+            "nij,nj->ni", meas_mats, means
+        )
+
+        linearised = []
+        for t, meas_mat, shift in zip(times, meas_mats, shifts):
+            noise_cholesky = self.non_linear_model.proc_noise_cov_cholesky_fun(t)
+            linearised.append(
+                statespace.DiscreteLTIGaussian(
+                    meas_mat,
+                    shift,
+                    noise_cholesky @ noise_cholesky.T,
+                    proc_noise_cov_cholesky=noise_cholesky,
+                    forward_implementation=self.forward_implementation,
+                    backward_implementation=self.backward_implementation,
+                )
+            )
+        return linearised
+
+    def forward_moments_on_mesh(self, times, means, cov_choleskies=None):
+        """Residual means (and variances) at every location in a single pass.
+
+        Equivalent to the means (and variances) of
+        ``[self.forward_rv(rv, t)[0] for rv, t in zip(states, times)]``.
+        The variances are only computed if ``cov_choleskies`` are passed.
+        """
+        times = np.asarray(times)
+        residual_means = self.mesh_state_trans_fun(times, means)
+        if cov_choleskies is None:
+            return residual_means, None
+
+        meas_mats = self.mesh_jacob_state_trans_fun(times, means)
+        factors = meas_mats @ cov_choleskies
+        noise_choleskies = np.stack(
+            [self.non_linear_model.proc_noise_cov_cholesky_fun(t) for t in times]
+        )
+        residual_vars = np.einsum("nij,nij->ni", factors, factors) + np.einsum(
+            "nij,nij->ni", noise_choleskies, noise_choleskies
+        )
+        return residual_means, residual_vars
+
+    def is_linear(self, times, num_samples=3, seed=1):
+        """Check whether the residual is affine in the state.
+
+        The Jacobian is evaluated at ``times`` for ``num_samples`` random
+        states; the residual is considered affine if all evaluations coincide.
+        """
+        times = np.asarray(times)
+        rng = np.random.default_rng(seed)
+        shape = (len(times), self.non_linear_model.input_dim)
+        jacobians = [
+            self.mesh_jacob_state_trans_fun(times, rng.standard_normal(shape))
+            for _ in range(num_samples)
+        ]
+        return all(
+            np.allclose(jacobian, jacobians[0], rtol=1e-10, atol=1e-12)
+            for jacobian in jacobians[1:]
+        )
+
+
 def from_ode(ode, prior, damping_value=0.0):
 
     if isinstance(ode, FourthOrderBoundaryValueProblem):
@@ -19,70 +124,43 @@ def from_ode(ode, prior, damping_value=0.0):
     spatialdim = prior.spatialdim
     h0 = prior.proj2coord(coord=0)
     h1 = prior.proj2coord(coord=1)
+    ode = ode.to_vectorized()
 
-    def dyna(t, x):
-        return h1 @ x - ode.f(t, h0 @ x)
-
-    def diff(t):
-        SQ = diff_cholesky(t)
-        return SQ @ SQ.T
-
-    def diff_cholesky(t):
-        return np.sqrt(damping_value) * np.eye(spatialdim)
+    def mesh_dyna(t, x):
+        return x @ h1.T - ode.f(t, x @ h0.T)
 
-    def jacobian(t, x):
+    def mesh_jacobian(t, x):
+        return h1 - ode.df(t, x @ h0.T) @ h0
 
-        return h1 - ode.df(t, h0 @ x) @ h0
-
-    discrete_model = statespace.DiscreteGaussian(
-        input_dim=prior.dimension,
-        output_dim=spatialdim,
-        state_trans_fun=dyna,
-        proc_noise_cov_mat_fun=diff,
-        jacob_state_trans_fun=jacobian,
-        proc_noise_cov_cholesky_fun=diff_cholesky,
-    )
-    return filtsmooth.gaussian.approx.DiscreteEKFComponent(
-        discrete_model,
-        forward_implementation="sqrt",
-        backward_implementation="sqrt",
+    return _vectorized_ekf_component(
+        mesh_dyna,
+        mesh_jacobian,
+        prior,
+        damping_value=damping_value,
+        input_projection=h0,
     )
 
 
 def from_second_order_ode(ode, prior, damping_value=0.0):
 
-    spatialdim = prior.spatialdim
     h0 = prior.proj2coord(coord=0)
     h1 = prior.proj2coord(coord=1)
     h2 = prior.proj2coord(coord=2)
+    ode = ode.to_vectorized()
 
-    def dyna(t, x):
-        return h2 @ x - ode.f(t, h0 @ x, h1 @ x)
+    def mesh_dyna(t, x):
+        return x @ h2.T - ode.f(t, x @ h0.T, x @ h1.T)
 
-    def diff(t):
-        SQ = diff_cholesky(t)
-        return SQ @ SQ.T
+    def mesh_jacobian(t, x):
+        y, dy = x @ h0.T, x @ h1.T
+        return h2 - ode.df_dy(t, y, dy) @ h0 - ode.df_ddy(t, y, dy) @ h1
 
-    def diff_cholesky(t):
-        return np.sqrt(damping_value) * np.eye(spatialdim)
-
-    def jacobian(t, x):
-        return (
-            h2 - ode.df_dy(t, h0 @ x, h1 @ x) @ h0 - ode.df_ddy(t, h0 @ x, h1 @ x) @ h1
-        )
-
-    discrete_model = statespace.DiscreteGaussian(
-        input_dim=prior.dimension,
-        output_dim=spatialdim,
-        state_trans_fun=dyna,
-        proc_noise_cov_mat_fun=diff,
-        jacob_state_trans_fun=jacobian,
-        proc_noise_cov_cholesky_fun=diff_cholesky,
-    )
-    return filtsmooth.DiscreteEKFComponent(
-        discrete_model,
-        forward_implementation="sqrt",
-        backward_implementation="sqrt",
+    return _vectorized_ekf_component(
+        mesh_dyna,
+        mesh_jacobian,
+        prior,
+        damping_value=damping_value,
+        input_projection=np.vstack((h0, h1)),
     )
 
 
@@ -125,15 +203,45 @@ def from_boundary_conditions(bvp, prior, damping_value=0.0):
 
 def from_fourth_order_ode(ode, prior, damping_value=0.0):
 
-    spatialdim = prior.spatialdim
     h0 = prior.proj2coord(coord=0)
     h1 = prior.proj2coord(coord=1)
     h2 = prior.proj2coord(coord=2)
     h3 = prior.proj2coord(coord=3)
     h4 = prior.proj2coord(coord=4)
+    ode = ode.to_vectorized()
+
+    def mesh_dyna(t, x):
+        return x @ h4.T - ode.f(t, x @ h0.T, x @ h1.T, x @ h2.T, x @ h3.T)
+
+    def mesh_jacobian(t, x):
+        args = (x @ h0.T, x @ h1.T, x @ h2.T, x @ h3.T)
+        df_dy = ode.df_dy(t, *args)
+        df_ddy = ode.df_ddy(t, *args)
+        df_dddy = ode.df_dddy(t, *args)
+        df_ddddy = ode.df_ddddy(t, *args)
+        return h4 - df_dy @ h0 - df_ddy @ h1 - df_dddy @ h2 - df_ddddy @ h3
+
+    return _vectorized_ekf_component(
+        mesh_dyna,
+        mesh_jacobian,
+        prior,
+        damping_value=damping_value,
+        input_projection=np.vstack((h0, h1, h2, h3)),
+    )
+
+
+def _vectorized_ekf_component(
+    mesh_dyna, mesh_jacobian, prior, damping_value=0.0, input_projection=None
+):
+    """Wrap mesh-wise ODE residuals into an EKF component.
+
+    The pointwise functions required by probnum evaluate the mesh functions
+    on a mesh of size one.
+    """
+    spatialdim = prior.spatialdim
 
     def dyna(t, x):
-        return h4 @ x - ode.f(t, h0 @ x, h1 @ x, h2 @ x, h3 @ x)
+        return mesh_dyna(np.atleast_1d(t), x[None, :])[0]
 
     def diff(t):
         SQ = diff_cholesky(t)
@@ -143,12 +251,7 @@ def from_fourth_order_ode(ode, prior, damping_value=0.0):
         return np.sqrt(damping_value) * np.eye(spatialdim)
 
     def jacobian(t, x):
-
-        df_dy = ode.df_dy(t, h0 @ x, h1 @ x, h2 @ x, h3 @ x)
-        df_ddy = ode.df_ddy(t, h0 @ x, h1 @ x, h2 @ x, h3 @ x)
-        df_dddy = ode.df_dddy(t, h0 @ x, h1 @ x, h2 @ x, h3 @ x)
-        df_ddddy = ode.df_ddddy(t, h0 @ x, h1 @ x, h2 @ x, h3 @ x)
-        return h4 - df_dy @ h0 - df_ddy @ h1 - df_dddy @ h2 - df_ddddy @ h3
+        return mesh_jacobian(np.atleast_1d(t), x[None, :])[0]
 
     discrete_model = statespace.DiscreteGaussian(
         input_dim=prior.dimension,
@@ -158,10 +261,13 @@ def from_fourth_order_ode(ode, prior, damping_value=0.0):
         jacob_state_trans_fun=jacobian,
         proc_noise_cov_cholesky_fun=diff_cholesky,
     )
-    return filtsmooth.DiscreteEKFComponent(
+    return VectorizedEKFComponent(
         discrete_model,
+        mesh_state_trans_fun=mesh_dyna,
+        mesh_jacob_state_trans_fun=mesh_jacobian,
         forward_implementation="sqrt",
         backward_implementation="sqrt",
+        input_projection=input_projection,
     )
 
 
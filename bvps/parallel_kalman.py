@@ -0,0 +1,545 @@
+"""Parallel-in-time Kalman filtering and smoothing via associative scans.
+
+Filtering and smoothing of a linear(ised) Gauss-Markov model can be written
+as a prefix-sum with an associative operator, see
+
+    S. Särkkä and Á. F. García-Fernández.
+    Temporal parallelization of Bayesian smoothers.
+    IEEE Transactions on Automatic Control, 2021.
+
+The scan is split into chunks which are processed by a ``concurrent.futures``
+executor (thread or process pool). All computations are in square-root form,
+see
+
+    F. Yaghoobi, A. Corenflos, S. Hassan, and S. Särkkä.
+    Parallel square-root statistical linear regression for inference in
+    nonlinear state space models. arXiv:2207.00426, 2022,
+
+and use a single, mesh-wide Nordsieck-like preconditioner.
+"""
+
+import numpy as np
+from probnum import statespace
+
+from .array_kalman import (
+    ArrayFilteringPosterior,
+    ArrayKalman,
+    ArraySmoothingPosterior,
+    _cho_solve,
+    discretise_transitions,
+    measurement_components,
+    predict,
+    tria,
+    update,
+)
+
+########################################################################
+########################################################################
+# Associative scan
+########################################################################
+########################################################################
+
+
+def associative_scan(combine, elements, executor=None, num_chunks=1):
+    """Inclusive prefix scan of ``elements`` with the associative operator ``combine``.
+
+    ``elements`` is a tuple of arrays that share the leading (time) axis;
+    ``combine(earlier, later)`` acts on such tuples. The scan is split into
+    ``num_chunks`` chunks that are scanned independently by ``executor``
+    (or in the current process if ``executor`` is None), and then joined.
+    """
+    num_elements = len(elements[0])
+    num_chunks = max(1, min(num_chunks, num_elements))
+    bounds = np.linspace(0, num_elements, num_chunks + 1).astype(int)
+    chunks = [_slice(elements, slice(a, b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    map_ = map if executor is None else executor.map
+    scanned = list(map_(_scan_chunk, [combine] * len(chunks), chunks))
+    if len(scanned) == 1:
+        return scanned[0]
+
+    # The carry into chunk i is the reduction of all previous chunks.
+    carries = [_slice(scanned[0], slice(-1, None))]
+    for chunk in scanned[1:-1]:
+        carries.append(combine(carries[-1], _slice(chunk, slice(-1, None))))
+    joined = list(map_(_apply_carry, [combine] * len(carries), carries, scanned[1:]))
+    return tuple(np.concatenate(arrays) for arrays in zip(scanned[0], *joined))
+
+
+def _scan_chunk(combine, elements):
+    """Vectorised, work-efficient (odd-even) inclusive scan of a single chunk."""
+    num_elements = len(elements[0])
+    if num_elements < 2:
+        return elements
+
+    pairs = combine(
+        _slice(elements, slice(0, -1, 2)), _slice(elements, slice(1, None, 2))
+    )
+    odd = _scan_chunk(combine, pairs)
+    if num_elements % 2 == 0:
+        even = combine(_slice(odd, slice(0, -1)), _slice(elements, slice(2, None, 2)))
+    else:
+        even = combine(odd, _slice(elements, slice(2, None, 2)))
+
+    result = tuple(np.empty_like(e) for e in elements)
+    for res, elem, o, e in zip(result, elements, odd, even):
+        res[0] = elem[0]
+        res[1::2] = o
+        res[2::2] = e
+    return result
+
+
+def _apply_carry(combine, carry, elements):
+    return combine(carry, elements)
+
+
+def _slice(elements, slc):
+    return tuple(e[slc] for e in elements)
+
+
+def combine_filtering(earlier, later):
+    """Associative operator of the parallel Kalman filter (square-root form).
+
+    Elements are tuples ``(A, b, U, y, Z)``. Conditioned on all observations
+    in the element, the state is ``A x + b`` plus noise with covariance ``U U^T``,
+    where ``x`` is the state before the element. The observations themselves
+    carry the information ``y = Z^T x + e``, ``e ~ N(0, I)`` about ``x``.
+    """
+    A_i, b_i, U_i, y_i, Z_i = earlier
+    A_j, b_j, U_j, y_j, Z_j = later
+    D = A_i.shape[-1]
+    batch_shape = np.broadcast_shapes(A_i.shape[:-2], A_j.shape[:-2])
+
+    # Condition N(b_i, U_i U_i^T) on the observation y_j = Z_j^T x + e (square-root update)
+    phi = tria(
+        _block(
+            [[_transpose(Z_j) @ U_i, np.eye(D)], [U_i, np.zeros((D, D))]],
+            batch_shape,
+        )
+    )
+    phi11, phi21, phi22 = phi[..., :D, :D], phi[..., D:, :D], phi[..., D:, D:]
+    gain = _transpose(np.linalg.solve(_transpose(phi11), _transpose(phi21)))
+    residual = y_j - _matvec(_transpose(Z_j), b_i)
+
+    A = A_j @ (A_i - gain @ _transpose(Z_j) @ A_i)
+    b = _matvec(A_j, b_i + _matvec(gain, residual)) + b_j
+    U = tria(np.concatenate(np.broadcast_arrays(A_j @ phi22, U_j), axis=-1))
+
+    # Propagate the observation y_j back to x, stack it with y_i, and compress.
+    whitened_residual = np.linalg.solve(phi11, residual[..., None])[..., 0]
+    whitened_obs_mat = np.linalg.solve(phi11, _transpose(Z_j) @ A_i)
+    y, Z = _compress_observations(
+        np.concatenate(np.broadcast_arrays(whitened_obs_mat, _transpose(Z_i)), axis=-2),
+        np.concatenate(np.broadcast_arrays(whitened_residual, y_i), axis=-1),
+    )
+    return A, b, U, y, Z
+
+
+def _compress_observations(obs_mat, obs):
+    """Reduce the observation ``obs = obs_mat @ x + e``, ``e ~ N(0, I)``, with
+    ``obs_mat`` of shape (..., M, D), to an equivalent one with a square,
+    upper-triangular ``Z^T``. Returns ``y`` and ``Z``."""
+    M, D = obs_mat.shape[-2:]
+    if M < D:
+        obs_mat = np.concatenate(
+            (obs_mat, np.zeros(obs_mat.shape[:-2] + (D - M, D))), axis=-2
+        )
+        obs = np.concatenate((obs, np.zeros(obs.shape[:-1] + (D - M,))), axis=-1)
+    Q, R = np.linalg.qr(obs_mat)
+    return _matvec(_transpose(Q), obs), _transpose(R)
+
+
+def combine_smoothing_reversed(later, earlier):
+    """Associative operator of the parallel RTS smoother (square-root form), for a
+    time-reversed scan. Elements are tuples ``(E, g, D)`` with ``L = D D^T``."""
+    E_i, g_i, D_i = earlier
+    E_j, g_j, D_j = later
+    E = E_i @ E_j
+    g = _matvec(E_i, g_j) + g_i
+    D = tria(np.concatenate(np.broadcast_arrays(E_i @ D_j, D_i), axis=-1))
+    return E, g, D
+
+
+def _block(blocks, batch_shape):
+    """Assemble a (stack of) block matrices, broadcasting each block to ``batch_shape``."""
+    return np.concatenate(
+        [
+            np.concatenate(
+                [np.broadcast_to(b, batch_shape + b.shape[-2:]) for b in row], axis=-1
+            )
+            for row in blocks
+        ],
+        axis=-2,
+    )
+
+
+def _matvec(mat, vec):
+    return (mat @ vec[..., None])[..., 0]
+
+
+def _transpose(mat):
+    return np.swapaxes(mat, -1, -2)
+
+
+########################################################################
+########################################################################
+# Filter and smoother
+########################################################################
+########################################################################
+
+
+class ParallelKalman(ArrayKalman):
+    """Kalman filtering and smoothing as parallel prefix sums.
+
+    Drop-in replacement for :class:`ArrayKalman` if all measurement models are
+    linear (e.g. the output of ``BVPSolver.linearise_measmod_list``). For
+    non-linear measurement models, the filter falls back to the sequential
+    array implementation.
+
+    Parameters
+    ----------
+    executor
+        ``concurrent.futures.Executor`` that processes the chunks of each scan.
+        If None, chunks are processed in the current thread.
+    num_chunks
+        Number of chunks each scan is split into. Use (at least) the number
+        of workers of ``executor``.
+    """
+
+    def __init__(
+        self,
+        dynamics_model,
+        measurement_model,
+        initrv,
+        executor=None,
+        num_chunks=1,
+    ):
+        super().__init__(dynamics_model, measurement_model, initrv)
+        self.executor = executor
+        self.num_chunks = num_chunks
+
+    def filter(
+        self,
+        dataset: np.ndarray,
+        times: np.ndarray,
+        measmod_list,
+    ):
+        """Apply parallel Gaussian filtering (no smoothing!) to a data set.
+
+        Parameters
+        ----------
+        dataset : array_like, shape (N, M)
+            Data set that is filtered.
+        times : array_like, shape (N,)
+            Temporal locations of the data points.
+        measmod_list : list
+            One linear measurement model (or a list of those) per location.
+
+        Returns
+        -------
+        ArrayFilteringPosterior
+            Posterior distribution of the filtered output
+        """
+        if not isinstance(measmod_list, list):
+            raise RuntimeError
+        dataset, times = np.asarray(dataset), np.asarray(times)
+        measmod_list = [mm if isinstance(mm, list) else [mm] for mm in measmod_list]
+        if not all(
+            isinstance(mm_, statespace.DiscreteLinearGaussian)
+            for mm in measmod_list
+            for mm_ in mm
+        ):
+            return super().filter(dataset, times, measmod_list)
+        if not np.all(np.diff(times) > 0.0):
+            raise ValueError("The parallel filter requires strictly increasing times.")
+
+        state_trans, proc_noise_cholesky, reference_precon = self._transitions(times)
+        measurements = _stack_measurements(
+            measmod_list, times, dataset, reference_precon
+        )
+        mean0 = self.initrv.mean / reference_precon
+        cov_cholesky0 = self.initrv.cov_cholesky / reference_precon[:, None]
+
+        means, cov_choleskies = self._scan_filtering_elements(
+            mean0, cov_cholesky0, state_trans, proc_noise_cholesky, measurements
+        )
+        self._record_sigmas(
+            means,
+            cov_choleskies,
+            mean0,
+            cov_cholesky0,
+            state_trans,
+            proc_noise_cholesky,
+            *measurements,
+        )
+
+        return ArrayFilteringPosterior(
+            locations=times,
+            means=reference_precon * means,
+            cov_choleskies=reference_precon[:, None] * cov_choleskies,
+            transition=self.dynamics_model,
+        )
+
+    def smooth(self, filter_posterior):
+        """Apply parallel Rauch-Tung-Striebel smoothing to an :class:`ArrayFilteringPosterior`."""
+        times = filter_posterior.locations
+        state_trans, proc_noise_cholesky, reference_precon = self._transitions(times)
+        means = filter_posterior.means / reference_precon
+        cov_choleskies = filter_posterior.cov_choleskies / reference_precon[:, None]
+
+        smoothed_means, smoothed_cov_choleskies, gains = self._scan_smoothing_elements(
+            means, cov_choleskies, state_trans, proc_noise_cholesky
+        )
+
+        # Report the gains in the step-wise preconditioned coordinates (as ArrayKalman).
+        if gains is not None:
+            _, _, precon = discretise_transitions(self.dynamics_model, np.diff(times))
+            ratio = precon / reference_precon
+            gains = gains * ratio[:, None, :] / ratio[:, :, None]
+
+        return ArraySmoothingPosterior(
+            locations=times,
+            means=reference_precon * smoothed_means,
+            cov_choleskies=reference_precon[:, None] * smoothed_cov_choleskies,
+            transition=self.dynamics_model,
+            filtering_posterior=filter_posterior,
+            gains=gains,
+        )
+
+    def _transitions(self, times):
+        return reference_transitions(self.dynamics_model, times)
+
+    def _scan_filtering_elements(
+        self, mean0, cov_cholesky0, state_trans, proc_noise_cholesky, measurements
+    ):
+        """Filtered means and Cholesky factors (in reference coordinates)."""
+        elements = _filtering_elements(
+            mean0, cov_cholesky0, state_trans, proc_noise_cholesky, *measurements
+        )
+        _, means, cov_choleskies, _, _ = associative_scan(
+            combine_filtering,
+            elements,
+            executor=self.executor,
+            num_chunks=self.num_chunks,
+        )
+        return means, cov_choleskies
+
+    def _scan_smoothing_elements(
+        self, means, cov_choleskies, state_trans, proc_noise_cholesky
+    ):
+        """Smoothed means and Cholesky factors, and the smoothing gains
+        (all in reference coordinates)."""
+        elements, gains = _smoothing_elements(
+            means, cov_choleskies, state_trans, proc_noise_cholesky
+        )
+        reversed_elements = tuple(e[::-1] for e in elements)
+        _, smoothed_means, smoothed_cov_choleskies = associative_scan(
+            combine_smoothing_reversed,
+            reversed_elements,
+            executor=self.executor,
+            num_chunks=self.num_chunks,
+        )
+        return smoothed_means[::-1], smoothed_cov_choleskies[::-1], gains
+
+    def _record_sigmas(
+        self,
+        means,
+        cov_choleskies,
+        mean0,
+        cov_cholesky0,
+        state_trans,
+        proc_noise_cholesky,
+        meas_mats,
+        shifts,
+        meas_noise_choleskies,
+        data,
+        output_dims,
+    ):
+        """Recompute the per-model calibration quantities of the sequential filter.
+
+        All locations are processed at once: predict from the previous filtered
+        state, then process the measurement models of each location in order.
+        """
+        pred_means, pred_choleskies = predict(
+            means[:-1],
+            cov_choleskies[:-1],
+            state_trans,
+            proc_noise_cholesky,
+            np.ones_like(means[:-1]),
+        )
+        mean = np.concatenate((mean0[None, :], pred_means))
+        cov_cholesky = np.concatenate((cov_cholesky0[None, :, :], pred_choleskies))
+
+        sigmas = np.zeros(output_dims.shape)
+        for slot in range(output_dims.shape[1]):
+            mean, cov_cholesky, residual, residual_cholesky = update(
+                mean,
+                cov_cholesky,
+                meas_mats[:, slot],
+                shifts[:, slot],
+                meas_noise_choleskies[:, slot],
+                data[:, slot],
+            )
+            whitened = np.linalg.solve(residual_cholesky, residual[..., None])[..., 0]
+            sigmas[:, slot] = np.einsum("ni,ni->n", whitened, whitened)
+
+        self.sigmas = list(sigmas[output_dims > 0])
+        self.normalisation_for_sigmas = float(np.sum(output_dims))
+
+
+########################################################################
+########################################################################
+# Parallel filter and smoother elements
+########################################################################
+########################################################################
+
+
+def reference_transitions(dynamics_model, times):
+    """Transition matrices and process noise Cholesky factors in the coordinates
+    of a single reference preconditioner (the one of the median step)."""
+    dts = np.diff(times)
+    state_trans, proc_noise_cholesky, precon = discretise_transitions(
+        dynamics_model, dts
+    )
+    reference_dt = np.median(dts) if len(dts) > 0 else 1.0
+    _, _, reference_precon = discretise_transitions(dynamics_model, [reference_dt])
+    reference_precon = reference_precon[0]
+
+    ratio = precon / reference_precon
+    state_trans = ratio[:, :, None] * state_trans / ratio[:, None, :]
+    proc_noise_cholesky = ratio[:, :, None] * proc_noise_cholesky
+    return state_trans, proc_noise_cholesky, reference_precon
+
+
+def _stack_measurements(measmod_list, times, dataset, reference_precon):
+    """Stack the (linear) measurement models into arrays.
+
+    Locations with fewer models than the maximum are padded with
+    uninformative models. Returns arrays with shapes
+    (N, K, m, D), (N, K, m), (N, K, m, m), (N, K, m), and the output dimension
+    of each model (N, K; zero for padding), where K is the maximum number of
+    models per location and m the maximum output dimension.
+    """
+    N, D = len(times), len(reference_precon)
+    num_slots = max(len(mm) for mm in measmod_list)
+    output_dim = max(mm_.output_dim for mm in measmod_list for mm_ in mm)
+
+    meas_mats = np.zeros((N, num_slots, output_dim, D))
+    shifts = np.zeros((N, num_slots, output_dim))
+    meas_noise_choleskies = np.broadcast_to(
+        np.eye(output_dim), (N, num_slots, output_dim, output_dim)
+    ).copy()
+    data = np.zeros((N, num_slots, output_dim))
+    output_dims = np.zeros((N, num_slots), dtype=int)
+
+    for idx, (t, y, mm) in enumerate(zip(times, dataset, measmod_list)):
+        for slot, mm_ in enumerate(mm):
+            meas_mat, shift, meas_noise_cholesky = measurement_components(mm_, t, None)
+            m = len(shift)
+            meas_mats[idx, slot, :m] = meas_mat * reference_precon
+            shifts[idx, slot, :m] = shift
+            meas_noise_choleskies[idx, slot, :m, :m] = meas_noise_cholesky
+            if len(y) == m:
+                data[idx, slot, :m] = y
+            output_dims[idx, slot] = m
+    return meas_mats, shifts, meas_noise_choleskies, data, output_dims
+
+
+def _merge_measurements(meas_mats, shifts, meas_noise_choleskies, data):
+    """Merge the stacked measurement models of each location into a single one.
+
+    Returns the measurement matrices (N, M, D), the innovations ``data - shift``
+    (N, M), and the block-diagonal noise Cholesky factors (N, M, M).
+    """
+    N, num_slots, m, D = meas_mats.shape
+    M = num_slots * m
+    noise_cholesky = np.zeros((N, M, M))
+    for slot in range(num_slots):
+        noise_cholesky[
+            :, slot * m : (slot + 1) * m, slot * m : (slot + 1) * m
+        ] = meas_noise_choleskies[:, slot]
+    return (
+        meas_mats.reshape((N, M, D)),
+        (data - shifts).reshape((N, M)),
+        noise_cholesky,
+    )
+
+
+def _filtering_elements(
+    mean0,
+    cov_cholesky0,
+    state_trans,
+    proc_noise_cholesky,
+    meas_mats,
+    shifts,
+    meas_noise_choleskies,
+    data,
+    output_dims,
+):
+    """Elements (A, b, U, y, Z) of the parallel Kalman filter in square-root form.
+
+    All measurement models of a location are merged into a single one.
+    """
+    D = meas_mats.shape[-1]
+    H, innovations, noise_cholesky = _merge_measurements(
+        meas_mats, shifts, meas_noise_choleskies, data
+    )
+    N, M = innovations.shape
+
+    # What the measurement sees: the initial state at the first location,
+    # and the process noise everywhere else.
+    prior_cholesky = np.concatenate((cov_cholesky0[None, :, :], proc_noise_cholesky))
+    psi = tria(
+        _block(
+            [[H @ prior_cholesky, noise_cholesky], [prior_cholesky, np.zeros((D, M))]],
+            (N,),
+        )
+    )
+    psi11, psi21, U = psi[:, :M, :M], psi[:, M:, :M], psi[:, M:, M:]
+    gain = _transpose(np.linalg.solve(_transpose(psi11), _transpose(psi21)))
+
+    A = np.zeros((N, D, D))
+    b = _matvec(gain, innovations)
+    y = np.zeros((N, D))
+    Z = np.zeros((N, D, D))
+
+    HA = H[1:] @ state_trans
+    A[1:] = state_trans - gain[1:] @ HA
+    b[0] = mean0 + gain[0] @ (innovations[0] - H[0] @ mean0)
+    y[1:], Z[1:] = _compress_observations(
+        np.linalg.solve(psi11[1:], HA),
+        np.linalg.solve(psi11[1:], innovations[1:, :, None])[..., 0],
+    )
+    return A, b, U, y, Z
+
+
+def _smoothing_elements(means, cov_choleskies, state_trans, proc_noise_cholesky):
+    """Elements (E, g, D) of the parallel RTS smoother in square-root form.
+
+    Also returns the smoothing gains E_k, k < N - 1.
+    """
+    AU = state_trans @ cov_choleskies[:-1]
+    pred_cholesky = tria(np.concatenate((AU, proc_noise_cholesky), axis=-1))
+    crosscov = cov_choleskies[:-1] @ _transpose(AU)
+    gains = _transpose(_cho_solve(pred_cholesky, _transpose(crosscov)))
+
+    identity = np.eye(means.shape[-1])
+    E = np.concatenate((gains, np.zeros_like(gains[:1])))
+    g = np.concatenate(
+        (means[:-1] - _matvec(gains @ state_trans, means[:-1]), means[-1:])
+    )
+    D = np.concatenate(
+        (
+            tria(
+                np.concatenate(
+                    (
+                        (identity - gains @ state_trans) @ cov_choleskies[:-1],
+                        gains @ proc_noise_cholesky,
+                    ),
+                    axis=-1,
+                )
+            ),
+            cov_choleskies[-1:],
+        )
+    )
+    return (E, g, D), gains
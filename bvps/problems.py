@@ -1,12 +1,49 @@
 """BVP Problem data types."""
 
 import dataclasses
+import functools
 from typing import Callable, Optional, Union
 
 import numpy as np
 from probnum.type import FloatArgType
 
 
+def lift_rhs(fun):
+    """Lift a pointwise right-hand side to the vectorized contract.
+
+    The returned function maps ``(t[N], y[N, d], ...)`` to an (N, d) array
+    by evaluating ``fun`` node by node.
+    """
+
+    @functools.wraps(fun)
+    def vectorized_fun(t, *args):
+        return np.stack(
+            [np.atleast_1d(fun(t_, *args_)) for t_, *args_ in zip(t, *args)]
+        )
+
+    return vectorized_fun
+
+
+def lift_jacobian(fun):
+    """Lift a pointwise Jacobian to the vectorized contract.
+
+    The returned function maps ``(t[N], y[N, d], ...)`` to an (N, d, d) array
+    by evaluating ``fun`` node by node.
+    """
+
+    @functools.wraps(fun)
+    def vectorized_fun(t, *args):
+        return np.stack(
+            [np.atleast_2d(fun(t_, *args_)) for t_, *args_ in zip(t, *args)]
+        )
+
+    return vectorized_fun
+
+
+def _lift_if_not_none(fun, lift):
+    return None if fun is None else lift(fun)
+
+
 @dataclasses.dataclass
 class BoundaryValueProblem:
     """Boundary value problems."""
@@ -26,6 +63,23 @@ class BoundaryValueProblem:
     # For testing and benchmarking
     solution: Optional[Callable[[float], np.ndarray]] = None
 
+    # If True, f(t[N], y[N, d]) returns (N, d) and df(t[N], y[N, d]) returns (N, d, d).
+    vectorized: bool = False
+
+    # Whether f is linear in y (and its derivatives). If None, the solver checks.
+    linear: Optional[bool] = None
+
+    def to_vectorized(self):
+        """Return the same problem with f and df satisfying the vectorized contract."""
+        if self.vectorized:
+            return self
+        return dataclasses.replace(
+            self,
+            f=lift_rhs(self.f),
+            df=_lift_if_not_none(self.df, lift_jacobian),
+            vectorized=True,
+        )
+
     @property
     def scipy_bc(self):
         def bc(ya, yb):
@@ -58,11 +112,35 @@ class SecondOrderBoundaryValueProblem:
     # For testing and benchmarking
     solution: Optional[Callable[[float], np.ndarray]] = None
 
+    # If True, f(t[N], y[N, d], dy[N, d]) returns (N, d) and the Jacobians (N, d, d).
+    vectorized: bool = False
+
+    # Whether f is linear in y (and its derivatives). If None, the solver checks.
+    linear: Optional[bool] = None
+
+    def to_vectorized(self):
+        """Return the same problem with f and its Jacobians satisfying the vectorized contract."""
+        if self.vectorized:
+            return self
+        return dataclasses.replace(
+            self,
+            f=lift_rhs(self.f),
+            df_dy=_lift_if_not_none(self.df_dy, lift_jacobian),
+            df_ddy=_lift_if_not_none(self.df_ddy, lift_jacobian),
+            vectorized=True,
+        )
+
     def to_first_order(self):
 
-        f = self._rhs_as_firstorder
+        if self.vectorized:
+            f = self._rhs_as_firstorder_vectorized
+        else:
+            f = self._rhs_as_firstorder
         if self.df_dy is not None and self.df_ddy is not None:
-            df = self._jac_as_firstorder
+            if self.vectorized:
+                df = self._jac_as_firstorder_vectorized
+            else:
+                df = self._jac_as_firstorder
         else:
             df = None
         return BoundaryValueProblem(
@@ -76,24 +154,39 @@ class SecondOrderBoundaryValueProblem:
             df=df,
             dimension=self.dimension * 2,
             solution=self.solution,
+            vectorized=self.vectorized,
+            linear=self.linear,
         )
 
     def _rhs_as_firstorder(self, t, y):
-        x, dx = y
-        x = np.atleast_1d(x)
-        dx = np.atleast_1d(dx)
+        d = self.dimension
+        x, dx = y[:d], y[d:]
         dy = self.f(t=t, y=x, dy=dx)
-        return np.block([[dx], [dy]]).squeeze()
+        return np.concatenate((dx, np.atleast_1d(dy)))
 
     def _jac_as_firstorder(self, t, y):
-        x, dx = y
-        x = np.atleast_1d(x)
-        dx = np.atleast_1d(dx)
-        df_dy = self.df_dy(t, y=x, dy=dx)
-        df_ddy = self.df_ddy(t, y=x, dy=dx)
-        I = np.eye(self.dimension)
-        O = np.zeros_like(I)
-        return np.block([[O, I], [df_dy, df_ddy]])
+        d = self.dimension
+        x, dx = y[:d], y[d:]
+        jac = np.zeros((2 * d, 2 * d))
+        jac[:d, d:] = np.eye(d)
+        jac[d:, :d] = self.df_dy(t, y=x, dy=dx)
+        jac[d:, d:] = self.df_ddy(t, y=x, dy=dx)
+        return jac
+
+    def _rhs_as_firstorder_vectorized(self, t, y):
+        d = self.dimension
+        x, dx = y[:, :d], y[:, d:]
+        dy = self.f(t, x, dx)
+        return np.concatenate((dx, dy), axis=1)
+
+    def _jac_as_firstorder_vectorized(self, t, y):
+        d = self.dimension
+        x, dx = y[:, :d], y[:, d:]
+        jac = np.zeros((len(t), 2 * d, 2 * d))
+        jac[:, :d, d:] = np.eye(d)
+        jac[:, d:, :d] = self.df_dy(t, x, dx)
+        jac[:, d:, d:] = self.df_ddy(t, x, dx)
+        return jac
 
 
 @dataclasses.dataclass
@@ -139,11 +232,37 @@ class FourthOrderBoundaryValueProblem:
     # For testing and benchmarking
     solution: Optional[Callable[[float], np.ndarray]] = None
 
+    # If True, f(t[N], y[N, d], ..., dddy[N, d]) returns (N, d) and the Jacobians (N, d, d).
+    vectorized: bool = False
+
+    # Whether f is linear in y (and its derivatives). If None, the solver checks.
+    linear: Optional[bool] = None
+
+    def to_vectorized(self):
+        """Return the same problem with f and its Jacobians satisfying the vectorized contract."""
+        if self.vectorized:
+            return self
+        return dataclasses.replace(
+            self,
+            f=lift_rhs(self.f),
+            df_dy=_lift_if_not_none(self.df_dy, lift_jacobian),
+            df_ddy=_lift_if_not_none(self.df_ddy, lift_jacobian),
+            df_dddy=_lift_if_not_none(self.df_dddy, lift_jacobian),
+            df_ddddy=_lift_if_not_none(self.df_ddddy, lift_jacobian),
+            vectorized=True,
+        )
+
     def to_first_order(self):
 
-        f = self._rhs_as_firstorder
+        if self.vectorized:
+            f = self._rhs_as_firstorder_vectorized
+        else:
+            f = self._rhs_as_firstorder
         if self.df_dy is not None and self.df_ddy is not None:
-            df = self._jac_as_firstorder
+            if self.vectorized:
+                df = self._jac_as_firstorder_vectorized
+            else:
+                df = self._jac_as_firstorder
         else:
             df = None
 
@@ -174,36 +293,39 @@ class FourthOrderBoundaryValueProblem:
             df=df,
             dimension=self.dimension * 4,
             solution=self.solution,
+            vectorized=self.vectorized,
+            linear=self.linear,
         )
 
     def _rhs_as_firstorder(self, t, y):
-        x, dx, ddx, dddx = y
-        x = np.atleast_1d(x)
-        dx = np.atleast_1d(dx)
-        ddx = np.atleast_1d(ddx)
-        dddx = np.atleast_1d(dddx)
+        d = self.dimension
+        x, dx, ddx, dddx = y[:d], y[d : 2 * d], y[2 * d : 3 * d], y[3 * d :]
         dy = self.f(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
-        return np.block([[dx], [ddx], [dddx], [dy]]).squeeze()
+        return np.concatenate((dx, ddx, dddx, np.atleast_1d(dy)))
 
     def _jac_as_firstorder(self, t, y):
-        x, dx, ddx, dddx = y
-        x = np.atleast_1d(x)
-        dx = np.atleast_1d(dx)
-        ddx = np.atleast_1d(ddx)
-        dddx = np.atleast_1d(dddx)
-
-        df_dy = self.df_dy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
-        df_ddy = self.df_ddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
-        df_dddy = self.df_dddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
-        df_ddddy = self.df_ddddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
-
-        I = np.eye(self.dimension)
-        O = np.zeros_like(I)
-        return np.block(
-            [
-                [O, I, O, O],
-                [O, O, I, O],
-                [O, O, O, I],
-                [df_dy, df_ddy, df_dddy, df_ddddy],
-            ]
-        )
+        d = self.dimension
+        x, dx, ddx, dddx = y[:d], y[d : 2 * d], y[2 * d : 3 * d], y[3 * d :]
+        jac = np.zeros((4 * d, 4 * d))
+        jac[: 3 * d, d:] = np.eye(3 * d)
+        jac[3 * d :, :d] = self.df_dy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
+        jac[3 * d :, d : 2 * d] = self.df_ddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
+        jac[3 * d :, 2 * d : 3 * d] = self.df_dddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
+        jac[3 * d :, 3 * d :] = self.df_ddddy(t=t, y=x, dy=dx, ddy=ddx, dddy=dddx)
+        return jac
+
+    def _rhs_as_firstorder_vectorized(self, t, y):
+        x, dx, ddx, dddx = np.split(y, 4, axis=1)
+        dy = self.f(t, x, dx, ddx, dddx)
+        return np.concatenate((dx, ddx, dddx, dy), axis=1)
+
+    def _jac_as_firstorder_vectorized(self, t, y):
+        d = self.dimension
+        x, dx, ddx, dddx = np.split(y, 4, axis=1)
+        jac = np.zeros((len(t), 4 * d, 4 * d))
+        jac[:, : 3 * d, d:] = np.eye(3 * d)
+        jac[:, 3 * d :, :d] = self.df_dy(t, x, dx, ddx, dddx)
+        jac[:, 3 * d :, d : 2 * d] = self.df_ddy(t, x, dx, ddx, dddx)
+        jac[:, 3 * d :, 2 * d : 3 * d] = self.df_dddy(t, x, dx, ddx, dddx)
+        jac[:, 3 * d :, 3 * d :] = self.df_ddddy(t, x, dx, ddx, dddx)
+        return jac
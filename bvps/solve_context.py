@@ -0,0 +1,101 @@
+"""Per-call state of the BVP solver.
+
+A solve recalibrates the diffusion of the prior after every refinement, and
+collects statistics (IEKS iterations, removed nodes, the status). All of this
+is kept in a ``SolveContext`` that is created for every call of
+``BVPSolver.solution_generator``: the prior is rescaled by copying, never in
+place. One solver (and one prior) can therefore serve concurrent solves,
+e.g. from a thread pool, and be reused without being rebuilt.
+"""
+
+import copy
+
+import numpy as np
+
+from bvps import budgets, transition_cache
+
+
+def scale_diffusion(dynamics_model, sigma_squared):
+    """Copy of the prior whose diffusion is multiplied by ``sigma_squared``.
+
+    The prior itself is not modified.
+
+    Examples
+    --------
+    >>> from probnum import statespace
+    >>> ibm = statespace.IBM(ordint=1, spatialdim=1)
+    >>> scaled = scale_diffusion(ibm, 4.0)
+    >>> discretisation = ibm.equivalent_discretisation_preconditioned
+    >>> scaled_discretisation = scaled.equivalent_discretisation_preconditioned
+    >>> np.allclose(
+    ...     scaled_discretisation.proc_noise_cov_cholesky,
+    ...     2.0 * discretisation.proc_noise_cov_cholesky,
+    ... )
+    True
+    """
+    # The copy gets a new, empty transition cache instead of a copy of the
+    # shared one: its entries would be invalidated anyway, and copying them
+    # races with lookups of concurrent solves.
+    memo = {}
+    cache = getattr(dynamics_model, "transition_cache", None)
+    if isinstance(cache, transition_cache.TransitionCache):
+        memo[id(cache)] = transition_cache.TransitionCache(maxsize=cache.maxsize)
+    scaled = copy.deepcopy(dynamics_model, memo)
+    if hasattr(scaled, "scale_diffusion"):
+        scaled.scale_diffusion(sigma_squared)
+        return scaled
+    discretisation = scaled.equivalent_discretisation_preconditioned
+    discretisation._proc_noise_cov_cholesky *= np.sqrt(sigma_squared)
+    discretisation.proc_noise_cov_mat *= sigma_squared
+    return scaled
+
+
+class SolveContext:
+    """State of a single call to ``BVPSolver.solution_generator``.
+
+    Attributes
+    ----------
+    dynamics_model
+        Prior of this call, with the current diffusion.
+    error_estimator
+        Copy of the solver's error estimator, with the tolerances of this call.
+    filter_object
+        Filter and smoother of this call (which holds its ``sigmas``).
+    linearisation_cache
+        ``LinearisationCache`` of this call, or None.
+    ieks_iterations
+        Number of IEKS iterations per refinement.
+    removed_nodes
+        Number of nodes removed by coarsening per refinement.
+    status
+        ``budgets.SolveStatus`` once the solve has stopped.
+    """
+
+    def __init__(self):
+        self.dynamics_model = None
+        self.error_estimator = None
+        self.filter_object = None
+        self.linearisation_cache = None
+        self.ieks_iterations = []
+        self.removed_nodes = []
+        self.status = None
+
+    def scale_diffusion(self, sigma_squared):
+        """Multiply the diffusion of the prior of this call by ``sigma_squared``."""
+        self.dynamics_model = scale_diffusion(self.dynamics_model, sigma_squared)
+        if self.filter_object is not None:
+            self.filter_object.dynamics_model = self.dynamics_model
+
+    def set_status(self, reason, per_interval_error, times, budget):
+        """Record why the solve stopped in ``self.status``.
+
+        The error is NaN if no error has been estimated yet.
+        """
+        error = np.nan if per_interval_error is None else np.max(per_interval_error)
+        self.status = budgets.SolveStatus(
+            reason=reason,
+            error=error,
+            num_nodes=len(times),
+            num_refinements=budget.num_refinements,
+            elapsed_time=budget.elapsed_time,
+        )
@@ -1,4 +1,7 @@
 """Solving BVPs."""
+
+import copy
+
 import numpy as np
 import scipy.linalg
 from probnum import diffeq, random_variables, utils
@@ -13,6 +16,7 @@ from bvps import (
     mesh,
     ode_measmods,
     problems,
+    solve_context,
     stopcrit,
 )
 
@@ -63,7 +67,7 @@ def probsolve_bvp(
     c0 = initial_sigma_squared * np.ones(bridge_prior.dimension)
     C0 = np.diag(c0)
     initrv_not_bridged = random_variables.Normal(m0, C0, cov_cholesky=np.sqrt(C0))
-    ibm = bridge_prior.integrator
+    ibm = copy.deepcopy(bridge_prior.integrator)
     ibm.equivalent_discretisation_preconditioned._proc_noise_cov_cholesky *= np.sqrt(
         initial_sigma_squared
     )
@@ -201,9 +205,7 @@ def probsolve_bvp(
 
         # Update sigma
         sigma = np.sqrt(sigma_squared)
-        ibm = bridge_prior.integrator
-        ibm.equivalent_discretisation_preconditioned._proc_noise_cov_cholesky *= sigma
-        ibm.equivalent_discretisation_preconditioned.proc_noise_cov_mat *= sigma_squared
+        ibm = solve_context.scale_diffusion(bridge_prior.integrator, sigma_squared)
 
         bridge_prior = bridges.GaussMarkovBridge(ibm, bvp)
         new_cov_cholesky *= sigma
@@ -0,0 +1,282 @@
+"""Parameter sweeps over a process pool.
+
+A sweep solves many (problem, ordint, tolerance) combinations, each with its
+own ``BVPSolver``. The combinations are independent, so they are fanned out
+over a ``concurrent.futures.ProcessPoolExecutor``.
+
+Problems are described by a ``ProblemFactory`` (the name of a function in
+``problem_examples`` and its keyword arguments), which can be pickled; the
+BVPs themselves, their measurement models, and the solvers hold closures and
+are only built in the worker. The posterior arrays are passed back through
+``multiprocessing.shared_memory`` instead of being pickled.
+
+Every worker solves one problem at a time, so BLAS is limited to
+``blas_threads`` threads per worker to avoid oversubscribing the cores.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import itertools
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from probnum import statespace
+
+from bvps import array_kalman, bvp_solver, problem_examples
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+BLAS_THREADS_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+)
+
+
+class ProblemFactory:
+    """Picklable factory for a problem from ``problem_examples``.
+
+    Examples
+    --------
+    >>> import pickle
+    >>> factory = ProblemFactory("problem_20_second_order", xi=0.1)
+    >>> factory
+    ProblemFactory('problem_20_second_order', xi=0.1)
+    >>> bvp = pickle.loads(pickle.dumps(factory))()
+    >>> bvp.t0, bvp.tmax
+    (0.0, 1.0)
+    """
+
+    def __init__(self, name, **kwargs):
+        if not callable(getattr(problem_examples, name, None)):
+            raise ValueError(f"Unknown problem: {name}.")
+        self.name = name
+        self.kwargs = kwargs
+
+    def __call__(self):
+        return getattr(problem_examples, self.name)(**self.kwargs)
+
+    def __eq__(self, other):
+        if not isinstance(other, ProblemFactory):
+            return NotImplemented
+        return (self.name, self.kwargs) == (other.name, other.kwargs)
+
+    def __hash__(self):
+        return hash((self.name, tuple(sorted(self.kwargs.items()))))
+
+    def __repr__(self):
+        arguments = [repr(self.name)]
+        arguments += [f"{key}={value!r}" for key, value in self.kwargs.items()]
+        return f"ProblemFactory({', '.join(arguments)})"
+
+
+SweepTask = collections.namedtuple(
+    "SweepTask",
+    [
+        "problem",
+        "ordint",
+        "tol",
+        "initial_grid_size",
+        "maxit_ieks",
+        "initial_sigma_squared",
+        "filtsmooth_engine",
+    ],
+    defaults=(20, 10, 1e2, "arrays"),
+)
+SweepTask.__doc__ = """One solve of a sweep. ``problem`` is a ``ProblemFactory``."""
+
+SweepResult = collections.namedtuple(
+    "SweepResult",
+    [
+        "task",
+        "locations",
+        "means",
+        "cov_choleskies",
+        "ieks_iterations",
+        "status",
+        "runtime",
+        "error",
+    ],
+)
+SweepResult.__doc__ = """Smoothing posterior on the final mesh and solver statistics.
+
+If the solve raised, ``error`` holds the message and the arrays are None.
+"""
+
+
+def tasks_from_grid(problems, ordints, tols, **kwargs):
+    """All combinations of ``problems`` (factories), ``ordints``, and ``tols``."""
+    return [
+        SweepTask(problem, ordint, tol, **kwargs)
+        for problem, ordint, tol in itertools.product(problems, ordints, tols)
+    ]
+
+
+def solve_task(task):
+    """Solve a single task in the current process."""
+    start = time.time()
+    try:
+        bvp = task.problem()
+        ibm = statespace.IBM(
+            ordint=task.ordint,
+            spatialdim=bvp.dimension,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm,
+            initial_sigma_squared=task.initial_sigma_squared,
+            filtsmooth_engine=task.filtsmooth_engine,
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, task.initial_grid_size)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posterior = solver.solve(
+            bvp,
+            atol=task.tol,
+            rtol=task.tol,
+            initial_posterior=initial_posterior,
+            maxit_ieks=task.maxit_ieks,
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        # One failed task must not abort the whole sweep.
+        message = f"{type(err).__name__}: {err}"
+        return SweepResult(
+            task, None, None, None, None, None, time.time() - start, message
+        )
+    posterior = array_kalman.as_array_posterior(posterior)
+    return SweepResult(
+        task,
+        posterior.locations,
+        posterior.means,
+        posterior.cov_choleskies,
+        solver.ieks_iterations,
+        solver.status,
+        time.time() - start,
+        None,
+    )
+
+
+def run_sweep(tasks, max_workers=None, blas_threads=1, mp_context=None):
+    """Solve all ``tasks`` in a process pool.
+
+    Returns one ``SweepResult`` per task, in the order of ``tasks``.
+    ``max_workers`` defaults to the number of cores, and ``mp_context`` to
+    the default start method of ``multiprocessing``.
+    """
+    tasks = list(tasks)
+    results = [None] * len(tasks)
+    with limit_blas_threads_of_children(blas_threads):
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=limit_blas_threads,
+            initargs=(blas_threads,),
+        ) as executor:
+            futures = {
+                executor.submit(_solve_into_shared_memory, task): idx
+                for idx, task in enumerate(tasks)
+            }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    results[futures[future]] = _collect_from_shared_memory(
+                        *future.result()
+                    )
+            finally:
+                # Free the shared memory of the results that are not collected.
+                for future in futures:
+                    if not future.cancel() and results[futures[future]] is None:
+                        with contextlib.suppress(Exception):
+                            _collect_from_shared_memory(*future.result())
+    return results
+
+
+@contextlib.contextmanager
+def limit_blas_threads_of_children(num_threads):
+    """Set the BLAS thread variables for processes that are started meanwhile.
+
+    Spawned workers import NumPy after they start, so the variables take
+    effect there.
+    """
+    previous = {name: os.environ.get(name) for name in BLAS_THREADS_VARIABLES}
+    os.environ.update({name: str(num_threads) for name in BLAS_THREADS_VARIABLES})
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def limit_blas_threads(num_threads):
+    """Limit the BLAS threads of the current process (requires threadpoolctl).
+
+    Without threadpoolctl, only libraries loaded after this call are limited.
+    """
+    os.environ.update({name: str(num_threads) for name in BLAS_THREADS_VARIABLES})
+    if threadpoolctl is not None:
+        threadpoolctl.threadpool_limits(limits=num_threads, user_api="blas")
+
+
+_ARRAY_FIELDS = ("locations", "means", "cov_choleskies")
+
+
+def _solve_into_shared_memory(task):
+    """Solve ``task`` and copy the posterior arrays into a shared memory block.
+
+    The block is owned by the caller, which unlinks it after collecting.
+    """
+    result = solve_task(task)
+    if result.error is not None:
+        return result, None, None
+
+    arrays = [
+        np.asarray(getattr(result, field), dtype=float) for field in _ARRAY_FIELDS
+    ]
+    size = max(sum(array.nbytes for array in arrays), 1)
+    if sys.version_info >= (3, 13):
+        block = shared_memory.SharedMemory(create=True, size=size, track=False)
+    else:
+        block = shared_memory.SharedMemory(create=True, size=size)
+        if os.name == "posix":
+            # Before CPython 3.13, every block is registered with the resource
+            # tracker, which unlinks it (or reports it as leaked) when this
+            # worker shuts down (gh-82300). The tracker only runs on POSIX and
+            # knows the block by its POSIX name, i.e. with a leading "/".
+            resource_tracker.unregister("/" + block.name, "shared_memory")
+    offset = 0
+    for array in arrays:
+        np.ndarray(array.shape, buffer=block.buf, offset=offset)[...] = array
+        offset += array.nbytes
+    block.close()
+    result = result._replace(**{field: None for field in _ARRAY_FIELDS})
+    return result, block.name, [array.shape for array in arrays]
+
+
+def _collect_from_shared_memory(result, block_name, shapes):
+    """Copy the posterior arrays out of the shared memory block and unlink it."""
+    if block_name is None:
+        return result
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        arrays, offset = {}, 0
+        for field, shape in zip(_ARRAY_FIELDS, shapes):
+            array = np.ndarray(shape, buffer=block.buf, offset=offset)
+            arrays[field] = array.copy()
+            offset += array.nbytes
+    finally:
+        block.close()
+        block.unlink()
+    return result._replace(**arrays)
@@ -0,0 +1,233 @@
+"""Per-step transition cache for integrated Brownian motion priors.
+
+Every call to ``IBM.forward_rv``, ``IBM.backward_rv`` or ``IBM.discretise``
+rebuilds the preconditioner for the step size ``dt`` (and, for ``discretise``,
+the transition matrix and process-noise Cholesky factor in the original
+coordinates). On uniform or mostly-uniform meshes and in the IEKS loop, the
+same handful of step sizes recurs thousands of times, so these matrices are
+stored in a bounded LRU cache.
+"""
+
+import collections
+import threading
+
+import numpy as np
+from probnum import random_variables, statespace
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "invalidations", "maxsize", "currsize"]
+)
+
+Transition = collections.namedtuple(
+    "Transition",
+    ["state_trans_mat", "proc_noise_cov_cholesky", "precon", "precon_inverse"],
+)
+
+
+class TransitionCache:
+    """Bounded least-recently-used cache with hit/miss statistics.
+
+    Lookups are guarded by a lock, so a prior can be shared between threads.
+
+    Examples
+    --------
+    >>> cache = TransitionCache(maxsize=2)
+    >>> cache.get("a", lambda: 1), cache.get("a", lambda: 2)
+    (1, 1)
+    >>> cache.get("b", lambda: 3), cache.get("c", lambda: 4), cache.get("a", lambda: 5)
+    (3, 4, 5)
+    >>> cache.cache_info()
+    CacheInfo(hits=1, misses=4, invalidations=0, maxsize=2, currsize=2)
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError("The cache must be able to hold at least one entry.")
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, compute):
+        """Return the entry for ``key``; on a miss, store ``compute()``."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                value = compute()
+                self._entries[key] = value
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                return value
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def invalidate(self):
+        """Drop all entries. The statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def cache_info(self):
+        return CacheInfo(
+            self.hits, self.misses, self.invalidations, self.maxsize, len(self)
+        )
+
+
+class CachedIBM(statespace.IBM):
+    """Integrated Brownian motion prior whose per-step matrices are cached.
+
+    Drop-in replacement for ``statespace.IBM``. The cache is keyed on
+    ``(ordint, spatialdim, dt, diffusion_scale)``. Rescaling the diffusion
+    must go through :meth:`scale_diffusion`, which invalidates the cache.
+
+    Examples
+    --------
+    >>> ibm = CachedIBM(ordint=2, spatialdim=1)
+    >>> ibm.discretise(0.1) is not None
+    True
+    >>> _ = ibm.discretise(0.1)
+    >>> ibm.transition_cache.cache_info()
+    CacheInfo(hits=1, misses=1, invalidations=0, maxsize=128, currsize=1)
+    """
+
+    def __init__(
+        self,
+        ordint,
+        spatialdim,
+        forward_implementation="classic",
+        backward_implementation="classic",
+        cache_size=128,
+    ):
+        super().__init__(
+            ordint=ordint,
+            spatialdim=spatialdim,
+            forward_implementation=forward_implementation,
+            backward_implementation=backward_implementation,
+        )
+        self.transition_cache = TransitionCache(maxsize=cache_size)
+        self.diffusion_scale = 1.0
+
+    def scale_diffusion(self, sigma_squared):
+        """Multiply the diffusion by ``sigma_squared`` and invalidate the cache."""
+        discretisation = self.equivalent_discretisation_preconditioned
+        discretisation._proc_noise_cov_cholesky *= np.sqrt(sigma_squared)
+        discretisation.proc_noise_cov_mat *= sigma_squared
+        self.diffusion_scale *= sigma_squared
+        self.transition_cache.invalidate()
+
+    def transition(self, dt):
+        """Discretised transition for the step ``dt`` (cached)."""
+        key = (self.ordint, self.spatialdim, float(dt), self.diffusion_scale)
+        return self.transition_cache.get(key, lambda: self._compute_transition(dt))
+
+    def _compute_transition(self, dt):
+        discretisation = self.equivalent_discretisation_preconditioned
+        precon = self.precon(dt)
+        precon_inverse = self.precon.inverse(dt)
+        state_trans_mat = precon @ discretisation.state_trans_mat @ precon_inverse
+        proc_noise_cov_cholesky = precon @ discretisation.proc_noise_cov_cholesky
+        return Transition(
+            state_trans_mat, proc_noise_cov_cholesky, precon, precon_inverse
+        )
+
+    def discretise(self, dt):
+        transition = self.transition(dt)
+        proc_noise_cov_cholesky = transition.proc_noise_cov_cholesky
+        return statespace.DiscreteLTIGaussian(
+            state_trans_mat=transition.state_trans_mat,
+            shift_vec=np.zeros(self.dimension),
+            proc_noise_cov_mat=proc_noise_cov_cholesky @ proc_noise_cov_cholesky.T,
+            proc_noise_cov_cholesky=proc_noise_cov_cholesky,
+            forward_implementation=self.forward_implementation,
+            backward_implementation=self.backward_implementation,
+        )
+
+    def forward_rv(
+        self,
+        rv,
+        t,
+        dt=None,
+        compute_gain=False,
+        _diffusion=1.0,
+        **kwargs,
+    ):
+        if dt is None:
+            raise ValueError(
+                "Continuous-time transitions require a time-increment ``dt``."
+            )
+        transition = self.transition(dt)
+        precon, precon_inverse = transition.precon, transition.precon_inverse
+
+        rv = _apply_precon(precon_inverse, rv)
+        rv, info = self.equivalent_discretisation_preconditioned.forward_rv(
+            rv, t, compute_gain=compute_gain, _diffusion=_diffusion
+        )
+
+        info["crosscov"] = precon @ info["crosscov"] @ precon.T
+        if "gain" in info:
+            info["gain"] = precon @ info["gain"] @ precon_inverse.T
+
+        return _apply_precon(precon, rv), info
+
+    def backward_rv(
+        self,
+        rv_obtained,
+        rv,
+        rv_forwarded=None,
+        gain=None,
+        t=None,
+        dt=None,
+        _diffusion=1.0,
+        **kwargs,
+    ):
+        if dt is None:
+            raise ValueError(
+                "Continuous-time transitions require a time-increment ``dt``."
+            )
+        transition = self.transition(dt)
+        precon, precon_inverse = transition.precon, transition.precon_inverse
+
+        rv_obtained = _apply_precon(precon_inverse, rv_obtained)
+        rv = _apply_precon(precon_inverse, rv)
+        if rv_forwarded is not None:
+            rv_forwarded = _apply_precon(precon_inverse, rv_forwarded)
+        if gain is not None:
+            gain = precon_inverse @ gain @ precon_inverse.T
+
+        rv, info = self.equivalent_discretisation_preconditioned.backward_rv(
+            rv_obtained=rv_obtained,
+            rv=rv,
+            rv_forwarded=rv_forwarded,
+            gain=gain,
+            t=t,
+            _diffusion=_diffusion,
+        )
+        return _apply_precon(precon, rv), info
+
+
+def _apply_precon(precon, rv):
+    # precon is diagonal, so the transformed Cholesky factor is still triangular.
+    new_mean = precon @ rv.mean
+    new_cov_cholesky = precon @ rv.cov_cholesky
+    new_cov = new_cov_cholesky @ new_cov_cholesky.T
+    return random_variables.Normal(new_mean, new_cov, cov_cholesky=new_cov_cholesky)
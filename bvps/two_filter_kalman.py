@@ -0,0 +1,225 @@
+"""Two-filter smoothing: forward and backward filters that run concurrently.
+
+The Rauch-Tung-Striebel smoother needs the filtering distributions, so filter
+and smoother run one after the other. The two-filter form instead combines
+
+* a forward filter from the left boundary, which yields p(x_n | y_{0:n}), and
+* a backward information filter from the right boundary, which yields the
+  information ``y_n = Z_n^T x_n + e``, ``e ~ N(0, I)``, that the observations
+  y_{n+1:N} carry about x_n (as ``parallel_kalman.combine_filtering``),
+
+which are independent of each other. The smoothing distribution at a node is
+the forward filtering distribution conditioned on the backward information.
+All computations are in square-root form, in the coordinates of a single,
+mesh-wide preconditioner (as in ``parallel_kalman``).
+"""
+
+import functools
+
+import numpy as np
+from probnum import statespace
+
+from .array_kalman import (
+    ArrayFilteringPosterior,
+    ArrayKalman,
+    ArraySmoothingPosterior,
+    _mahalanobis_squared,
+    predict,
+    tria,
+    update,
+)
+from .parallel_kalman import (
+    _compress_observations,
+    _merge_measurements,
+    _stack_measurements,
+    _transpose,
+    reference_transitions,
+)
+
+
+def forward_filter(
+    mean0,
+    cov_cholesky0,
+    state_trans,
+    proc_noise_cholesky,
+    meas_mats,
+    shifts,
+    meas_noise_choleskies,
+    data,
+    output_dims,
+):
+    """Square-root Kalman filter on stacked measurements (see ``_stack_measurements``).
+
+    Returns the filtered means and Cholesky factors, and the squared
+    Mahalanobis norms of the residuals of every measurement model (N, K).
+    """
+    N, D = len(meas_mats), len(mean0)
+    means = np.empty((N, D))
+    cov_choleskies = np.empty((N, D, D))
+    sigmas = np.zeros(output_dims.shape)
+    no_precon = np.ones(D)
+
+    mean, cov_cholesky = mean0, cov_cholesky0
+    for idx in range(N):
+        if idx > 0:
+            mean, cov_cholesky = predict(
+                mean,
+                cov_cholesky,
+                state_trans[idx - 1],
+                proc_noise_cholesky[idx - 1],
+                no_precon,
+            )
+        for slot in np.flatnonzero(output_dims[idx]):
+            m = output_dims[idx, slot]
+            mean, cov_cholesky, residual, residual_cholesky = update(
+                mean,
+                cov_cholesky,
+                meas_mats[idx, slot, :m],
+                shifts[idx, slot, :m],
+                meas_noise_choleskies[idx, slot, :m, :m],
+                data[idx, slot, :m],
+            )
+            sigmas[idx, slot] = _mahalanobis_squared(residual, residual_cholesky)
+        means[idx] = mean
+        cov_choleskies[idx] = cov_cholesky
+    return means, cov_choleskies, sigmas
+
+
+def backward_information_filter(
+    state_trans,
+    proc_noise_cholesky,
+    meas_mats,
+    shifts,
+    meas_noise_choleskies,
+    data,
+    output_dims,
+):
+    """Information ``y_n = Z_n^T x_n + e``, ``e ~ N(0, I)``, of the observations
+    after node n about the state x_n.
+
+    Works backwards from the right boundary: the observations at node n + 1
+    are stacked with the information about x_{n+1}, propagated through the
+    transition to x_n, whitened, and compressed. Returns ``y`` (N, D) and
+    ``Z`` (N, D, D); at the last node, there is no information (zero).
+    """
+    H, innovations, noise_cholesky = _merge_measurements(
+        meas_mats, shifts, meas_noise_choleskies, data
+    )
+    (N, M), D = innovations.shape, meas_mats.shape[-1]
+    y = np.zeros((N, D))
+    Z = np.zeros((N, D, D))
+    noise_block = np.zeros((M + D, M + D))
+    noise_block[M:, M:] = np.eye(D)
+
+    for idx in reversed(range(N - 1)):
+        obs_mat = np.concatenate((H[idx + 1], _transpose(Z[idx + 1])))
+        obs = np.concatenate((innovations[idx + 1], y[idx + 1]))
+        noise_block[:M, :M] = noise_cholesky[idx + 1]
+        psi = tria(
+            np.concatenate((obs_mat @ proc_noise_cholesky[idx], noise_block), axis=-1)
+        )
+        y[idx], Z[idx] = _compress_observations(
+            np.linalg.solve(psi, obs_mat @ state_trans[idx]),
+            np.linalg.solve(psi, obs),
+        )
+    return y, Z
+
+
+class TwoFilterKalman(ArrayKalman):
+    """Kalman smoothing as the fusion of a forward and a backward filter.
+
+    Drop-in replacement for :class:`ArrayKalman` if all measurement models are
+    linear (e.g. the output of ``BVPSolver.linearise_measmod_list``); otherwise
+    ``filtsmooth`` falls back to the sequential array implementation. The
+    smoothing posterior does not store the smoothing gains.
+
+    After ``filtsmooth``, ``backward_information`` holds ``(y, Z)``: the
+    information ``y_n = Z_n^T x_n + e``, ``e ~ N(0, I)``, that the
+    observations after node n (including the right boundary condition) carry
+    about the state x_n.
+
+    Parameters
+    ----------
+    executor
+        ``concurrent.futures.Executor`` that runs the forward filter while the
+        backward filter runs in the current thread. A single worker suffices.
+        If None, both run in the current thread.
+    """
+
+    def __init__(self, dynamics_model, measurement_model, initrv, executor=None):
+        super().__init__(dynamics_model, measurement_model, initrv)
+        self.executor = executor
+        self.backward_information = None
+
+    def filtsmooth(self, dataset, times, measmod_list):
+        if not isinstance(measmod_list, list):
+            raise RuntimeError
+        dataset, times = np.asarray(dataset), np.asarray(times)
+        measmod_list = [mm if isinstance(mm, list) else [mm] for mm in measmod_list]
+        if not all(
+            isinstance(mm_, statespace.DiscreteLinearGaussian)
+            for mm in measmod_list
+            for mm_ in mm
+        ):
+            return super().filtsmooth(dataset, times, measmod_list)
+        if not np.all(np.diff(times) > 0.0):
+            raise ValueError(
+                "The two-filter smoother requires strictly increasing times."
+            )
+
+        state_trans, proc_noise_cholesky, reference_precon = reference_transitions(
+            self.dynamics_model, times
+        )
+        measurements = _stack_measurements(
+            measmod_list, times, dataset, reference_precon
+        )
+        mean0 = self.initrv.mean / reference_precon
+        cov_cholesky0 = self.initrv.cov_cholesky / reference_precon[:, None]
+
+        run_forward_filter = functools.partial(
+            forward_filter,
+            mean0,
+            cov_cholesky0,
+            state_trans,
+            proc_noise_cholesky,
+            *measurements,
+        )
+        future = None
+        if self.executor is not None:
+            future = self.executor.submit(run_forward_filter)
+        y, Z = backward_information_filter(
+            state_trans, proc_noise_cholesky, *measurements
+        )
+        means, cov_choleskies, sigmas = (
+            run_forward_filter() if future is None else future.result()
+        )
+
+        # Condition the filtering distributions on the backward information.
+        N, D = means.shape
+        smoothed_means, smoothed_cov_choleskies, _, _ = update(
+            means,
+            cov_choleskies,
+            _transpose(Z),
+            np.zeros((N, D)),
+            np.broadcast_to(np.eye(D), (N, D, D)),
+            y,
+        )
+
+        output_dims = measurements[-1]
+        self.sigmas = list(sigmas[output_dims > 0])
+        self.normalisation_for_sigmas = float(np.sum(output_dims))
+        self.backward_information = (y, Z / reference_precon[:, None])
+
+        filter_posterior = ArrayFilteringPosterior(
+            locations=times,
+            means=reference_precon * means,
+            cov_choleskies=reference_precon[:, None] * cov_choleskies,
+            transition=self.dynamics_model,
+        )
+        return ArraySmoothingPosterior(
+            locations=times,
+            means=reference_precon * smoothed_means,
+            cov_choleskies=reference_precon[:, None] * smoothed_cov_choleskies,
+            transition=self.dynamics_model,
+            filtering_posterior=filter_posterior,
+        )
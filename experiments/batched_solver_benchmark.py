@@ -0,0 +1,79 @@
+"""Batched vs. one-by-one solves of a problem family.
+
+Solve ``problem_20_second_order(xi)`` for many ``xi`` with a BVPSolver per
+instance and with one BatchedBVPSolver, and report the throughput in solves
+per second. The initialisation (one bridge per instance) is not timed.
+
+Usage: python batched_solver_benchmark.py
+"""
+
+import time
+
+import numpy as np
+from probnum import statespace
+
+from bvps import batched_solver, bvp_solver, problem_examples
+
+BATCH_SIZES = [1, 4, 16, 64]
+TOL = 1e-5
+INITIAL_GRID_SIZE = 20
+MAXIT_IEKS = 20
+
+
+def make_solver(bvp):
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=bvp.dimension,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, INITIAL_GRID_SIZE)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    return solver, initial_posterior
+
+
+def one_by_one(bvps):
+    solvers = [make_solver(bvp) for bvp in bvps]
+    start = time.time()
+    for bvp, (solver, initial_posterior) in zip(bvps, solvers):
+        solver.solve(
+            bvp,
+            atol=TOL,
+            rtol=TOL,
+            initial_posterior=initial_posterior,
+            maxit_ieks=MAXIT_IEKS,
+        )
+    return time.time() - start
+
+
+def batched(bvps):
+    initial_posteriors = [make_solver(bvp)[1] for bvp in bvps]
+    solver, _ = make_solver(bvps[0])
+    start = time.time()
+    batched_solver.BatchedBVPSolver(solver).solve(
+        bvps,
+        atol=TOL,
+        rtol=TOL,
+        initial_posteriors=initial_posteriors,
+        maxit_ieks=MAXIT_IEKS,
+    )
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    print(f"{'batch size':>10} {'one-by-one [1/s]':>17} {'batched [1/s]':>14}")
+    for batch_size in BATCH_SIZES:
+        bvps = [
+            problem_examples.problem_20_second_order(xi)
+            for xi in np.linspace(0.1, 0.5, batch_size)
+        ]
+        print(
+            f"{batch_size:>10} {batch_size / one_by_one(bvps):>17.2f} "
+            f"{batch_size / batched(bvps):>14.2f}"
+        )
@@ -0,0 +1,79 @@
+"""Solve time with an expensive right-hand side, evaluated by 1, 2, 4, ... threads.
+
+The right-hand side and Jacobians of problem_20_second_order are slowed down
+by COST seconds per node; the delay releases the GIL, like a call into
+compiled code would.
+
+Usage: python concurrent_evaluation_benchmark.py
+"""
+
+import dataclasses
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from probnum import statespace
+
+from bvps import bvp_solver, concurrent_evaluation, problem_examples
+
+COST = 2e-4
+NUM_THREADS = [1, 2, 4, 8]
+
+
+def expensive(fun):
+    def slow_fun(*args):
+        time.sleep(COST)
+        return fun(*args)
+
+    return slow_fun
+
+
+def solve(bvp, mesh_evaluation):
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    start = time.time()
+    posterior = solver.solve(
+        bvp,
+        atol=1e-6,
+        rtol=1e-6,
+        initial_posterior=initial_posterior,
+        maxit_ieks=5,
+        relinearisation_threshold=None,
+        mesh_evaluation=mesh_evaluation,
+    )
+    return time.time() - start, posterior
+
+
+if __name__ == "__main__":
+    bvp = problem_examples.problem_20_second_order(xi=0.2)
+    bvp = dataclasses.replace(
+        bvp,
+        f=expensive(bvp.f),
+        df_dy=expensive(bvp.df_dy),
+        df_ddy=expensive(bvp.df_ddy),
+    )
+
+    serial_time, reference = solve(bvp, None)
+    print(f"{len(reference.locations)} final nodes")
+    print(f"{'threads':>8} {'time [s]':>9} {'speedup':>8}")
+    print(f"{'-':>8} {serial_time:>9.2f} {1.0:>8.2f}")
+    for num_threads in NUM_THREADS:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            mesh_evaluation = concurrent_evaluation.ConcurrentMeshEvaluation(
+                executor, num_chunks=num_threads
+            )
+            runtime, posterior = solve(bvp, mesh_evaluation)
+        np.testing.assert_allclose(posterior.means, reference.means)
+        print(f"{num_threads:>8} {runtime:>9.2f} {serial_time / runtime:>8.2f}")
@@ -0,0 +1,62 @@
+"""Wall-clock time of a domain-decomposed filter and smoother on a large mesh.
+
+Filter and smooth one linearisation of problem_20_second_order on a mesh with
+NUM_NODES nodes NUM_REPEATS times, split into K pieces that are processed by K
+worker processes, and compare against the sequential array implementation.
+(Much finer uniform meshes are ill-conditioned for the IBM prior, also for the
+sequential filter.)
+
+Usage: python domain_decomposition_benchmark.py
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from probnum import random_variables, statespace
+
+from bvps import array_kalman, bvp_solver, domain_decomposition, problem_examples
+
+NUM_NODES = 500
+NUM_REPEATS = 20
+
+
+if __name__ == "__main__":
+    bvp = problem_examples.problem_20_second_order(xi=0.5)
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values(ibm, initial_sigma_squared=1e2)
+    times = np.linspace(bvp.t0, bvp.tmax, NUM_NODES)
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+    states = [random_variables.Constant(0.5 * np.ones(ibm.dimension))] * len(times)
+    measmod_list = solver.linearise_measmod_list(measmod_list, states, times)
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    start = time.time()
+    for _ in range(NUM_REPEATS):
+        reference = arrays.filtsmooth(dataset, times, measmod_list)
+    print(f"{NUM_REPEATS} x {NUM_NODES} nodes, {os.cpu_count()} cores")
+    print(f"sequential: {time.time() - start:.2f}s")
+
+    print(f"{'pieces':>7} {'time [s]':>9} {'max. difference':>16}")
+    num_pieces = 1
+    while num_pieces <= os.cpu_count():
+        with ProcessPoolExecutor(max_workers=num_pieces) as executor:
+            kalman = domain_decomposition.DomainDecompositionKalman(
+                ibm, None, initrv, executor=executor, num_pieces=num_pieces
+            )
+            start = time.time()
+            for _ in range(NUM_REPEATS):
+                posterior = kalman.filtsmooth(dataset, times, measmod_list)
+            runtime = time.time() - start
+        difference = np.max(np.abs(posterior.means - reference.means))
+        print(f"{num_pieces:>7} {runtime:>9.2f} {difference:>16.1e}")
+        num_pieces *= 2
@@ -0,0 +1,79 @@
+"""Mesh refinement: insert one/two points vs. error equidistribution.
+
+For each problem, report the number of refinements, the final mesh size, the
+number of IEKS passes, the runtime, and the error against a solution with a
+thousand times smaller tolerance.
+
+Usage: python mesh_refinement_benchmark.py
+"""
+
+import time
+
+import numpy as np
+from probnum import statespace
+
+from bvps import bvp_solver, problem_examples
+
+PROBLEMS = [
+    (problem_examples.problem_7_second_order(xi=0.1), 1e-6),
+    (problem_examples.problem_20_second_order(xi=0.1), 1e-5),
+    (problem_examples.problem_23_second_order(xi=0.25), 1e-6),
+    (problem_examples.problem_24_second_order(xi=0.05), 1e-5),
+    (problem_examples.problem_28_second_order(xi=0.1), 1e-5),
+]
+INITIAL_GRID_SIZE = 20
+MAXIT_IEKS = 20
+
+
+def solve(bvp, tol, mesh_refinement):
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=bvp.dimension,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm,
+        initial_sigma_squared=1e2,
+        filtsmooth_engine="arrays",
+        mesh_refinement=mesh_refinement,
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, INITIAL_GRID_SIZE)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+
+    start = time.time()
+    solution = solver.solve(
+        bvp,
+        atol=tol,
+        rtol=tol,
+        initial_posterior=initial_posterior,
+        maxit_ieks=MAXIT_IEKS,
+    )
+    runtime = time.time() - start
+    return solution, solver.ieks_iterations, runtime
+
+
+if __name__ == "__main__":
+    print(
+        f"{'problem':>24} {'refinement':>15} {'#refine':>8} {'N':>6} "
+        f"{'passes':>7} {'time [s]':>9} {'error':>9}"
+    )
+    for bvp, tol in PROBLEMS:
+        name = bvp.f.__qualname__.split(".")[0]
+        t = np.linspace(bvp.t0, bvp.tmax, 200)
+        reference, _, _ = solve(bvp, 1e-3 * tol, "insert")
+        reference = reference(t).mean[:, 0]
+
+        for mesh_refinement in bvp_solver.MESH_REFINEMENTS:
+            solution, ieks_iterations, runtime = solve(bvp, tol, mesh_refinement)
+            error = np.max(
+                np.abs(solution(t).mean[:, 0] - reference) / (1.0 + np.abs(reference))
+            )
+            print(
+                f"{name:>24} {mesh_refinement:>15} {len(ieks_iterations):>8} "
+                f"{len(solution.locations):>6} {sum(ieks_iterations):>7} "
+                f"{runtime:>9.3f} {error:>9.1e}"
+            )
@@ -0,0 +1,77 @@
+"""Wall-clock time of a single IEKS pass: sequential vs. parallel-in-time filtering and smoothing.
+
+Usage: python parallel_ieks_benchmark.py [N1 N2 ...]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from probnum import random_variables, statespace
+
+from bvps import array_kalman, bvp_solver, parallel_kalman, problem_examples
+
+NUM_REPETITIONS = 3
+
+
+def setup(N):
+    bvp = problem_examples.problem_7_second_order(xi=0.1)
+    # A single pass from the vague initial prior on a very fine mesh is only
+    # well-conditioned for low orders (this affects both engines).
+    ibm = statespace.IBM(
+        ordint=2,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values(ibm, initial_sigma_squared=1e2)
+    times = np.linspace(bvp.t0, bvp.tmax, N)
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+    states = [random_variables.Constant(np.ones(ibm.dimension))] * N
+    lin_measmod_list = solver.linearise_measmod_list(measmod_list, states, times)
+    dataset = np.zeros((N, bvp.dimension))
+    return ibm, solver.create_initrv(), dataset, times, lin_measmod_list
+
+
+def timeit(filter_object, dataset, times, measmod_list):
+    runtimes = []
+    for _ in range(NUM_REPETITIONS):
+        start = time.time()
+        posterior = filter_object.filtsmooth(dataset, times, measmod_list)
+        runtimes.append(time.time() - start)
+    return min(runtimes), posterior
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    max_workers = os.cpu_count()
+    worker_counts = [w for w in [1, 2, 4, 8, 16, 32] if w <= max_workers]
+
+    print(
+        f"{'N':>8} {'engine':>10} {'workers':>8} {'time [s]':>10} {'speed-up':>9} {'error':>9}"
+    )
+    for N in sizes:
+        ibm, initrv, dataset, times, measmod_list = setup(N)
+
+        sequential = array_kalman.ArrayKalman(ibm, None, initrv)
+        reference_time, reference = timeit(sequential, dataset, times, measmod_list)
+        print(
+            f"{N:>8} {'arrays':>10} {1:>8} {reference_time:>10.3f} {1.0:>9.2f} {0.0:>9.1e}"
+        )
+
+        for pool in [ThreadPoolExecutor, ProcessPoolExecutor]:
+            for workers in worker_counts:
+                with pool(max_workers=workers) as executor:
+                    parallel = parallel_kalman.ParallelKalman(
+                        ibm, None, initrv, executor=executor, num_chunks=workers
+                    )
+                    runtime, posterior = timeit(parallel, dataset, times, measmod_list)
+                error = np.abs(posterior.means - reference.means).max()
+                name = "threads" if pool is ThreadPoolExecutor else "processes"
+                print(
+                    f"{N:>8} {name:>10} {workers:>8} {runtime:>10.3f} "
+                    f"{reference_time / runtime:>9.2f} {error:>9.1e}"
+                )
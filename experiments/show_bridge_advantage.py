@@ -13,7 +13,7 @@ import numpy as np
 import pytest
 from probnum import filtsmooth, random_variables, statespace
 from tqdm import tqdm
-from bvps import bvp_solver, problem_examples, quadrature
+from bvps import bvp_solver, problem_examples, quadrature, stopcrit
 
 # bvp = problem_examples.problem_7_second_order(xi=1e-2)
 bvp = problem_examples.problem_20_second_order(xi=1e-2)
@@ -87,6 +87,7 @@ for initial_guess, row_axis in zip([2 * np.ones((N, bvp.dimension)), None], ax):
             initial_posterior=initial_posterior,
             maxit_ieks=MAXIT,
             yield_ieks_iterations=True,
+            stopcrit_ieks=stopcrit.ConstantStopping(maxit=MAXIT),
         )
 
         # Only the first 20 iterations, i.e. the first 4 refinements (since maxit_ieks=5)
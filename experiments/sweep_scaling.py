@@ -0,0 +1,36 @@
+"""Scaling of a parameter sweep with the number of worker processes.
+
+Solve a sweep over problem_20_second_order(xi), ordint and tolerance with
+1, 2, 4, ... workers (up to the number of cores) and report the speedup over
+a single worker.
+
+Usage: python sweep_scaling.py
+"""
+
+import os
+import time
+
+import numpy as np
+
+from bvps import sweep
+
+XIS = np.linspace(0.1, 0.5, 16)
+ORDINTS = [3, 4]
+TOLS = [1e-3, 1e-5]
+
+
+if __name__ == "__main__":
+    problems = [sweep.ProblemFactory("problem_20_second_order", xi=xi) for xi in XIS]
+    tasks = sweep.tasks_from_grid(problems, ORDINTS, TOLS)
+
+    num_cores = os.cpu_count()
+    print(f"{len(tasks)} solves on {num_cores} cores")
+    print(f"{'workers':>8} {'time [s]':>9} {'speedup':>8}")
+    workers, serial_time = 1, None
+    while workers <= num_cores:
+        start = time.time()
+        sweep.run_sweep(tasks, max_workers=workers, blas_threads=1)
+        runtime = time.time() - start
+        serial_time = serial_time or runtime
+        print(f"{workers:>8} {runtime:>9.2f} {serial_time / runtime:>8.2f}")
+        workers *= 2
@@ -0,0 +1,58 @@
+"""Latency of the two-filter smoother against filter-then-smooth.
+
+Filter and smooth one linearisation of problem_20_second_order on a mesh with
+NUM_NODES nodes NUM_REPEATS times, once with the sequential array
+implementation and once with the two-filter smoother, whose forward filter
+runs in a worker process while the backward filter runs in the main process.
+
+Usage: python two_filter_benchmark.py
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from probnum import random_variables, statespace
+
+from bvps import array_kalman, bvp_solver, problem_examples, two_filter_kalman
+
+NUM_NODES = 500
+NUM_REPEATS = 20
+
+
+if __name__ == "__main__":
+    bvp = problem_examples.problem_20_second_order(xi=0.5)
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values(ibm, initial_sigma_squared=1e2)
+    times = np.linspace(bvp.t0, bvp.tmax, NUM_NODES)
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+    states = [random_variables.Constant(0.5 * np.ones(ibm.dimension))] * len(times)
+    measmod_list = solver.linearise_measmod_list(measmod_list, states, times)
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    print(f"{NUM_REPEATS} x {NUM_NODES} nodes, {os.cpu_count()} cores")
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    start = time.time()
+    for _ in range(NUM_REPEATS):
+        reference = arrays.filtsmooth(dataset, times, measmod_list)
+    print(f"filter, then smooth: {time.time() - start:.2f}s")
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        two_filter = two_filter_kalman.TwoFilterKalman(
+            ibm, None, initrv, executor=executor
+        )
+        two_filter.filtsmooth(dataset, times, measmod_list)  # start the worker
+        start = time.time()
+        for _ in range(NUM_REPEATS):
+            posterior = two_filter.filtsmooth(dataset, times, measmod_list)
+        runtime = time.time() - start
+    difference = np.max(np.abs(posterior.means - reference.means))
+    print(f"two-filter: {runtime:.2f}s (max. difference {difference:.1e})")
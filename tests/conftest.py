@@ -0,0 +1,45 @@
+"""Fixtures shared by the tests of the Kalman filter and smoother engines."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import random_variables, statespace
+
+from bvps import bvp_solver, problem_examples
+
+
+@pytest.fixture
+def ibm():
+    return statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.fixture
+def bvp():
+    return problem_examples.problem_7_second_order(xi=0.1)
+
+
+@pytest.fixture
+def solver(ibm):
+    return bvp_solver.BVPSolver.from_default_values(ibm, initial_sigma_squared=1e2)
+
+
+@pytest.fixture
+def times(bvp):
+    return np.linspace(bvp.t0, bvp.tmax, 50)
+
+
+@pytest.fixture
+def measmod_list(solver, bvp, times):
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+    states = [
+        random_variables.Constant(0.5 * np.ones(solver.dynamics_model.dimension))
+    ] * len(times)
+    return solver.linearise_measmod_list(measmod_list, states, times)
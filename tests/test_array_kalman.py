@@ -0,0 +1,114 @@
+"""Test the array-backed Kalman filter against the sequential implementation."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import random_variables
+
+from bvps import array_kalman, bvp_solver, kalman
+
+
+@pytest.fixture
+def times(bvp):
+    return np.linspace(bvp.t0, bvp.tmax, 12)
+
+
+@pytest.fixture
+def posteriors(solver, ibm, times, measmod_list):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    sequential = kalman.MyKalman(ibm, None, initrv)
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    posterior1 = sequential.filtsmooth(dataset, times, measmod_list)
+    posterior2 = arrays.filtsmooth(dataset, times, measmod_list)
+    return (sequential, posterior1), (arrays, posterior2)
+
+
+def test_filtsmooth_matches_sequential(posteriors):
+    (sequential, posterior1), (arrays, posterior2) = posteriors
+
+    np.testing.assert_allclose(posterior1.locations, posterior2.locations)
+    np.testing.assert_allclose(
+        posterior1.states.mean, posterior2.states.mean, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(
+        posterior1.states.cov, posterior2.states.cov, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(sequential.sigmas, arrays.sigmas, rtol=1e-6)
+    assert sequential.normalisation_for_sigmas == arrays.normalisation_for_sigmas
+
+
+def test_call_matches_sequential(posteriors, times):
+    (_, posterior1), (_, posterior2) = posteriors
+
+    locations = np.union1d(np.linspace(times[0], times[-1] + 0.1, 17), times[:3])
+    evaluated1 = posterior1(locations)
+    evaluated2 = posterior2(locations)
+    np.testing.assert_allclose(evaluated1.mean, evaluated2.mean, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(evaluated1.cov, evaluated2.cov, rtol=1e-6, atol=1e-6)
+
+    single = posterior2(0.5 * (times[1] + times[2]))
+    assert isinstance(single, random_variables.Normal)
+
+
+@pytest.mark.parametrize("coord", [None, 0, 1])
+def test_mean_and_var(posteriors, times, coord):
+    (_, posterior1), (_, posterior2) = posteriors
+    locations = np.linspace(times[0], times[-1] + 0.1, 23)
+
+    means, variances = posterior2.mean_and_var(locations, coord=coord)
+    evaluated = posterior2(locations)
+    if coord is None:
+        proj = np.eye(means.shape[1])
+    else:
+        proj = posterior2.transition.proj2coord(coord)
+    np.testing.assert_allclose(means, evaluated.mean @ proj.T)
+    np.testing.assert_allclose(
+        variances, np.diagonal(proj @ evaluated.cov @ proj.T, axis1=1, axis2=2)
+    )
+
+
+def test_as_array_posterior(posteriors, times):
+    (_, posterior1), (_, posterior2) = posteriors
+    assert array_kalman.as_array_posterior(posterior2) is posterior2
+
+    converted = array_kalman.as_array_posterior(posterior1)
+    assert isinstance(converted, array_kalman.ArraySmoothingPosterior)
+    locations = np.union1d(np.linspace(times[0], times[-1] + 0.1, 17), times[:3])
+    means, _ = converted.interpolate_arrays(locations)
+    np.testing.assert_allclose(means, posterior1(locations).mean, rtol=1e-6, atol=1e-6)
+
+
+def test_tria():
+    matrix = np.random.rand(4, 7)
+    cholesky = array_kalman.tria(matrix)
+    assert cholesky.shape == (4, 4)
+    np.testing.assert_allclose(cholesky @ cholesky.T, matrix @ matrix.T)
+    np.testing.assert_allclose(np.triu(cholesky, 1), 0.0)
+
+
+def test_solver_with_array_engine(ibm, bvp):
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    posterior = solver.solve(
+        bvp, atol=1e-3, rtol=1e-3, initial_posterior=initial_posterior, maxit_ieks=2
+    )
+    assert isinstance(posterior, array_kalman.ArraySmoothingPosterior)
+    assert posterior.states.mean.shape == (
+        len(posterior.locations),
+        ibm.dimension,
+    )
+
+
+def test_unknown_engine(ibm):
+    with pytest.raises(ValueError):
+        bvp_solver.BVPSolver.from_default_values(ibm, filtsmooth_engine="unknown")
@@ -0,0 +1,145 @@
+"""Test the asyncio interface to the BVP solver."""
+
+import asyncio
+import functools
+import sys
+import threading
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import async_solver, bvp_solver, problem_examples
+
+
+@pytest.fixture
+def bvp():
+    return problem_examples.problem_20_second_order(xi=0.05)
+
+
+@pytest.fixture
+def make_solver(bvp):
+    def _make_solver():
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        return solver, initial_posterior
+
+    return _make_solver
+
+
+def test_async_solve_matches_solve(bvp, make_solver):
+    solver, initial_posterior = make_solver()
+    expected = solver.solve(bvp, 1e-5, 1e-5, initial_posterior, maxit_ieks=20)
+
+    solver, initial_posterior = make_solver()
+
+    async def collect():
+        generator = async_solver.AsyncBVPSolver(solver).solution_generator(
+            bvp, 1e-5, 1e-5, initial_posterior, maxit_ieks=20
+        )
+        return [posterior async for posterior, _ in generator]
+
+    posteriors = asyncio.run(collect())
+    assert len(posteriors) == len(solver.ieks_iterations)
+    assert solver.status.reason == "converged"
+    np.testing.assert_allclose(posteriors[-1].locations, expected.locations)
+    np.testing.assert_allclose(
+        posteriors[-1].states.mean, expected.states.mean, rtol=1e-10, atol=1e-10
+    )
+
+
+def test_cancel_event_stops_solver(bvp, make_solver):
+    solver, initial_posterior = make_solver()
+    cancel_event = threading.Event()
+    generator = solver.solution_generator(
+        bvp, 1e-5, 1e-5, initial_posterior, maxit_ieks=20, cancel_event=cancel_event
+    )
+    next(generator)
+    prior = solver.context.dynamics_model
+    cancel_event.set()
+    assert next(generator, None) is None
+    assert solver.status.reason == "cancelled"
+    assert len(solver.ieks_iterations) == 1
+
+    # The generator stops before the diffusion is recalibrated.
+    assert solver.context.dynamics_model is prior
+
+
+def test_solve_cancelled_before_first_posterior(bvp, make_solver):
+    solver, initial_posterior = make_solver()
+    cancel_event = threading.Event()
+    cancel_event.set()
+    posterior = solver.solve(
+        bvp, 1e-5, 1e-5, initial_posterior, maxit_ieks=20, cancel_event=cancel_event
+    )
+    assert posterior is None
+    assert solver.status.reason == "cancelled"
+    assert solver.ieks_iterations == []
+
+
+def test_cancellation(bvp, make_solver):
+    solver, initial_posterior = make_solver()
+    posteriors = []
+
+    async def consume():
+        generator = async_solver.AsyncBVPSolver(solver).solution_generator(
+            bvp, 1e-5, 1e-5, initial_posterior, maxit_ieks=20
+        )
+        async for posterior, _ in generator:
+            posteriors.append(posterior)
+
+    async def cancel_after_first_refinement():
+        task = asyncio.ensure_future(consume())
+        while not posteriors:
+            await asyncio.sleep(1e-3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_after_first_refinement())
+    assert solver.status.reason == "cancelled"
+    assert len(posteriors) < 5
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 2])
+def test_gather_solves(bvp, make_solver, max_concurrency):
+    running = 0
+    max_running = 0
+
+    async def solve(solver, initial_posterior):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            return await async_solver.AsyncBVPSolver(solver).solve(
+                bvp, 1e-3, 1e-3, initial_posterior
+            )
+        finally:
+            running -= 1
+
+    solves = [functools.partial(solve, *make_solver()) for _ in range(3)]
+    solutions = asyncio.run(
+        async_solver.gather_solves(solves, max_concurrency=max_concurrency)
+    )
+    assert max_running == max_concurrency
+    assert len(solutions) == 3
+    for solution in solutions[1:]:
+        np.testing.assert_allclose(solution.states.mean, solutions[0].states.mean)
+
+
+def test_gather_solves_invalid_concurrency():
+    with pytest.raises(ValueError):
+        asyncio.run(async_solver.gather_solves([], max_concurrency=0))
@@ -0,0 +1,182 @@
+"""Test the banded Gauss-Newton smoother against the array-backed implementation."""
+
+import functools
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import array_kalman, banded_gauss_newton, bvp_solver, problem_examples
+
+
+@pytest.fixture(
+    params=[
+        functools.partial(problem_examples.problem_7_second_order, xi=0.1),
+        functools.partial(problem_examples.problem_20_second_order, xi=0.1),
+        functools.partial(problem_examples.problem_24_second_order, xi=0.1),
+        problem_examples.problem_28_second_order,
+    ],
+    ids=["problem_7", "problem_20", "problem_24", "problem_28"],
+)
+def bvp(request):
+    return request.param()
+
+
+def test_filtsmooth_matches_arrays(solver, ibm, times, measmod_list):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    posterior1 = arrays.filtsmooth(dataset, times, measmod_list)
+    banded = banded_gauss_newton.BandedGaussNewton(ibm, None, initrv)
+    posterior2 = banded.filtsmooth(dataset, times, measmod_list)
+
+    assert isinstance(posterior2, banded_gauss_newton.BandedSmoothingPosterior)
+    np.testing.assert_allclose(posterior1.means, posterior2.means, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(
+        posterior1.states.cov, posterior2.states.cov, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(
+        posterior1.filtering_posterior.means,
+        posterior2.filtering_posterior.means,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(
+        posterior1.filtering_posterior.states.cov,
+        posterior2.filtering_posterior.states.cov,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(np.sum(arrays.sigmas), np.sum(banded.sigmas), rtol=1e-6)
+    assert arrays.normalisation_for_sigmas == banded.normalisation_for_sigmas
+
+    locations = np.linspace(times[0], times[-1] + 0.1, 77)
+    evaluated1, evaluated2 = posterior1(locations), posterior2(locations)
+    np.testing.assert_allclose(evaluated1.mean, evaluated2.mean, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(evaluated1.std, evaluated2.std, rtol=1e-4, atol=1e-6)
+
+
+def test_non_linear_models_fall_back(solver, ibm, bvp, times):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+
+    banded = banded_gauss_newton.BandedGaussNewton(ibm, None, initrv)
+    posterior = banded.filtsmooth(dataset, times, measmod_list)
+    assert not isinstance(posterior, banded_gauss_newton.BandedSmoothingPosterior)
+
+
+@pytest.mark.parametrize("N,D", [(1, 3), (6, 2)])
+def test_selected_inversion(N, D):
+    # Blocks of a lower block-bidiagonal Cholesky factor L
+    diagonal = np.tril(np.random.rand(N, D, D)) + D * np.eye(D)
+    subdiagonal = np.random.rand(N - 1, D, D)
+    banded = banded_gauss_newton.to_lower_banded(diagonal, subdiagonal)
+    received = banded_gauss_newton.from_lower_banded(banded, N, D)
+    np.testing.assert_allclose(received[0], diagonal)
+    np.testing.assert_allclose(received[1], subdiagonal)
+
+    factor = np.tril(banded_gauss_newton._banded_to_dense(banded))
+    inverse = np.linalg.inv(factor @ factor.T)
+    covs, cross_covs = banded_gauss_newton.selected_inversion(diagonal, subdiagonal)
+    for n in range(N):
+        np.testing.assert_allclose(
+            covs[n], inverse[n * D : (n + 1) * D, n * D : (n + 1) * D]
+        )
+    for n in range(N - 1):
+        np.testing.assert_allclose(
+            cross_covs[n], inverse[(n + 1) * D : (n + 2) * D, n * D : (n + 1) * D]
+        )
+
+
+def test_solver_with_banded_engine(ibm, bvp):
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="banded"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    posterior = solver.solve(
+        bvp,
+        atol=1e-3,
+        rtol=1e-3,
+        initial_posterior=initial_posterior,
+        maxit_ieks=2,
+    )
+    assert isinstance(posterior, banded_gauss_newton.BandedSmoothingPosterior)
+
+
+@pytest.mark.parametrize("tol", [1e-3, 1e-4])
+def test_solver_matches_arrays_engine(bvp, tol):
+    posteriors = []
+    for engine in ["arrays", "banded"]:
+        ibm = statespace.IBM(
+            ordint=3,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine=engine
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=tol,
+                rtol=tol,
+                initial_posterior=initial_posterior,
+                maxit_ieks=5,
+            )
+        )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].means, posteriors[1].means, rtol=1e-6, atol=1e-6
+    )
+
+
+@pytest.mark.parametrize("ordint", [2, 3, 4, 5])
+def test_solver_matches_arrays_engine_problem_24(ordint):
+    # Fine meshes make the normal equations too ill-conditioned for the banded
+    # Cholesky factorisation, so the engine has to fall back.
+    bvp = problem_examples.problem_24_second_order(xi=0.1)
+    posteriors = []
+    for engine in ["arrays", "banded"]:
+        ibm = statespace.IBM(
+            ordint=ordint,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine=engine
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-5,
+                rtol=1e-5,
+                initial_posterior=initial_posterior,
+                maxit_ieks=10,
+            )
+        )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    # The highest derivatives are too ill-conditioned to agree to the digit.
+    np.testing.assert_allclose(
+        posteriors[0].means[:, :2], posteriors[1].means[:, :2], rtol=1e-6, atol=1e-6
+    )
@@ -0,0 +1,142 @@
+"""Test the batched solves of a problem family."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import batched_solver, bvp_solver, problem_examples
+
+
+@pytest.fixture
+def bvps():
+    return [problem_examples.problem_20_second_order(xi) for xi in [0.1, 0.2, 0.5]]
+
+
+def make_solver(bvp):
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    return solver, initial_posterior
+
+
+def test_batch_of_one_matches_solver(bvps):
+    bvp = bvps[0]
+    solver, initial_posterior = make_solver(bvp)
+    expected = solver.solve(
+        bvp,
+        atol=1e-5,
+        rtol=1e-5,
+        initial_posterior=initial_posterior,
+        maxit_ieks=20,
+        relinearisation_threshold=None,
+    )
+    expected_ieks_iterations = solver.ieks_iterations
+
+    solver, initial_posterior = make_solver(bvp)
+    batched = batched_solver.BatchedBVPSolver(solver)
+    (received,) = batched.solve(
+        [bvp],
+        atol=1e-5,
+        rtol=1e-5,
+        initial_posteriors=[initial_posterior],
+        maxit_ieks=20,
+    )
+    assert batched.ieks_iterations == expected_ieks_iterations
+    np.testing.assert_allclose(received.locations, expected.locations)
+    np.testing.assert_allclose(
+        received.means[:, :2], expected.states.mean[:, :2], rtol=1e-6, atol=1e-8
+    )
+
+
+def test_batch(bvps):
+    initial_posteriors = [make_solver(bvp)[1] for bvp in bvps]
+    solver, _ = make_solver(bvps[0])
+    batched = batched_solver.BatchedBVPSolver(solver)
+
+    num_refinements = 0
+    for posteriors, sigma_squared in batched.solution_generator(
+        bvps, atol=1e-5, rtol=1e-5, initial_posteriors=initial_posteriors, maxit_ieks=20
+    ):
+        num_refinements += 1
+        assert len(posteriors) == len(bvps)
+        assert sigma_squared.shape == (len(bvps),)
+    assert num_refinements == len(batched.ieks_iterations)
+    assert np.all(batched.converged)
+
+    # The smoothest instance is split off the batch first
+    assert len(posteriors[-1].locations) < len(posteriors[0].locations)
+
+    t = np.linspace(0.0, 1.0, 7)
+    for bvp, posterior in zip(bvps, posteriors):
+        solver, initial_posterior = make_solver(bvp)
+        expected = solver.solve(
+            bvp,
+            atol=1e-5,
+            rtol=1e-5,
+            initial_posterior=initial_posterior,
+            maxit_ieks=20,
+        )
+        np.testing.assert_allclose(
+            posterior(t).mean[:, 0], expected(t).mean[:, 0], rtol=1e-5, atol=1e-5
+        )
+
+
+def test_interpolate_matches_posteriors(bvps):
+    initial_posteriors = [make_solver(bvp)[1] for bvp in bvps]
+    solver, _ = make_solver(bvps[0])
+    batched = batched_solver.BatchedBVPSolver(solver)
+    posteriors, sigma_squared = next(
+        batched.solution_generator(
+            bvps, atol=1e-5, rtol=1e-5, initial_posteriors=initial_posteriors
+        )
+    )
+
+    times = posteriors[0].locations
+    t = np.sort(np.concatenate((times[::3], np.linspace(0.01, 0.99, 11))))
+    means, cov_choleskies = batched_solver.interpolate(
+        t,
+        times,
+        solver.dynamics_model,
+        solver.initial_sigma_squared * sigma_squared,
+        [
+            np.stack([getattr(p.filtering_posterior, name) for p in posteriors])
+            for name in ["means", "cov_choleskies"]
+        ],
+        [
+            np.stack([getattr(p, name) for p in posteriors])
+            for name in ["means", "cov_choleskies"]
+        ],
+    )
+    for posterior, mean, cov_cholesky in zip(posteriors, means, cov_choleskies):
+        expected = posterior(t)
+        np.testing.assert_allclose(mean, expected.mean, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(
+            cov_cholesky @ np.swapaxes(cov_cholesky, -1, -2),
+            expected.cov,
+            rtol=1e-8,
+            atol=1e-14,
+        )
+
+
+def test_different_domains_are_rejected(bvps):
+    bvps = [bvps[0], problem_examples.problem_7_second_order(xi=0.1)]
+    initial_posteriors = [make_solver(bvp)[1] for bvp in bvps]
+    solver, _ = make_solver(bvps[0])
+    with pytest.raises(ValueError):
+        batched_solver.BatchedBVPSolver(solver).solve(
+            bvps, atol=1e-3, rtol=1e-3, initial_posteriors=initial_posteriors
+        )
@@ -2,8 +2,65 @@ import pytest
 import sys
 
 sys.path.append("..")
-from bvps.bridges import GaussMarkovBridge
+import numpy as np
+from probnum import random_variables, statespace
+
+from bvps import problem_examples
+from bvps.bridges import GaussMarkovBridge, TwoFilterBridge
 
 
 def test_sth():
     assert True
+
+
+@pytest.fixture
+def bvp():
+    return problem_examples.problem_7_second_order(xi=0.1)
+
+
+@pytest.fixture
+def ibm():
+    return statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.fixture
+def times(bvp):
+    return np.linspace(bvp.t0, bvp.tmax, 20)
+
+
+@pytest.fixture
+def initrv(ibm):
+    return random_variables.Normal(
+        np.ones(ibm.dimension),
+        1e2 * np.eye(ibm.dimension),
+        cov_cholesky=1e1 * np.eye(ibm.dimension),
+    )
+
+
+@pytest.mark.parametrize("precompute", [True, False])
+def test_two_filter_bridge_matches_bridge(ibm, bvp, times, initrv, precompute):
+    bridge = GaussMarkovBridge(ibm, bvp)
+    two_filter_bridge = TwoFilterBridge(ibm, bvp, times=times if precompute else None)
+
+    rv1 = bridge.initialise_boundary_conditions(initrv)
+    rv2 = two_filter_bridge.initialise_boundary_conditions(initrv)
+    for t, dt in zip(times[:-1], np.diff(times)):
+        rv1, _ = bridge.forward_rv(rv1, t, dt=dt)
+        rv2, _ = two_filter_bridge.forward_rv(rv2, t, dt=dt)
+        np.testing.assert_allclose(rv1.mean, rv2.mean, rtol=1e-7, atol=1e-7)
+        np.testing.assert_allclose(rv1.cov, rv2.cov, rtol=1e-6, atol=1e-7)
+
+
+def test_boundary_information_off_mesh(ibm, bvp, times):
+    on_mesh = TwoFilterBridge(ibm, bvp, times=times)
+    off_mesh = TwoFilterBridge(ibm, bvp)
+    for t in [times[3], 0.5 * (times[3] + times[4])]:
+        H1, L1 = on_mesh.boundary_information(t)
+        H2, L2 = off_mesh.boundary_information(t)
+        np.testing.assert_allclose(H1, H2)
+        np.testing.assert_allclose(L1 @ L1.T, L2 @ L2.T, atol=1e-12)
@@ -0,0 +1,93 @@
+"""Test the budgets of the BVP solver."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import budgets, bvp_solver, problem_examples
+
+
+def test_max_refinements():
+    budget = budgets.Budget(max_refinements=2)
+    assert budget.exceeded(10, 20, dimension=3) is None
+    assert budget.exceeded(20, 40, dimension=3) is None
+    assert budget.exceeded(40, 80, dimension=3) == "max_refinements"
+    assert budget.num_refinements == 2
+
+    budget.start()
+    assert budget.num_refinements == 0
+
+
+def test_max_posterior_bytes():
+    budget = budgets.Budget()
+    nbytes = budget.posterior_nbytes(num_nodes=11, dimension=3)
+    assert nbytes == (11 + 3 * 10) * 3 * 4 * 8
+
+    budget = budgets.Budget(max_posterior_bytes=nbytes)
+    assert budget.exceeded(5, 11, dimension=3) is None
+    assert budget.exceeded(11, 12, dimension=3) == "max_posterior_bytes"
+
+
+def test_max_time():
+    assert budgets.Budget(max_time=1e3).exceeded(10, 20, dimension=3) is None
+    assert budgets.Budget(max_time=0.0).exceeded(10, 20, dimension=3) == "max_time"
+
+
+@pytest.fixture
+def solve():
+    bvp = problem_examples.problem_20_second_order(xi=0.05)
+
+    def _solve(budget):
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        solution = solver.solve(
+            bvp,
+            atol=1e-5,
+            rtol=1e-5,
+            initial_posterior=initial_posterior,
+            maxit_ieks=20,
+            budget=budget,
+        )
+        return solver, solution
+
+    return _solve
+
+
+def test_solver_converges_within_budget(solve):
+    solver, solution = solve(budget=None)
+    assert solver.status.reason == "converged"
+    assert solver.status.error < 1.0
+    assert solver.status.num_nodes == len(solution.locations)
+    assert solver.status.num_refinements == len(solver.ieks_iterations) - 1
+
+
+@pytest.mark.parametrize(
+    "budget, reason",
+    [
+        (budgets.Budget(max_nodes=50), "max_nodes"),
+        (budgets.Budget(max_refinements=1), "max_refinements"),
+        (budgets.Budget(max_posterior_bytes=40_000), "max_posterior_bytes"),
+    ],
+)
+def test_solver_stops_at_budget(solve, budget, reason):
+    solver, solution = solve(budget=budget)
+    assert solver.status.reason == reason
+    assert solver.status.error >= 1.0
+    assert solver.status.num_nodes == len(solution.locations)
+    assert budget.max_nodes is None or len(solution.locations) <= budget.max_nodes
+    assert solver.status.num_refinements == len(solver.ieks_iterations) - 1
@@ -1,4 +1,6 @@
 """Test for BVP solver."""
+
+import dataclasses
 import sys
 
 sys.path.append("..")
@@ -6,8 +8,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pytest
 from probnum import filtsmooth, random_variables, statespace
+from probnum._randomvariablelist import _RandomVariableList
 
-from bvps import bvp_solver, problem_examples, quadrature
+from bvps import bvp_solver, problem_examples, quadrature, stopcrit
 
 
 @pytest.fixture
@@ -177,3 +180,290 @@ def test_full_iteration(bvp, solver):
 
     N, d = len(t), solver.dynamics_model.dimension
     assert y.shape == (N, d)
+
+
+@pytest.mark.parametrize(
+    "estimator",
+    [bvp_solver.ErrorViaResidual, bvp_solver.ErrorViaProbabilisticResidual],
+)
+def test_residual_error_estimators_batched(bvp, estimator):
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    quadrule = quadrature.QuadratureRule(
+        nodes=[0.3, 0.5, 0.6], weights=[1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0], order=5
+    )
+    error_estimator = estimator(
+        atol=1e-3,
+        rtol=1e-3,
+        quadrature_rule=quadrule,
+        P0=ibm.proj2coord(0),
+        P1=ibm.proj2coord(1),
+    )
+    solver = bvp_solver.BVPSolver.from_default_values(ibm)
+    ode, _, _ = solver.choose_measurement_model(bvp)
+
+    mesh = np.linspace(bvp.t0, bvp.tmax, 6)
+    candidates = bvp_solver.construct_candidate_nodes(mesh, quadrule.nodes)
+    evaluated_posterior = _RandomVariableList(
+        [
+            random_variables.Normal(
+                np.random.rand(ibm.dimension), 0.1 * np.eye(ibm.dimension)
+            )
+            for _ in candidates
+        ]
+    )
+
+    batched, _ = error_estimator.estimate_error_per_interval(
+        evaluated_posterior, candidates, mesh, 2.0, [ode] * len(candidates)
+    )
+    # Distinct measurement models force the per-point evaluation
+    measmods = [ode] + [solver.choose_measurement_model(bvp)[0] for _ in candidates[1:]]
+    pointwise, _ = error_estimator.estimate_error_per_interval(
+        evaluated_posterior, candidates, mesh, 2.0, measmods
+    )
+    np.testing.assert_allclose(batched, pointwise)
+
+
+def test_collect_linearisation_points(bvp):
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    times = np.linspace(bvp.t0, bvp.tmax, 10)
+    ode, left, right = solver.choose_measurement_model(bvp)
+    measmod_list = solver.create_measmod_list(ode, left, right, times)
+    states = [random_variables.Constant(np.ones(ibm.dimension))] * len(times)
+    lin_measmod_list = solver.linearise_measmod_list(measmod_list, states, times)
+    filter_object = solver.setup_filter_object(bvp)
+    posterior = filter_object.filtsmooth(
+        np.zeros((len(times), 1)), times, lin_measmod_list
+    )
+
+    quadrature_nodes = solver.error_estimator.quadrature_rule.nodes
+    candidates = bvp_solver.construct_candidate_nodes(times, quadrature_nodes)
+    evaluated_candidates = posterior(candidates)
+    error_per_interval = np.linspace(0.0, 100.0, len(times) - 1)
+    new_mesh, _ = bvp_solver.refine_mesh(
+        times, error_per_interval, solver.localconvrate, quadrature_nodes
+    )
+    assert len(new_mesh) > len(times)
+
+    # Includes a point that is neither a location nor a candidate node
+    new_mesh = np.union1d(new_mesh, 0.5 * (times[0] + candidates[0]))
+    merged = bvp_solver.collect_linearisation_points(
+        new_mesh, posterior, candidates, evaluated_candidates
+    )
+    expected = posterior(new_mesh)
+    np.testing.assert_allclose(merged.mean, expected.mean)
+    np.testing.assert_allclose(merged.cov, expected.cov)
+
+
+def test_ieks_iterations_stop_early(bvp):
+    # Without the declaration, the (linear) problem is solved with one pass.
+    bvp = dataclasses.replace(bvp, linear=False)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    posteriors, iterations = [], []
+    for stopcrit_ieks in [None, stopcrit.ConstantStopping(maxit=100)]:
+        # The solver recalibrates the prior in place, so each run gets a new one.
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        gen = solver.solution_generator(
+            bvp,
+            atol=1e-6,
+            rtol=1e-6,
+            initial_posterior=initial_posterior,
+            maxit_ieks=5,
+            stopcrit_ieks=stopcrit_ieks,
+        )
+        for refinement, (posterior, _) in enumerate(gen):
+            assert len(solver.ieks_iterations) == refinement + 1
+        posteriors.append(posterior)
+        iterations.append(solver.ieks_iterations)
+
+    early, fixed = iterations
+    assert all(n == 5 for n in fixed)
+    assert all(1 <= n < 5 for n in early)
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].states.mean @ ibm.proj2coord(0).T,
+        posteriors[1].states.mean @ ibm.proj2coord(0).T,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+
+
+@pytest.mark.parametrize("linear", [None, False])
+def test_linear_problems_need_one_pass(bvp, linear):
+    bvp = dataclasses.replace(bvp, linear=linear)
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    ode, _, _ = solver.choose_measurement_model(bvp)
+    assert solver.is_linear(bvp, ode) == (linear is None)
+
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    solver.solve(
+        bvp, atol=1e-6, rtol=1e-6, initial_posterior=initial_posterior, maxit_ieks=5
+    )
+    if linear is None:
+        assert all(n == 1 for n in solver.ieks_iterations)
+    else:
+        assert any(n > 1 for n in solver.ieks_iterations)
+
+
+def test_coarsen_mesh():
+    mesh = np.linspace(0.0, 1.0, 9)
+    error_per_interval = np.full(len(mesh) - 1, 1e-6)
+    coarsened = bvp_solver.coarsen_mesh(mesh, error_per_interval, localconvrate=4)
+
+    # Every interval is merged at most once.
+    np.testing.assert_allclose(coarsened, mesh[::2])
+
+    # The boundary nodes and at least three nodes remain.
+    coarsened = bvp_solver.coarsen_mesh(mesh[:4], error_per_interval[:3], 4)
+    assert len(coarsened) == 3
+    assert coarsened[0] == mesh[0] and coarsened[-1] == mesh[3]
+
+
+def test_coarsen_mesh_hysteresis():
+    mesh = np.array([0.0, 0.25, 0.5, 1.0])
+    localconvrate = 4
+
+    # Merging would predict an error of 2 ** 4 * 0.01 = 0.16 > 0.1.
+    error_per_interval = np.array([0.01, 0.01, 0.5])
+    coarsened = bvp_solver.coarsen_mesh(
+        mesh, error_per_interval, localconvrate, threshold=0.1
+    )
+    np.testing.assert_allclose(coarsened, mesh)
+
+    # A merged interval is not refined again.
+    error_per_interval = np.array([0.005, 0.005, 0.5])
+    coarsened = bvp_solver.coarsen_mesh(
+        mesh, error_per_interval, localconvrate, threshold=0.1
+    )
+    np.testing.assert_allclose(coarsened, [0.0, 0.5, 1.0])
+    predicted_error = [2 ** localconvrate * 0.005, 0.5]
+    refined, acceptable = bvp_solver.refine_mesh(
+        coarsened, predicted_error, localconvrate, [0.3, 0.5, 0.7]
+    )
+    np.testing.assert_allclose(refined, coarsened)
+    assert np.all(acceptable)
+
+
+def test_solver_reports_removed_nodes(bvp):
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    solver.solve(
+        bvp,
+        atol=1e-5,
+        rtol=1e-5,
+        initial_posterior=initial_posterior,
+        coarsening_threshold=0.1,
+    )
+    assert len(solver.removed_nodes) == len(solver.ieks_iterations) - 1
+    assert all(n >= 0 for n in solver.removed_nodes)
+
+
+def test_equidistribute_mesh():
+    mesh = np.array([0.0, 0.5, 1.0])
+
+    error_per_interval = np.array([0.5, 0.1])
+    new_mesh, acceptable = bvp_solver.equidistribute_mesh(
+        mesh, error_per_interval, localconvrate=4
+    )
+    np.testing.assert_allclose(new_mesh, mesh)
+    assert np.all(acceptable)
+
+    # Equal errors give a uniform mesh, and the growth budget is respected.
+    error_per_interval = np.array([1e8, 1e8])
+    new_mesh, acceptable = bvp_solver.equidistribute_mesh(
+        mesh, error_per_interval, localconvrate=4, growth_factor=3.0
+    )
+    np.testing.assert_allclose(new_mesh, np.linspace(0.0, 1.0, 9))
+    assert not np.any(acceptable)
+
+    # Larger errors attract more nodes.
+    error_per_interval = np.array([100.0, 1.0])
+    new_mesh, _ = bvp_solver.equidistribute_mesh(
+        mesh, error_per_interval, localconvrate=4
+    )
+    assert np.count_nonzero(new_mesh < 0.5) > np.count_nonzero(new_mesh > 0.5)
+
+
+def test_unknown_mesh_refinement():
+    ibm = statespace.IBM(ordint=2, spatialdim=1)
+    with pytest.raises(ValueError):
+        bvp_solver.BVPSolver.from_default_values(ibm, mesh_refinement="bisect")
+
+
+@pytest.mark.parametrize("mesh_refinement", ["insert", "equidistribute"])
+def test_mesh_refinement(mesh_refinement):
+    bvp = problem_examples.problem_20_second_order(xi=0.1)
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm,
+        initial_sigma_squared=1e2,
+        filtsmooth_engine="arrays",
+        mesh_refinement=mesh_refinement,
+    )
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    solution = solver.solve(
+        bvp, atol=1e-5, rtol=1e-5, initial_posterior=initial_posterior
+    )
+
+    t = np.linspace(bvp.t0, bvp.tmax, 50)
+    np.testing.assert_allclose(
+        solution(t).mean[:, 0], bvp.solution(t), rtol=1e-3, atol=1e-3
+    )
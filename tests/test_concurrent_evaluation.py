@@ -0,0 +1,106 @@
+"""Test the concurrent evaluation of the ODE on the mesh."""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, concurrent_evaluation, ode_measmods, problem_examples
+
+
+def squares(t, x):
+    return x ** 2 + t[:, None]
+
+
+@pytest.fixture
+def bvp():
+    return problem_examples.problem_20_second_order(xi=0.2)
+
+
+@pytest.fixture
+def ibm():
+    return statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.mark.parametrize("executor_type", [ThreadPoolExecutor, ProcessPoolExecutor])
+@pytest.mark.parametrize("num_chunks,min_chunk_size", [(1, 1), (3, 1), (8, 4)])
+def test_chunked_mesh_function(executor_type, num_chunks, min_chunk_size):
+    times, means = np.linspace(0.0, 1.0, 10), np.random.rand(10, 3)
+    with executor_type(max_workers=2) as executor:
+        chunked = concurrent_evaluation.ChunkedMeshFunction(
+            squares, executor, num_chunks, min_chunk_size=min_chunk_size
+        )
+        np.testing.assert_allclose(chunked(times, means), squares(times, means))
+
+
+def test_wrap(bvp, ibm):
+    measmod = ode_measmods.from_ode(bvp, ibm)
+    times = np.linspace(bvp.t0, bvp.tmax, 11)
+    means = np.random.rand(len(times), ibm.dimension)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        evaluation = concurrent_evaluation.ConcurrentMeshEvaluation(
+            executor, num_chunks=3
+        )
+        wrapped = evaluation.wrap(measmod)
+        assert wrapped.mesh_state_trans_fun is not measmod.mesh_state_trans_fun
+
+        for model1, model2 in zip(
+            measmod.linearize_means_on_mesh(times, means),
+            wrapped.linearize_means_on_mesh(times, means),
+        ):
+            np.testing.assert_allclose(model1.state_trans_mat, model2.state_trans_mat)
+            np.testing.assert_allclose(model1.shift_vec, model2.shift_vec)
+
+        cov_choleskies = np.random.rand(len(times), ibm.dimension, ibm.dimension)
+        residuals1 = measmod.forward_moments_on_mesh(times, means, cov_choleskies)
+        residuals2 = wrapped.forward_moments_on_mesh(times, means, cov_choleskies)
+        np.testing.assert_allclose(residuals1[0], residuals2[0])
+        np.testing.assert_allclose(residuals1[1], residuals2[1])
+
+
+def test_invalid_chunks():
+    with pytest.raises(ValueError):
+        concurrent_evaluation.ConcurrentMeshEvaluation(None, num_chunks=0)
+
+
+def test_solver_with_mesh_evaluation(bvp):
+    posteriors = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for mesh_evaluation in [
+            None,
+            concurrent_evaluation.ConcurrentMeshEvaluation(executor, num_chunks=4),
+        ]:
+            ibm = statespace.IBM(
+                ordint=3,
+                spatialdim=1,
+                forward_implementation="sqrt",
+                backward_implementation="sqrt",
+            )
+            solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+                ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+            )
+            initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+            initial_guess = np.ones((len(initial_grid), bvp.dimension))
+            initial_posterior, _ = solver.compute_initialisation(
+                bvp, initial_grid, initial_guess=initial_guess
+            )
+            posteriors.append(
+                solver.solve(
+                    bvp,
+                    atol=1e-4,
+                    rtol=1e-4,
+                    initial_posterior=initial_posterior,
+                    maxit_ieks=10,
+                    mesh_evaluation=mesh_evaluation,
+                )
+            )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(posteriors[0].means, posteriors[1].means)
@@ -0,0 +1,95 @@
+"""Test the domain decomposition of the Kalman filter and smoother."""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import array_kalman, bvp_solver, domain_decomposition, problem_examples
+
+
+def test_decomposed_scan():
+    elements = (np.random.rand(21), np.random.rand(21, 2))
+    add = lambda a, b: tuple(x + y for x, y in zip(a, b))
+    for num_pieces in [1, 4, 21]:
+        pieces = [
+            lambda start=start, end=end: tuple(e[start:end] for e in elements)
+            for start, end in domain_decomposition.piece_bounds(21, num_pieces)
+        ]
+        scanned = domain_decomposition.decomposed_scan(add, pieces)
+        np.testing.assert_allclose(scanned[0], np.cumsum(elements[0]))
+        np.testing.assert_allclose(scanned[1], np.cumsum(elements[1], axis=0))
+
+
+@pytest.mark.parametrize(
+    "num_pieces,use_executor", [(1, False), (3, False), (4, True), (50, False)]
+)
+def test_filtsmooth_matches_arrays(
+    solver, ibm, times, measmod_list, num_pieces, use_executor
+):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    posterior1 = arrays.filtsmooth(dataset, times, measmod_list)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        decomposed = domain_decomposition.DomainDecompositionKalman(
+            ibm,
+            None,
+            initrv,
+            executor=executor if use_executor else None,
+            num_pieces=num_pieces,
+        )
+        posterior2 = decomposed.filtsmooth(dataset, times, measmod_list)
+
+    np.testing.assert_allclose(
+        posterior1.filtering_posterior.means,
+        posterior2.filtering_posterior.means,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(posterior1.means, posterior2.means, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(
+        posterior1.states.cov, posterior2.states.cov, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(arrays.sigmas, decomposed.sigmas, rtol=1e-6)
+
+
+def test_solver_with_decomposed_engine():
+    bvp = problem_examples.problem_20_second_order(xi=0.2)
+    posteriors = []
+    for engine, options in [("arrays", {}), ("decomposed", {"num_pieces": 3})]:
+        ibm = statespace.IBM(
+            ordint=3,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm,
+            initial_sigma_squared=1e2,
+            filtsmooth_engine=engine,
+            filtsmooth_options=options,
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-4,
+                rtol=1e-4,
+                initial_posterior=initial_posterior,
+                maxit_ieks=10,
+            )
+        )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].means[:, 0], posteriors[1].means[:, 0], rtol=1e-6, atol=1e-6
+    )
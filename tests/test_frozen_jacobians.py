@@ -0,0 +1,117 @@
+"""Test the IEKS with frozen Jacobians (simplified Newton)."""
+
+import dataclasses
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, frozen_jacobians, ode_measmods, problem_examples
+
+
+@pytest.fixture
+def measmod():
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    bvp = problem_examples.problem_20_second_order(xi=0.1)
+    return ode_measmods.from_ode(bvp, ibm)
+
+
+@pytest.fixture
+def frozen():
+    return frozen_jacobians.FrozenJacobians(max_contraction=0.5)
+
+
+@pytest.fixture
+def times():
+    return np.linspace(0.0, 1.0, 6)
+
+
+@pytest.fixture
+def means(times):
+    return np.random.rand(len(times), 4)
+
+
+def test_reuses_jacobians(measmod, frozen, times, means):
+    first = frozen.linearize_on_mesh(measmod, times, means)
+    expected = measmod.linearize_means_on_mesh(times, means)
+    for e, r in zip(expected, first):
+        np.testing.assert_allclose(r.state_trans_mat, e.state_trans_mat)
+        np.testing.assert_allclose(r.shift_vec, e.shift_vec)
+
+    new_means = means + 0.1
+    second = frozen.linearize_on_mesh(measmod, times, new_means)
+    residuals, _ = measmod.forward_moments_on_mesh(times, new_means)
+    for f, s, x, r in zip(first, second, new_means, residuals):
+        np.testing.assert_allclose(s.state_trans_mat, f.state_trans_mat)
+        np.testing.assert_allclose(s.state_trans_mat @ x + s.shift_vec, r)
+
+    assert frozen.jacobian_info() == (len(times), 2 * len(times), 0, 0)
+
+
+def test_rejects_diverging_step(measmod, frozen, times, means):
+    frozen.linearize_on_mesh(measmod, times, means)
+    frozen.linearize_on_mesh(measmod, times, means + 0.1)
+    received = frozen.linearize_on_mesh(measmod, times, means + 1.0)
+
+    # Newton step from the previous point
+    expected = measmod.linearize_means_on_mesh(times, means + 0.1)
+    for e, r in zip(expected, received):
+        np.testing.assert_allclose(r.state_trans_mat, e.state_trans_mat)
+        np.testing.assert_allclose(r.shift_vec, e.shift_vec)
+    assert frozen.rejections == 1
+    assert frozen.jacobian_evaluations == 2 * len(times)
+
+
+def test_new_mesh_refreshes(measmod, frozen, times, means):
+    frozen.linearize_on_mesh(measmod, times, means)
+    frozen.linearize_on_mesh(measmod, times[::2], means[::2])
+    assert frozen.jacobian_evaluations == len(times) + len(times[::2])
+
+
+def test_solver_with_frozen_jacobians():
+    bvp = problem_examples.problem_23_second_order(xi=0.25)
+    bvp = dataclasses.replace(bvp, linear=False)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    posteriors = []
+    for frozen in [None, frozen_jacobians.FrozenJacobians()]:
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-6,
+                rtol=1e-6,
+                initial_posterior=initial_posterior,
+                maxit_ieks=20,
+                frozen_jacobians=frozen,
+            )
+        )
+
+    info = frozen.jacobian_info()
+    assert info.jacobian_evaluations < info.residual_evaluations
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].states.mean[:, 0],
+        posteriors[1].states.mean[:, 0],
+        rtol=1e-5,
+        atol=1e-5,
+    )
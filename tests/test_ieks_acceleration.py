@@ -0,0 +1,97 @@
+"""Test the acceleration of the IEKS fixed-point iteration."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, ieks_acceleration, problem_examples
+
+
+@pytest.fixture
+def linear_fixed_point_problem():
+    # g(x) = A x + b with spectral radius 0.95; plain iteration converges slowly.
+    rng = np.random.default_rng(2)
+    Q, _ = np.linalg.qr(rng.standard_normal((5, 5)))
+    A = Q @ np.diag([0.95, 0.9, 0.5, -0.5, 0.1]) @ Q.T
+    b = rng.standard_normal(5)
+    solution = np.linalg.solve(np.eye(5) - A, b)
+    return (lambda x: A @ x + b), solution
+
+
+def iterations_until_converged(g, solution, step, maxit=1000):
+    x = np.zeros_like(solution)
+    for k in range(maxit):
+        if np.linalg.norm(x - solution) < 1e-10:
+            return k
+        x = step(x, g(x))
+    return maxit
+
+
+def test_anderson_beats_plain_iteration(linear_fixed_point_problem):
+    g, solution = linear_fixed_point_problem
+    anderson = ieks_acceleration.AndersonAcceleration(memory=5)
+
+    plain = iterations_until_converged(g, solution, lambda x, gx: gx)
+    accelerated = iterations_until_converged(g, solution, anderson)
+    assert plain > 200
+    assert accelerated < 20
+
+
+def test_restart_on_growing_residual():
+    anderson = ieks_acceleration.AndersonAcceleration(memory=2)
+    anderson(np.zeros(2), np.ones(2))
+    anderson(np.ones(2), 1.1 * np.ones(2))
+    assert anderson.num_restarts == 0
+
+    # The residual grows, so the plain step is taken.
+    received = anderson(1.1 * np.ones(2), 5.0 * np.ones(2))
+    np.testing.assert_allclose(received, 5.0 * np.ones(2))
+    assert anderson.num_restarts == 1
+
+
+def test_invalid_memory():
+    with pytest.raises(ValueError):
+        ieks_acceleration.AndersonAcceleration(memory=0)
+
+
+def test_solver_with_anderson_acceleration():
+    bvp = problem_examples.problem_24_second_order(xi=0.1)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    posteriors = []
+    for acceleration in [None, ieks_acceleration.AndersonAcceleration(memory=2)]:
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-5,
+                rtol=1e-5,
+                initial_posterior=initial_posterior,
+                maxit_ieks=20,
+                acceleration=acceleration,
+            )
+        )
+        assert len(solver.ieks_iterations) > 0
+
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].states.mean[:, 0],
+        posteriors[1].states.mean[:, 0],
+        rtol=1e-4,
+        atol=1e-4,
+    )
@@ -0,0 +1,141 @@
+"""Test the line search that damps the IEKS iteration."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, line_search, problem_examples
+
+
+@pytest.fixture
+def backtracking():
+    return line_search.BacktrackingLineSearch(
+        shrink=0.5, min_step_size=0.25, sufficient_decrease=0.25
+    )
+
+
+def test_first_point_is_accepted(backtracking):
+    x = np.zeros(2)
+    next_point, accepted = backtracking(x, merit=1e10)
+    assert accepted
+    np.testing.assert_allclose(next_point, x)
+
+
+def test_backtracking(backtracking):
+    x, g = np.zeros(2), np.ones(2)
+    backtracking(x, merit=1.0)
+    backtracking.set_step(g)
+
+    # A full step must decrease the merit below (1 - 2 * 0.25) * 1.0.
+    next_point, accepted = backtracking(g, merit=0.6)
+    assert not accepted
+    np.testing.assert_allclose(next_point, 0.5 * g)
+
+    next_point, accepted = backtracking(0.5 * g, merit=0.9)
+    assert not accepted
+    np.testing.assert_allclose(next_point, 0.25 * g)
+    assert backtracking.num_rejections == 2
+
+    # The minimal step size is reached, so the point is accepted anyway.
+    next_point, accepted = backtracking(0.25 * g, merit=2.0)
+    assert accepted
+    np.testing.assert_allclose(next_point, 0.25 * g)
+    assert backtracking.step_size == 1.0
+
+
+def test_sufficient_decrease(backtracking):
+    x, g = np.zeros(2), np.ones(2)
+    backtracking(x, merit=1.0)
+    backtracking.set_step(g)
+    _, accepted = backtracking(g, merit=0.6)
+    assert not accepted
+
+    # Half a step only needs to reach (1 - 2 * 0.25 * 0.5) * 1.0.
+    _, accepted = backtracking(0.5 * g, merit=0.7)
+    assert accepted
+
+
+def test_non_finite_merit_is_rejected(backtracking):
+    backtracking(np.zeros(2), merit=1.0)
+    backtracking.set_step(np.ones(2))
+    _, accepted = backtracking(np.ones(2), merit=np.nan)
+    assert not accepted
+
+
+def test_reset(backtracking):
+    backtracking(np.zeros(2), merit=1.0)
+    backtracking.set_step(np.ones(2))
+    backtracking.reset()
+    _, accepted = backtracking(np.ones(2), merit=2.0)
+    assert accepted
+
+
+@pytest.mark.parametrize("kwargs", [dict(shrink=1.0), dict(sufficient_decrease=1.0)])
+def test_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        line_search.BacktrackingLineSearch(**kwargs)
+
+
+def test_solver_with_line_search():
+    # Without damping, the IEKS does not converge from this grid within
+    # maxit_ieks, and the mesh refinement runs away.
+    bvp = problem_examples.problem_24_second_order(xi=0.05)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 10)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    ibm = statespace.IBM(
+        ordint=4,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+    )
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess, use_bridge=True
+    )
+    backtracking = line_search.BacktrackingLineSearch()
+    solution = solver.solve(
+        bvp,
+        atol=1e-5,
+        rtol=1e-5,
+        initial_posterior=initial_posterior,
+        maxit_ieks=20,
+        line_search=backtracking,
+    )
+    assert backtracking.num_rejections > 0
+    assert max(solver.ieks_iterations) < 20
+    assert solver.status.reason == "converged"
+
+    # Reference values from a solve with a finer initial grid
+    evaluated = solution(np.linspace(bvp.t0, bvp.tmax, 5)).mean[:, 0]
+    expected = np.array([0.9129, 1.08389546, 0.96776794, 0.51732281, 0.375])
+    np.testing.assert_allclose(evaluated, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_acceleration_and_line_search_exclude_each_other():
+    bvp = problem_examples.problem_24_second_order(xi=0.5)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 10)
+    ibm = statespace.IBM(
+        ordint=2,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, filtsmooth_engine="arrays"
+    )
+    initial_posterior, _ = solver.compute_initialisation(bvp, initial_grid)
+    with pytest.raises(ValueError):
+        solver.solve(
+            bvp,
+            atol=1e-3,
+            rtol=1e-3,
+            initial_posterior=initial_posterior,
+            acceleration=object(),
+            line_search=line_search.BacktrackingLineSearch(),
+        )
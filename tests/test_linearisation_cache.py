@@ -0,0 +1,116 @@
+"""Test the selective relinearisation of the ODE measurement model."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, linearisation_cache, ode_measmods, problem_examples
+
+
+@pytest.fixture
+def ibm():
+    return statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.fixture
+def measmod(ibm):
+    bvp = problem_examples.problem_20_second_order(xi=0.1)
+    return ode_measmods.from_ode(bvp, ibm)
+
+
+@pytest.fixture
+def cache():
+    return linearisation_cache.LinearisationCache(atol=1e-3, rtol=1e-3)
+
+
+@pytest.fixture
+def times():
+    return np.linspace(0.0, 1.0, 6)
+
+
+@pytest.fixture
+def means(ibm, times):
+    return np.random.rand(len(times), ibm.dimension)
+
+
+def test_matches_direct_linearisation(measmod, cache, times, means):
+    expected = measmod.linearize_means_on_mesh(times, means)
+    received = cache.linearize_on_mesh(measmod, times, means)
+    for e, r in zip(expected, received):
+        np.testing.assert_allclose(r.state_trans_mat, e.state_trans_mat)
+        np.testing.assert_allclose(r.shift_vec, e.shift_vec)
+    assert (cache.hits, cache.misses) == (0, len(times))
+
+
+def test_reuses_nodes_that_did_not_move(measmod, cache, times, means):
+    first = cache.linearize_on_mesh(measmod, times, means)
+
+    new_means = means.copy()
+    new_means[1, 0] += 1e-8  # below the threshold
+    new_means[2, 1] += 1.0  # moved
+    new_means[3, -1] += 1.0  # does not enter the ODE
+    second = cache.linearize_on_mesh(measmod, times, new_means)
+
+    assert second[1] is first[1]
+    assert second[2] is not first[2]
+    assert second[3] is first[3]
+    expected = measmod.linearize_means_on_mesh(times[2:3], new_means[2:3])[0]
+    np.testing.assert_allclose(second[2].shift_vec, expected.shift_vec)
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.calls) == (5, 7, 2)
+
+
+def test_drops_nodes_that_left_the_mesh(measmod, cache, times, means):
+    cache.linearize_on_mesh(measmod, times, means)
+    cache.linearize_on_mesh(measmod, times[::2], means[::2])
+    assert len(cache) == len(times[::2])
+    assert cache.hits == len(times[::2])
+
+
+def test_solver_with_relinearisation_cache():
+    bvp = problem_examples.problem_23_second_order(xi=0.25)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 20)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    posteriors = []
+    for threshold in [None, 0.1]:
+        ibm = statespace.IBM(
+            ordint=4,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine="arrays"
+        )
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-5,
+                rtol=1e-5,
+                initial_posterior=initial_posterior,
+                maxit_ieks=10,
+                relinearisation_threshold=threshold,
+            )
+        )
+
+    assert solver.linearisation_cache.hits > 0
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].states.mean[:, 0],
+        posteriors[1].states.mean[:, 0],
+        rtol=1e-5,
+        atol=1e-5,
+    )
@@ -1,8 +1,102 @@
 import sys
 
 sys.path.append("..")
-from bvps.ode_measmods import from_ode, from_second_order_ode
+import numpy as np
+import pytest
+from probnum import random_variables, statespace
+
+from bvps import problem_examples
+from bvps.ode_measmods import VectorizedEKFComponent, from_ode, from_second_order_ode
 
 
 def test_sth():
     assert True
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+@pytest.mark.parametrize(
+    "bvp",
+    [
+        problem_examples.problem_7_second_order(xi=0.1),
+        problem_examples.problem_7(xi=0.1),
+    ],
+)
+def test_linearize_on_mesh(bvp, vectorized):
+    if vectorized:
+        bvp = bvp.to_vectorized()
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=bvp.dimension,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    measmod = from_ode(bvp, ibm)
+    assert isinstance(measmod, VectorizedEKFComponent)
+
+    times = np.linspace(bvp.t0, bvp.tmax, 5)
+    states = [random_variables.Constant(np.random.rand(ibm.dimension)) for _ in times]
+    linearised = measmod.linearize_on_mesh(times, states)
+    assert len(linearised) == len(times)
+
+    for t, state, lin in zip(times, states, linearised):
+        expected = measmod.linearize(state)
+        np.testing.assert_allclose(
+            lin.state_trans_mat_fun(t), expected.state_trans_mat_fun(t)
+        )
+        np.testing.assert_allclose(lin.shift_vec_fun(t), expected.shift_vec_fun(t))
+
+
+@pytest.mark.parametrize(
+    "bvp",
+    [
+        problem_examples.problem_7_second_order(xi=0.1),
+        problem_examples.problem_7(xi=0.1),
+    ],
+)
+def test_forward_moments_on_mesh(bvp):
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=bvp.dimension,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    measmod = from_ode(bvp, ibm, damping_value=1e-4)
+
+    times = np.linspace(bvp.t0, bvp.tmax, 5)
+    means = np.random.rand(len(times), ibm.dimension)
+    cov_choleskies = np.tril(np.random.rand(len(times), ibm.dimension, ibm.dimension))
+    residual_means, residual_vars = measmod.forward_moments_on_mesh(
+        times, means, cov_choleskies
+    )
+
+    for t, m, l, res_mean, res_var in zip(
+        times, means, cov_choleskies, residual_means, residual_vars
+    ):
+        rv = random_variables.Normal(m, l @ l.T, cov_cholesky=l)
+        expected, _ = measmod.forward_rv(rv, t)
+        np.testing.assert_allclose(res_mean, expected.mean)
+        np.testing.assert_allclose(res_var, expected.var)
+
+    residual_means_only, no_vars = measmod.forward_moments_on_mesh(times, means)
+    np.testing.assert_allclose(residual_means_only, residual_means)
+    assert no_vars is None
+
+
+@pytest.mark.parametrize(
+    "bvp,expected",
+    [
+        (problem_examples.problem_7_second_order(xi=0.1), True),
+        (problem_examples.problem_7(xi=0.1), True),
+        (problem_examples.problem_20_second_order(xi=0.1), False),
+        (problem_examples.problem_23_second_order(xi=0.25), False),
+    ],
+)
+def test_is_linear(bvp, expected):
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=bvp.dimension,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    measmod = from_ode(bvp, ibm)
+    assert measmod.is_linear(np.linspace(bvp.t0, bvp.tmax, 5)) == expected
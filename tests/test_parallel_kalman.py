@@ -0,0 +1,81 @@
+"""Test the parallel-in-time Kalman filter against the array-backed implementation."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append("..")
+import numpy as np
+import pytest
+
+from bvps import array_kalman, bvp_solver, parallel_kalman
+
+
+def test_associative_scan():
+    elements = (np.random.rand(21), np.random.rand(21, 2))
+    add = lambda a, b: tuple(x + y for x, y in zip(a, b))
+    for num_chunks in [1, 4, 30]:
+        scanned = parallel_kalman.associative_scan(add, elements, num_chunks=num_chunks)
+        np.testing.assert_allclose(scanned[0], np.cumsum(elements[0]))
+        np.testing.assert_allclose(scanned[1], np.cumsum(elements[1], axis=0))
+
+
+@pytest.mark.parametrize("num_chunks,use_executor", [(1, False), (3, False), (4, True)])
+def test_filtsmooth_matches_arrays(
+    solver, ibm, times, measmod_list, num_chunks, use_executor
+):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    posterior1 = arrays.filtsmooth(dataset, times, measmod_list)
+
+    with ThreadPoolExecutor(max_workers=num_chunks) as executor:
+        parallel = parallel_kalman.ParallelKalman(
+            ibm,
+            None,
+            initrv,
+            executor=executor if use_executor else None,
+            num_chunks=num_chunks,
+        )
+        posterior2 = parallel.filtsmooth(dataset, times, measmod_list)
+
+    np.testing.assert_allclose(
+        posterior1.filtering_posterior.means,
+        posterior2.filtering_posterior.means,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(posterior1.means, posterior2.means, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(
+        posterior1.states.cov, posterior2.states.cov, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(arrays.sigmas, parallel.sigmas, rtol=1e-6)
+    assert arrays.normalisation_for_sigmas == parallel.normalisation_for_sigmas
+
+    locations = np.linspace(times[0], times[-1], 77)
+    np.testing.assert_allclose(
+        posterior1(locations).mean, posterior2(locations).mean, rtol=1e-6, atol=1e-6
+    )
+
+
+def test_solver_with_parallel_engine(ibm, bvp):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm,
+            initial_sigma_squared=1e2,
+            filtsmooth_engine="parallel",
+            filtsmooth_options={"executor": executor, "num_chunks": 2},
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posterior = solver.solve(
+            bvp,
+            atol=1e-3,
+            rtol=1e-3,
+            initial_posterior=initial_posterior,
+            maxit_ieks=2,
+        )
+    assert isinstance(posterior, array_kalman.ArraySmoothingPosterior)
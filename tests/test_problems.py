@@ -1,8 +1,66 @@
 import sys
 
 sys.path.append("..")
+import numpy as np
+import pytest
+
+from bvps import problem_examples
 from bvps.problems import BoundaryValueProblem, SecondOrderBoundaryValueProblem
 
 
 def test_sth():
     assert True
+
+
+@pytest.fixture
+def times():
+    return np.linspace(-1.0, 1.0, 7)
+
+
+@pytest.mark.parametrize(
+    "bvp",
+    [
+        problem_examples.problem_7_second_order(xi=0.1),
+        problem_examples.problem_7(xi=0.1),
+        problem_examples.pendulum(),
+    ],
+)
+def test_to_vectorized(bvp, times):
+    states = np.random.rand(len(times), 2)
+    vectorized = bvp.to_vectorized()
+    assert vectorized.vectorized
+
+    if isinstance(bvp, SecondOrderBoundaryValueProblem):
+        args = (states[:, :1], states[:, 1:])
+        jacobians = ("df_dy", "df_ddy")
+    else:
+        args = (states,)
+        jacobians = ("df",)
+
+    f = vectorized.f(times, *args)
+    assert f.shape == (len(times), bvp.dimension)
+    for i, t in enumerate(times):
+        np.testing.assert_allclose(f[i], bvp.f(t, *(a[i] for a in args)))
+
+    for jac in jacobians:
+        df = getattr(vectorized, jac)(times, *args)
+        assert df.shape == (len(times), bvp.dimension, bvp.dimension)
+        for i, t in enumerate(times):
+            np.testing.assert_allclose(
+                df[i], getattr(bvp, jac)(t, *(a[i] for a in args))
+            )
+
+
+def test_vectorized_to_first_order(times):
+    bvp = problem_examples.problem_7_second_order(xi=0.1)
+    first_order = bvp.to_first_order()
+    first_order_vectorized = bvp.to_vectorized().to_first_order()
+    assert isinstance(first_order_vectorized, BoundaryValueProblem)
+    assert first_order_vectorized.vectorized
+
+    states = np.random.rand(len(times), 2)
+    f = first_order_vectorized.f(times, states)
+    df = first_order_vectorized.df(times, states)
+    for i, t in enumerate(times):
+        np.testing.assert_allclose(f[i], first_order.f(t, states[i]))
+        np.testing.assert_allclose(df[i], first_order.df(t, states[i]))
@@ -0,0 +1,155 @@
+"""Test that one solver (and one prior) can serve concurrent solves."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import bvp_solver, problem_examples, solve_context, transition_cache
+
+
+@pytest.fixture(params=["ibm", "cached_ibm"])
+def ibm(request):
+    prior_type = {"ibm": statespace.IBM, "cached_ibm": transition_cache.CachedIBM}
+    return prior_type[request.param](
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.fixture(params=["arrays", "banded"])
+def solver(ibm, request):
+    return bvp_solver.BVPSolver.from_default_values_std_refinement(
+        ibm, initial_sigma_squared=1e2, filtsmooth_engine=request.param
+    )
+
+
+def solve(solver, xi, tol, context=None):
+    bvp = problem_examples.problem_20_second_order(xi=xi)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=initial_guess
+    )
+    return solver.solve(
+        bvp,
+        atol=tol,
+        rtol=tol,
+        initial_posterior=initial_posterior,
+        maxit_ieks=10,
+        context=context,
+    )
+
+
+def assert_posteriors_equal(posterior1, posterior2):
+    np.testing.assert_allclose(posterior1.locations, posterior2.locations)
+    np.testing.assert_allclose(posterior1.states.mean, posterior2.states.mean)
+    locations = np.linspace(posterior1.locations[0], posterior1.locations[-1], 17)
+    np.testing.assert_allclose(
+        posterior1(locations).mean, posterior2(locations).mean, rtol=1e-10
+    )
+
+
+def test_scale_diffusion_copies(ibm):
+    discretisation = ibm.equivalent_discretisation_preconditioned
+    cholesky = discretisation.proc_noise_cov_cholesky.copy()
+    scaled = solve_context.scale_diffusion(ibm, 9.0)
+    np.testing.assert_allclose(discretisation.proc_noise_cov_cholesky, cholesky)
+    np.testing.assert_allclose(
+        scaled.equivalent_discretisation_preconditioned.proc_noise_cov_cholesky,
+        3.0 * cholesky,
+    )
+
+
+def test_scale_diffusion_does_not_copy_cache():
+    ibm = transition_cache.CachedIBM(ordint=2, spatialdim=1)
+    ibm.discretise(0.1)
+    scaled = solve_context.scale_diffusion(ibm, 4.0)
+    assert scaled.transition_cache is not ibm.transition_cache
+    assert len(scaled.transition_cache) == 0
+    assert scaled.transition_cache.maxsize == ibm.transition_cache.maxsize
+    assert len(ibm.transition_cache) == 1
+
+
+def test_solve_does_not_modify_prior(solver, ibm):
+    discretisation = ibm.equivalent_discretisation_preconditioned
+    cholesky = discretisation.proc_noise_cov_cholesky.copy()
+    cov = discretisation.proc_noise_cov_mat.copy()
+
+    posterior1 = solve(solver, xi=0.5, tol=1e-3)
+    np.testing.assert_allclose(discretisation.proc_noise_cov_cholesky, cholesky)
+    np.testing.assert_allclose(discretisation.proc_noise_cov_mat, cov)
+
+    # A reused solver yields the same result.
+    posterior2 = solve(solver, xi=0.5, tol=1e-3)
+    assert_posteriors_equal(posterior1, posterior2)
+
+
+def test_context_statistics(solver):
+    context = solve_context.SolveContext()
+    posterior = solve(solver, xi=0.5, tol=1e-3, context=context)
+    assert solver.context is context
+    assert solver.ieks_iterations is context.ieks_iterations
+    assert len(context.ieks_iterations) > 0
+    assert context.status.reason == "converged"
+    assert context.status.num_nodes == len(posterior.locations)
+    assert context.filter_object.dynamics_model is context.dynamics_model
+    assert context.dynamics_model is not solver.dynamics_model
+
+
+def test_statistics_are_ambiguous_while_calls_overlap(solver):
+    bvp = problem_examples.problem_20_second_order(xi=0.5)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+    initial_posterior, _ = solver.compute_initialisation(
+        bvp, initial_grid, initial_guess=np.ones((len(initial_grid), bvp.dimension))
+    )
+    contexts = [solve_context.SolveContext() for _ in range(2)]
+    generators = [
+        solver.solution_generator(
+            bvp, atol=1e-3, rtol=1e-3, initial_posterior=initial_posterior, context=c
+        )
+        for c in contexts
+    ]
+    next(generators[0])
+    assert solver.context is contexts[0]
+    next(generators[1])
+    with pytest.raises(RuntimeError):
+        solver.ieks_iterations
+    assert len(contexts[0].ieks_iterations) == 1
+
+    generators[1].close()
+    assert solver.context is contexts[1]
+    for _ in generators[0]:
+        pass
+    assert solver.ieks_iterations is contexts[1].ieks_iterations
+    assert contexts[0].status.reason == "converged"
+
+
+def test_concurrent_solves_match_serial_solves(solver):
+    configurations = [(0.5, 1e-3), (0.2, 1e-3), (1.0, 1e-4), (0.5, 1e-4)] * 2
+    serial_contexts = [solve_context.SolveContext() for _ in configurations]
+    serial = [
+        solve(solver, xi, tol, context)
+        for (xi, tol), context in zip(configurations, serial_contexts)
+    ]
+
+    contexts = [solve_context.SolveContext() for _ in configurations]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(solve, solver, xi, tol, context)
+            for (xi, tol), context in zip(configurations, contexts)
+        ]
+        concurrent = [future.result() for future in futures]
+
+    for posterior1, posterior2 in zip(serial, concurrent):
+        assert_posteriors_equal(posterior1, posterior2)
+    for serial_context, context in zip(serial_contexts, contexts):
+        assert context.ieks_iterations == serial_context.ieks_iterations
+        assert context.status == serial_context.status._replace(
+            elapsed_time=context.status.elapsed_time
+        )
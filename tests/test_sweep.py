@@ -0,0 +1,73 @@
+"""Test the parameter sweeps over a process pool."""
+
+import os
+import pickle
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+
+from bvps import sweep
+
+
+@pytest.fixture
+def tasks():
+    problems = [
+        sweep.ProblemFactory("problem_20_second_order", xi=xi) for xi in [0.2, 0.5]
+    ]
+    return sweep.tasks_from_grid(problems, ordints=[3, 4], tols=[1e-3, 1e-4])
+
+
+def test_problem_factory_can_be_pickled():
+    factory = sweep.ProblemFactory("problem_24_second_order", xi=0.5, gamma=1.4)
+    received = pickle.loads(pickle.dumps(factory))()
+    expected = factory()
+    t, y, dy = 0.5, np.ones(1), np.ones(1)
+    np.testing.assert_allclose(received.f(t, y, dy), expected.f(t, y, dy))
+
+
+def test_unknown_problem():
+    with pytest.raises(ValueError):
+        sweep.ProblemFactory("problem_0")
+
+
+def test_tasks_from_grid(tasks):
+    assert len(tasks) == 8
+    assert tasks[0].initial_grid_size == 20
+
+
+def test_sweep_matches_serial_solves(tasks):
+    shared_memory_before = set(os.listdir("/dev/shm"))
+    results = sweep.run_sweep(tasks, max_workers=2)
+    assert set(os.listdir("/dev/shm")) == shared_memory_before
+
+    for task, result in zip(tasks, results):
+        assert result.task == task
+        assert result.error is None
+        assert result.status.reason == "converged"
+
+        expected = sweep.solve_task(task)
+        np.testing.assert_allclose(result.locations, expected.locations)
+        np.testing.assert_allclose(result.means, expected.means)
+        np.testing.assert_allclose(result.cov_choleskies, expected.cov_choleskies)
+        assert result.ieks_iterations == expected.ieks_iterations
+
+
+def test_failed_solves_are_reported():
+    problem = sweep.ProblemFactory("problem_20_second_order", xi=0.5)
+    task = sweep.SweepTask(problem, ordint=3, tol=1e-3, initial_grid_size=2)
+    (result,) = sweep.run_sweep([task], max_workers=1)
+    assert result.error is not None
+    assert result.means is None
+
+
+def test_any_exception_is_reported(tasks):
+    failing = [
+        tasks[0]._replace(filtsmooth_engine="unknown"),
+        tasks[0]._replace(maxit_ieks=None),
+    ]
+    results = sweep.run_sweep(failing + tasks[:1], max_workers=2)
+    assert results[0].error.startswith("ValueError")
+    assert results[1].error.startswith("TypeError")
+    assert results[2].error is None
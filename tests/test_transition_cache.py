@@ -0,0 +1,138 @@
+"""Test the per-step transition cache for IBM priors."""
+
+import sys
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import random_variables, statespace
+
+from bvps import bvp_solver, problem_examples, transition_cache
+
+
+@pytest.fixture
+def ibm():
+    return statespace.IBM(
+        ordint=3,
+        spatialdim=2,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+
+
+@pytest.fixture
+def cached_ibm():
+    return transition_cache.CachedIBM(
+        ordint=3,
+        spatialdim=2,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+        cache_size=4,
+    )
+
+
+@pytest.fixture
+def rv(ibm):
+    cov_cholesky = np.tril(np.random.rand(ibm.dimension, ibm.dimension)) + np.eye(
+        ibm.dimension
+    )
+    return random_variables.Normal(
+        np.random.rand(ibm.dimension),
+        cov_cholesky @ cov_cholesky.T,
+        cov_cholesky=cov_cholesky,
+    )
+
+
+@pytest.mark.parametrize("dt", [0.1, 1e-3])
+def test_discretise_matches_ibm(ibm, cached_ibm, dt):
+    expected = ibm.discretise(dt)
+    received = cached_ibm.discretise(dt)
+    np.testing.assert_allclose(received.state_trans_mat, expected.state_trans_mat)
+    np.testing.assert_allclose(
+        received.proc_noise_cov_cholesky, expected.proc_noise_cov_cholesky
+    )
+    np.testing.assert_allclose(received.proc_noise_cov_mat, expected.proc_noise_cov_mat)
+
+
+def test_forward_backward_match_ibm(ibm, cached_ibm, rv):
+    expected, _ = ibm.forward_rv(rv, 0.0, dt=0.1)
+    received, _ = cached_ibm.forward_rv(rv, 0.0, dt=0.1)
+    np.testing.assert_allclose(received.mean, expected.mean)
+    np.testing.assert_allclose(received.cov, expected.cov)
+
+    expected, _ = ibm.backward_rv(expected, rv, t=0.0, dt=0.1)
+    received, _ = cached_ibm.backward_rv(received, rv, t=0.0, dt=0.1)
+    np.testing.assert_allclose(received.mean, expected.mean)
+    np.testing.assert_allclose(received.cov, expected.cov)
+
+
+def test_hits_and_misses(cached_ibm, rv):
+    for dt in [0.1, 0.2, 0.1, 0.1]:
+        cached_ibm.forward_rv(rv, 0.0, dt=dt)
+    info = cached_ibm.transition_cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+
+def test_bounded(cached_ibm):
+    for dt in np.linspace(0.1, 1.0, 10):
+        cached_ibm.discretise(dt)
+    assert len(cached_ibm.transition_cache) == 4
+    assert (3, 2, 0.1, 1.0) not in cached_ibm.transition_cache
+    assert (3, 2, 1.0, 1.0) in cached_ibm.transition_cache
+
+
+def test_scale_diffusion_invalidates(ibm, cached_ibm):
+    before = cached_ibm.discretise(0.1).proc_noise_cov_cholesky
+    cached_ibm.scale_diffusion(4.0)
+    after = cached_ibm.discretise(0.1).proc_noise_cov_cholesky
+
+    np.testing.assert_allclose(after, 2.0 * before)
+    info = cached_ibm.transition_cache.cache_info()
+    assert (info.hits, info.misses, info.invalidations) == (0, 2, 1)
+    assert cached_ibm.diffusion_scale == 4.0
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        transition_cache.TransitionCache(maxsize=0)
+
+
+def test_solver_with_cached_prior():
+    ibm = statespace.IBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    cached_ibm = transition_cache.CachedIBM(
+        ordint=3,
+        spatialdim=1,
+        forward_implementation="sqrt",
+        backward_implementation="sqrt",
+    )
+    bvp = problem_examples.problem_7_second_order(xi=0.1)
+    initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+    initial_guess = np.ones((len(initial_grid), bvp.dimension))
+
+    posteriors = []
+    for prior in [ibm, cached_ibm]:
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            prior, initial_sigma_squared=1e2
+        )
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-3,
+                rtol=1e-3,
+                initial_posterior=initial_posterior,
+                maxit_ieks=2,
+            )
+        )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].states.mean, posteriors[1].states.mean, rtol=1e-8, atol=1e-8
+    )
+    assert cached_ibm.transition_cache.hits > 0
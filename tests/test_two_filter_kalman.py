@@ -0,0 +1,103 @@
+"""Test the two-filter smoother."""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.append("..")
+import numpy as np
+import pytest
+from probnum import statespace
+
+from bvps import array_kalman, bvp_solver, problem_examples, two_filter_kalman
+
+
+@pytest.mark.parametrize(
+    "executor_type", [None, ThreadPoolExecutor, ProcessPoolExecutor]
+)
+def test_filtsmooth_matches_arrays(solver, ibm, times, measmod_list, executor_type):
+    initrv = solver.create_initrv()
+    dataset = np.zeros((len(times), 1))
+
+    arrays = array_kalman.ArrayKalman(ibm, None, initrv)
+    posterior1 = arrays.filtsmooth(dataset, times, measmod_list)
+
+    if executor_type is None:
+        two_filter = two_filter_kalman.TwoFilterKalman(ibm, None, initrv)
+        posterior2 = two_filter.filtsmooth(dataset, times, measmod_list)
+    else:
+        with executor_type(max_workers=1) as executor:
+            two_filter = two_filter_kalman.TwoFilterKalman(
+                ibm, None, initrv, executor=executor
+            )
+            posterior2 = two_filter.filtsmooth(dataset, times, measmod_list)
+
+    np.testing.assert_allclose(
+        posterior1.filtering_posterior.means,
+        posterior2.filtering_posterior.means,
+        rtol=1e-6,
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(posterior1.means, posterior2.means, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(
+        posterior1.states.cov, posterior2.states.cov, rtol=1e-6, atol=1e-6
+    )
+    np.testing.assert_allclose(arrays.sigmas, two_filter.sigmas, rtol=1e-6)
+    assert arrays.normalisation_for_sigmas == two_filter.normalisation_for_sigmas
+
+
+def test_backward_information(solver, ibm, times, measmod_list):
+    """Conditioning the filtering distribution on the backward information
+    yields the smoothing distribution; at the last node, there is none."""
+    initrv = solver.create_initrv()
+    two_filter = two_filter_kalman.TwoFilterKalman(ibm, None, initrv)
+    posterior = two_filter.filtsmooth(np.zeros((len(times), 1)), times, measmod_list)
+
+    y, Z = two_filter.backward_information
+    assert y.shape == (len(times), ibm.dimension)
+    assert Z.shape == (len(times), ibm.dimension, ibm.dimension)
+    np.testing.assert_allclose(Z[-1], 0.0)
+
+    idx = len(times) // 2
+    filtered = posterior.filtering_posterior
+    mean, _, _, _ = array_kalman.update(
+        filtered.means[idx],
+        filtered.cov_choleskies[idx],
+        Z[idx].T,
+        np.zeros(ibm.dimension),
+        np.eye(ibm.dimension),
+        y[idx],
+    )
+    np.testing.assert_allclose(mean, posterior.means[idx], rtol=1e-8, atol=1e-8)
+
+
+def test_solver_with_two_filter_engine():
+    bvp = problem_examples.problem_20_second_order(xi=0.2)
+    posteriors = []
+    for engine in ["arrays", "two_filter"]:
+        ibm = statespace.IBM(
+            ordint=3,
+            spatialdim=1,
+            forward_implementation="sqrt",
+            backward_implementation="sqrt",
+        )
+        solver = bvp_solver.BVPSolver.from_default_values_std_refinement(
+            ibm, initial_sigma_squared=1e2, filtsmooth_engine=engine
+        )
+        initial_grid = np.linspace(bvp.t0, bvp.tmax, 8)
+        initial_guess = np.ones((len(initial_grid), bvp.dimension))
+        initial_posterior, _ = solver.compute_initialisation(
+            bvp, initial_grid, initial_guess=initial_guess
+        )
+        posteriors.append(
+            solver.solve(
+                bvp,
+                atol=1e-4,
+                rtol=1e-4,
+                initial_posterior=initial_posterior,
+                maxit_ieks=10,
+            )
+        )
+    np.testing.assert_allclose(posteriors[0].locations, posteriors[1].locations)
+    np.testing.assert_allclose(
+        posteriors[0].means[:, 0], posteriors[1].means[:, 0], rtol=1e-6, atol=1e-6
+    )